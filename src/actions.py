@@ -0,0 +1,265 @@
+from __future__ import annotations
+from typing import Annotated, Literal, Union
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+from data_storage import Player, SavedGameData, Token
+from rules import RulesEngine, get_rules
+
+
+class ActionError(Exception):
+    """Raised when an action isn't allowed in the current state of the game"""
+
+
+class Action(BaseModel):
+    """Something that a player does to change the state of the game
+
+    - Actions only touch `SavedGameData`, so the server can validate and apply them without pygame
+    """
+
+    type: str
+
+    def check(self, data: SavedGameData):
+        """Raises an ActionError if the action can't be applied to the game"""
+        raise NotImplementedError()
+
+    def apply(self, data: SavedGameData):
+        """Changes the game data. Should only be called once `check()` has passed."""
+        raise NotImplementedError()
+
+    def get_acting_player_index(self) -> int | None:
+        """Returns the index of the player who's taking the action, or None if it isn't taken by one player"""
+        return None
+
+
+def get_player(data: SavedGameData, player_index: int) -> Player:
+    if not 0 <= player_index < len(data.players):
+        raise ActionError(f"There is no player {player_index}")
+    return data.players[player_index]
+
+
+class AddPlayer(Action):
+    type: Literal["add_player"] = "add_player"
+    # If left out, the player gets the next default name when the action is applied
+    nickname: str | None = Field(None, min_length=1, max_length=32)
+
+    def get_nickname(self, data: SavedGameData) -> str:
+        return self.nickname or data.get_next_default_player_name()
+
+    def check(self, data: SavedGameData):
+        if not data.get_free_player_slots():
+            raise ActionError("The game is already full")
+
+    def apply(self, data: SavedGameData):
+        data.players.append(Player(nickname=self.get_nickname(data)))
+
+
+class SetPlayerToken(Action):
+    type: Literal["set_player_token"] = "set_player_token"
+    player_index: int
+    token: Token
+
+    def check(self, data: SavedGameData):
+        player = get_player(data, self.player_index)
+        if player.token == self.token:
+            return
+        if any(other.token == self.token for other in data.players):
+            raise ActionError(f"The {self.token.value} is already taken")
+
+    def apply(self, data: SavedGameData):
+        data.players[self.player_index].set_token(self.token)
+
+    def get_acting_player_index(self) -> int | None:
+        return self.player_index
+
+
+class PropertyAction(Action):
+    """An action that a player takes on one of the board's spaces, which is checked and applied by the RulesEngine"""
+
+    player_index: int
+    space_index: int
+
+    def get_problem(self, rules: RulesEngine) -> str | None:
+        raise NotImplementedError()
+
+    def perform(self, rules: RulesEngine):
+        raise NotImplementedError()
+
+    def check(self, data: SavedGameData):
+        problem = self.get_problem(get_rules(data))
+        if problem:
+            raise ActionError(problem)
+
+    def apply(self, data: SavedGameData):
+        self.perform(get_rules(data))
+
+    def get_acting_player_index(self) -> int | None:
+        return self.player_index
+
+
+class BuyProperty(PropertyAction):
+    type: Literal["buy_property"] = "buy_property"
+
+    def get_problem(self, rules: RulesEngine) -> str | None:
+        return rules.buy_problem(self.player_index, self.space_index)
+
+    def perform(self, rules: RulesEngine):
+        rules.buy(self.player_index, self.space_index)
+
+
+class BuildHouse(PropertyAction):
+    """Builds a house, or a hotel if the property already has four houses"""
+
+    type: Literal["build_house"] = "build_house"
+
+    def get_problem(self, rules: RulesEngine) -> str | None:
+        return rules.build_problem(self.player_index, self.space_index)
+
+    def perform(self, rules: RulesEngine):
+        rules.build(self.player_index, self.space_index)
+
+
+class SellBuilding(PropertyAction):
+    type: Literal["sell_building"] = "sell_building"
+
+    def get_problem(self, rules: RulesEngine) -> str | None:
+        return rules.sell_building_problem(self.player_index, self.space_index)
+
+    def perform(self, rules: RulesEngine):
+        rules.sell_building(self.player_index, self.space_index)
+
+
+class MortgageProperty(PropertyAction):
+    type: Literal["mortgage_property"] = "mortgage_property"
+
+    def get_problem(self, rules: RulesEngine) -> str | None:
+        return rules.mortgage_problem(self.player_index, self.space_index)
+
+    def perform(self, rules: RulesEngine):
+        rules.mortgage(self.player_index, self.space_index)
+
+
+class UnmortgageProperty(PropertyAction):
+    type: Literal["unmortgage_property"] = "unmortgage_property"
+
+    def get_problem(self, rules: RulesEngine) -> str | None:
+        return rules.unmortgage_problem(self.player_index, self.space_index)
+
+    def perform(self, rules: RulesEngine):
+        rules.unmortgage(self.player_index, self.space_index)
+
+
+class TradeProperties(Action):
+    """Swaps properties between two players, along with some cash
+
+    - `cash` is paid by the proposer to the recipient, or by the recipient if it's negative
+    - In networked games, the server only applies it once the recipient has accepted it
+    """
+
+    type: Literal["trade_properties"] = "trade_properties"
+    proposer_index: int
+    recipient_index: int
+    offered_spaces: list[int] = []
+    requested_spaces: list[int] = []
+    cash: int = 0
+
+    def check(self, data: SavedGameData):
+        problem = get_rules(data).trade_problem(
+            self.proposer_index,
+            self.recipient_index,
+            self.offered_spaces,
+            self.requested_spaces,
+            self.cash,
+        )
+        if problem:
+            raise ActionError(problem)
+
+    def apply(self, data: SavedGameData):
+        get_rules(data).trade(
+            self.proposer_index,
+            self.recipient_index,
+            self.offered_spaces,
+            self.requested_spaces,
+            self.cash,
+        )
+
+    def get_acting_player_index(self) -> int | None:
+        return self.proposer_index
+
+
+class StartAuction(Action):
+    type: Literal["start_auction"] = "start_auction"
+    space_index: int
+    countdown_ms: int = Field(10_000, ge=1000, le=60_000)
+
+    def check(self, data: SavedGameData):
+        problem = get_rules(data).start_auction_problem(self.space_index)
+        if problem:
+            raise ActionError(problem)
+
+    def apply(self, data: SavedGameData):
+        get_rules(data).start_auction(self.space_index, self.countdown_ms)
+
+
+class PlaceBid(Action):
+    type: Literal["place_bid"] = "place_bid"
+    player_index: int
+    amount: int
+
+    def check(self, data: SavedGameData):
+        problem = get_rules(data).bid_problem(self.player_index, self.amount)
+        if problem:
+            raise ActionError(problem)
+
+    def apply(self, data: SavedGameData):
+        get_rules(data).place_bid(self.player_index, self.amount)
+
+    def get_acting_player_index(self) -> int | None:
+        return self.player_index
+
+
+class EndAuction(Action):
+    """Sent once the auction's countdown runs out, by whoever is keeping time (i.e. the server in networked games)"""
+
+    type: Literal["end_auction"] = "end_auction"
+
+    def check(self, data: SavedGameData):
+        if not data.auction:
+            raise ActionError("There isn't an auction to end")
+
+    def apply(self, data: SavedGameData):
+        get_rules(data).end_auction()
+
+
+AnyAction = Annotated[
+    Union[
+        AddPlayer,
+        SetPlayerToken,
+        BuyProperty,
+        BuildHouse,
+        SellBuilding,
+        MortgageProperty,
+        UnmortgageProperty,
+        TradeProperties,
+        StartAuction,
+        PlaceBid,
+        EndAuction,
+    ],
+    Field(discriminator="type"),
+]
+action_adapter: TypeAdapter[Action] = TypeAdapter(AnyAction)
+
+
+def parse_action(serialized_action: dict) -> Action:
+    """Turns a dict (e.g. from a network message) into the right kind of action"""
+    return action_adapter.validate_python(serialized_action)
+
+
+def get_legal_actions(data: SavedGameData, player_index: int) -> list[Action]:
+    """Lists the property actions that a player can take right now, e.g. for the UI or an AI player"""
+    return [
+        parse_action(
+            {"type": action_type, "player_index": player_index, "space_index": index}
+        )
+        for action_type, index in get_rules(data).legal_actions(player_index)
+    ]
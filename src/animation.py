@@ -0,0 +1,116 @@
+from __future__ import annotations
+from typing import Callable
+
+# Easing curves map linear progress (0.0 to 1.0) to eased progress
+
+
+def linear(progress: float) -> float:
+    return progress
+
+
+def ease_in_quad(progress: float) -> float:
+    return progress * progress
+
+
+def ease_out_quad(progress: float) -> float:
+    return 1 - (1 - progress) * (1 - progress)
+
+
+def ease_in_out_cubic(progress: float) -> float:
+    if progress < 0.5:
+        return 4 * progress**3
+    return 1 - (-2 * progress + 2) ** 3 / 2
+
+
+class Tween:
+    """Smoothly changes a value from start to end over a set duration"""
+
+    __slots__ = (
+        "start",
+        "end",
+        "duration",
+        "easing",
+        "on_update",
+        "on_finish",
+        "elapsed",
+        "value",
+        "finished",
+    )
+
+    def __init__(
+        self,
+        start: float,
+        end: float,
+        duration_ms: float,
+        on_update: Callable[[float], None] | None = None,
+        easing: Callable[[float], float] = ease_in_out_cubic,
+        on_finish: Callable[[], None] | None = None,
+    ) -> None:
+        self.start = start
+        self.end = end
+        self.duration = duration_ms
+        self.easing = easing
+        self.on_update = on_update
+        self.on_finish = on_finish
+        self.elapsed = 0.0
+        self.value = start
+        self.finished = False
+
+    def step(self, milliseconds: float):
+        self.elapsed += milliseconds
+        progress = min(self.elapsed / self.duration, 1.0) if self.duration else 1.0
+        self.value = self.start + (self.end - self.start) * self.easing(progress)
+        if self.on_update:
+            self.on_update(self.value)
+        if progress >= 1.0:
+            self.finished = True
+
+
+class Animator:
+    """Updates every active tween using a fixed timestep, independently of the frame rate
+
+    - Time is accumulated each tick and used up in fixed-size steps, so animations play at the same speed at any FPS
+    - All tweens are updated together in one pass per step
+    """
+
+    def __init__(self, timestep_ms: float = 1000 / 120, max_steps_per_tick: int = 12):
+        self.timestep = timestep_ms
+        # Stops a long stall (e.g. dragging the window) from causing a huge burst of steps
+        self.max_steps_per_tick = max_steps_per_tick
+        self.tweens: list[Tween] = []
+        self.accumulated_time = 0.0
+
+    def add(self, tween: Tween) -> Tween:
+        self.tweens.append(tween)
+        return tween
+
+    def cancel(self, tween: Tween):
+        if tween in self.tweens:
+            self.tweens.remove(tween)
+
+    def is_active(self) -> bool:
+        return bool(self.tweens)
+
+    def update(self, elapsed_ms: float):
+        if not self.tweens:
+            self.accumulated_time = 0.0
+            return
+        self.accumulated_time += elapsed_ms
+        step_count = int(self.accumulated_time // self.timestep)
+        if step_count > self.max_steps_per_tick:
+            step_count = self.max_steps_per_tick
+            self.accumulated_time = 0.0
+        else:
+            self.accumulated_time -= step_count * self.timestep
+
+        for _ in range(step_count):
+            for tween in self.tweens:
+                tween.step(self.timestep)
+            if any(tween.finished for tween in self.tweens):
+                finished_tweens = [tween for tween in self.tweens if tween.finished]
+                self.tweens = [tween for tween in self.tweens if not tween.finished]
+                for tween in finished_tweens:
+                    if tween.on_finish:
+                        tween.on_finish()
+            if not self.tweens:
+                break
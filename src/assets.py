@@ -0,0 +1,150 @@
+from __future__ import annotations
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Tuple
+
+import pygame
+from pygame import Surface
+
+from events import GameEvent
+from game_engine import PointSpecifier, Texture
+
+if TYPE_CHECKING:
+    from game_engine import Game
+
+
+def surface_size_in_bytes(surface: Surface) -> int:
+    return surface.get_pitch() * surface.get_height()
+
+
+class AssetManager:
+    """Loads images once, converts them to the display's pixel format, and caches scaled copies
+
+    - Scaled copies are kept in an LRU cache with a memory limit, and are thrown away when the window is resized
+    - `preload()` reads files on a worker thread, so that showing a page doesn't have to wait for the disk
+    """
+
+    def __init__(
+        self,
+        game: Game,
+        asset_directory: Path,
+        max_scaled_cache_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        self.game = game
+        self.asset_directory = asset_directory
+        self.max_scaled_cache_bytes = max_scaled_cache_bytes
+        # Full-size images, converted for fast blitting. These are never evicted.
+        self._originals: dict[str, Surface] = {}
+        # Scaled copies, least recently used first
+        self._scaled: OrderedDict[Tuple[str, Tuple[int, int]], Surface] = OrderedDict()
+        self._scaled_bytes = 0
+        # Names of the images that are currently being read by a worker
+        self._pending_loads: set[str] = set()
+        game.events.on(GameEvent.WINDOW_RESIZED, self.clear_scaled_cache)
+
+    def path_for(self, name: str) -> Path:
+        return self.asset_directory / name
+
+    def decode(self, name: str, file_contents: bytes) -> Surface:
+        """Turns the contents of an image file into a surface in the display's format (main thread only)"""
+        image = pygame.image.load(BytesIO(file_contents), name)
+        has_transparency = image.get_flags() & pygame.SRCALPHA
+        converted_image = image.convert_alpha() if has_transparency else image.convert()
+        self._originals[name] = converted_image
+        return converted_image
+
+    def get(self, name: str) -> Surface:
+        """Returns the full-size image, loading it from disk if it hasn't been preloaded"""
+        image = self._originals.get(name)
+        if image:
+            return image
+        print(f"AssetManager: Loading {name} on the main thread (it wasn't preloaded)")
+        return self.decode(name, self.path_for(name).read_bytes())
+
+    def get_scaled(self, name: str, size: Tuple[int, int]) -> Surface:
+        key = (name, size)
+        scaled_image = self._scaled.get(key)
+        if scaled_image:
+            self._scaled.move_to_end(key)
+            return scaled_image
+        scaled_image = pygame.transform.smoothscale(self.get(name), size)
+        self._scaled[key] = scaled_image
+        self._scaled_bytes += surface_size_in_bytes(scaled_image)
+        self.evict_scaled_images()
+        return scaled_image
+
+    def evict_scaled_images(self):
+        # Always keep the newest image, even if it's over the limit by itself
+        while (
+            self._scaled_bytes > self.max_scaled_cache_bytes and len(self._scaled) > 1
+        ):
+            _, evicted_image = self._scaled.popitem(last=False)
+            self._scaled_bytes -= surface_size_in_bytes(evicted_image)
+
+    def clear_scaled_cache(self, *_):
+        self._scaled.clear()
+        self._scaled_bytes = 0
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._originals
+
+    def preload(
+        self,
+        names: Iterable[str],
+        sizes: Iterable[Tuple[int, int]] = (),
+        on_loaded: Callable[[str], None] | None = None,
+    ):
+        """Reads the files in the background, then decodes them (and prepares any scaled copies) as they arrive
+
+        - Decoding and scaling happen on the main thread, one image per completed read
+        """
+        sizes = list(sizes)
+        for name in names:
+            if self.is_loaded(name) or name in self._pending_loads:
+                continue
+            self._pending_loads.add(name)
+
+            def on_read(file_contents: bytes, name=name):
+                self._pending_loads.discard(name)
+                self.decode(name, file_contents)
+                for size in sizes:
+                    self.get_scaled(name, size)
+                if on_loaded:
+                    on_loaded(name)
+
+            def on_error(exception: BaseException, name=name):
+                self._pending_loads.discard(name)
+                print(f"AssetManager: Failed to preload {name}: {exception}")
+
+            self.game.tasks.submit(
+                self.path_for(name).read_bytes, on_done=on_read, on_error=on_error
+            )
+
+
+class AssetTexture(Texture):
+    """Draws an image from the asset manager, scaled to the provided size"""
+
+    def __init__(
+        self,
+        game: Game,
+        assets: AssetManager,
+        name: str,
+        get_size: Callable[[], Tuple[float, float]],
+    ) -> None:
+        self.game = game
+        self.assets = assets
+        self.name = name
+        self.get_size = get_size
+
+    def width(self) -> float:
+        return self.get_size()[0]
+
+    def height(self) -> float:
+        return self.get_size()[1]
+
+    def draw_at(self, position: PointSpecifier):
+        width, height = self.get_size()
+        image = self.assets.get_scaled(self.name, (int(width), int(height)))
+        top_left = position.calculate_top_left(self.game, width, height)
+        self.game.surface.blit(image, self.game.to_surface_coordinates(top_left))
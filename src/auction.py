@@ -0,0 +1,40 @@
+from __future__ import annotations
+from typing import Callable
+
+from data_storage import Auction
+
+
+class AuctionClock:
+    """Counts down the time left in an auction, restarting whenever somebody bids
+
+    - Runs on whichever clock it's given, e.g. the game's ticks or the server's event loop, so every
+      player's countdown restarts when their copy of the auction changes
+    """
+
+    def __init__(self, get_time_ms: Callable[[], float]) -> None:
+        self.get_time_ms = get_time_ms
+        self.ends_at: float | None = None
+        # The bid that the countdown was last restarted for, so that it only restarts once per bid
+        self.bid_key: tuple[int, int] | None = None
+
+    def update(self, auction: Auction | None):
+        """Restarts the countdown if the auction has started or has a new bid, and stops it if it has ended"""
+        if not auction:
+            self.ends_at = None
+            self.bid_key = None
+            return
+        bid_key = (auction.space_index, auction.bid_number)
+        if bid_key != self.bid_key:
+            self.bid_key = bid_key
+            self.ends_at = self.get_time_ms() + auction.countdown_ms
+
+    def is_running(self) -> bool:
+        return self.ends_at is not None
+
+    def remaining_ms(self) -> float:
+        if self.ends_at is None:
+            return 0
+        return max(0, self.ends_at - self.get_time_ms())
+
+    def has_run_out(self) -> bool:
+        return self.ends_at is not None and self.get_time_ms() >= self.ends_at
@@ -0,0 +1,81 @@
+"""Measures the per-object cost of the EventEmitter
+
+Run from the src directory with `python -m benchmarks.event_emitter`
+"""
+
+from __future__ import annotations
+import timeit
+import tracemalloc
+
+from events import EventEmitter, GameEvent
+
+OBJECT_COUNT = 500
+
+
+class LegacyEventEmitter:
+    """The previous dict-of-dicts implementation, kept here for comparison"""
+
+    def __init__(self):
+        self.listeners = {event_type.value: {} for event_type in GameEvent}
+
+    def on(self, event_name: GameEvent, callback):
+        event_id = object()
+        self.listeners[event_name.value][event_id] = callback
+        return event_id
+
+    def emit(self, event_name: GameEvent, *args, **kwargs):
+        callbacks = list(self.listeners[event_name.value].values())
+        for callback in callbacks:
+            callback(*args, **kwargs)
+
+    def remove_listener(self, event_name: GameEvent, event_id):
+        del self.listeners[event_name.value][event_id]
+
+
+def bytes_per_object(emitter_class) -> float:
+    tracemalloc.start()
+    emitters = [emitter_class() for _ in range(OBJECT_COUNT)]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del emitters
+    return allocated / OBJECT_COUNT
+
+
+def nanoseconds_per_call(emitter_class, statement: str, number: int) -> float:
+    emitter = emitter_class()
+    emitter.on(GameEvent.CLICK, lambda *_: None)
+    namespace = {
+        "emitter": emitter,
+        "callback": lambda *_: None,
+        "GameEvent": GameEvent,
+    }
+    seconds = min(timeit.repeat(statement, number=number, repeat=5, globals=namespace))
+    return seconds / number * 1e9
+
+
+def benchmark(emitter_class) -> dict[str, float]:
+    return {
+        "bytes per object": bytes_per_object(emitter_class),
+        "emit (1 listener) ns": nanoseconds_per_call(
+            emitter_class, "emitter.emit(GameEvent.CLICK, None)", 500_000
+        ),
+        "emit (no listeners) ns": nanoseconds_per_call(
+            emitter_class, "emitter.emit(GameEvent.TOKEN_SELECTED)", 500_000
+        ),
+        "on + remove ns": nanoseconds_per_call(
+            emitter_class,
+            "emitter.remove_listener(GameEvent.OBJECT_REMOVE, emitter.on(GameEvent.OBJECT_REMOVE, callback))",
+            200_000,
+        ),
+    }
+
+
+def main():
+    for emitter_class in (EventEmitter, LegacyEventEmitter):
+        print(emitter_class.__name__)
+        for label, value in benchmark(emitter_class).items():
+            print(f"  {label:>24}: {value:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Measures the per-frame cost of resolving positions and collision boxes for a page of objects
+
+Run from the src directory with `python -m benchmarks.geometry`
+"""
+
+from __future__ import annotations
+import os
+import sys
+import timeit
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from pygame import Color
+
+from game_engine import (
+    END,
+    START,
+    Box,
+    Fonts,
+    Game,
+    GameObject,
+    Percent,
+    PercentagePoint,
+    Pixels,
+    PixelsPoint,
+    PlainColorTexture,
+    PointSpecifier,
+    Theme,
+)
+
+OBJECT_COUNT = 200
+GEOMETRY_CLASSES = (
+    Box,
+    Pixels,
+    Percent,
+    PointSpecifier,
+    PercentagePoint,
+    PixelsPoint,
+)
+
+
+class BenchmarkTheme(Theme):
+    FOREGROUND = Color("black")
+    BACKGROUND = Color("white")
+
+
+class Block(GameObject):
+    def __init__(self, game: Game, spawn_at: PointSpecifier) -> None:
+        self.spawn_at = spawn_at
+        super().__init__(game, PlainColorTexture(game, Color("red"), lambda: (20, 10)))
+
+    def spawn_point(self) -> PointSpecifier:
+        return self.spawn_at
+
+
+def make_position(index: int) -> PointSpecifier:
+    """Cycles through the kinds of positions that the pages use"""
+    fraction = (index % 100) / 100
+    kind = index % 4
+    if kind == 0:
+        return PercentagePoint(fraction, 1 - fraction)
+    if kind == 1:
+        return PixelsPoint(index, index / 2)
+    if kind == 2:
+        return PointSpecifier(
+            Pixels(index, outer_edge=END, position=END),
+            Pixels(10, outer_edge=END, position=END),
+        )
+    return PointSpecifier(
+        Percent(fraction, position=START).to_moved(5),
+        Pixels(index, position=START),
+    )
+
+
+def run_frame(game: Game, objects: list[GameObject]):
+    """The geometry work that happens for each object in a typical frame"""
+    for object in objects:
+        object.draw()
+        object.is_hover()
+        object.collision_box()
+
+
+def geometry_objects_per_frame(game: Game, objects: list[GameObject]) -> int:
+    """Counts how many geometry objects are constructed while running one frame"""
+    constructed = 0
+    init_functions = {
+        geometry_class.__init__.__code__
+        for geometry_class in GEOMETRY_CLASSES
+        if "__init__" in geometry_class.__dict__
+    }
+
+    def profile(frame, event, _):
+        nonlocal constructed
+        if event == "call" and frame.f_code in init_functions:
+            constructed += 1
+
+    sys.setprofile(profile)
+    try:
+        run_frame(game, objects)
+    finally:
+        sys.setprofile(None)
+    return constructed
+
+
+def bytes_per_position() -> float:
+    tracemalloc.start()
+    positions = [make_position(index) for index in range(OBJECT_COUNT)]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del positions
+    return allocated / OBJECT_COUNT
+
+
+def main():
+    pygame.init()
+    game = Game(60, BenchmarkTheme(), Fonts(), "Benchmark", (800, 600))
+    objects: list[GameObject] = [
+        Block(game, make_position(index)) for index in range(OBJECT_COUNT)
+    ]
+    game.add_objects(*objects)
+    run_frame(game, objects)
+
+    seconds = min(timeit.repeat(lambda: run_frame(game, objects), number=200, repeat=5))
+    results = {
+        "geometry objects per frame": geometry_objects_per_frame(game, objects),
+        "bytes per position": bytes_per_position(),
+        "microseconds per frame": seconds / 200 * 1e6,
+    }
+    print(f"{OBJECT_COUNT} objects")
+    for label, value in results.items():
+        print(f"  {label:>26}: {value:8.1f}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Compares sending binary state patches against sending the whole game as JSON after every action
+
+Run from the src directory with `python -m benchmarks.state_sync`
+"""
+
+from __future__ import annotations
+from datetime import datetime
+import random
+import time
+
+from actions import Action, AddPlayer, SetPlayerToken
+from data_storage import Player, SavedGameData, Token
+from state_sync import StateBroadcaster, StateReplica
+
+MOVE_COUNT = 500
+
+
+class MovePlayer(Action):
+    """Stands in for the dice rolls of a real game, which change one player's position"""
+
+    type: str = "move_player"
+    player_index: int
+    position: int
+
+    def check(self, data: SavedGameData):
+        pass
+
+    def apply(self, data: SavedGameData):
+        data.players[self.player_index].position = self.position
+
+
+def make_actions() -> list[Action]:
+    randomiser = random.Random(1)
+    actions: list[Action] = [AddPlayer() for _ in range(6)]
+    actions += [
+        SetPlayerToken(player_index=index, token=token)
+        for index, token in enumerate(list(Token)[:6])
+    ]
+    actions += [
+        MovePlayer(player_index=move % 6, position=randomiser.randrange(40))
+        for move in range(MOVE_COUNT)
+    ]
+    return actions
+
+
+def new_game() -> SavedGameData:
+    return SavedGameData(started_at=datetime.now(), players=[], is_saved_to_disk=False)
+
+
+def benchmark_snapshots(actions: list[Action]) -> tuple[int, float, float]:
+    """Returns the total bytes, encode time and decode time of sending the whole game after each action"""
+    data = new_game()
+    total_bytes = 0
+    encode_time = decode_time = 0.0
+    for action in actions:
+        action.apply(data)
+        start_time = time.perf_counter()
+        message = data.model_dump_json().encode()
+        encode_time += time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        SavedGameData.model_validate_json(message)
+        decode_time += time.perf_counter() - start_time
+        total_bytes += len(message)
+    return total_bytes, encode_time, decode_time
+
+
+def benchmark_patches(actions: list[Action]) -> tuple[int, float, float]:
+    """Returns the total bytes, encode time and decode time of sending a patch after each action
+
+    - Encoding includes working out what changed, which is why it's slower than just dumping the game
+    """
+    data = new_game()
+    broadcaster = StateBroadcaster(data)
+    replica = StateReplica()
+    replica.apply(broadcaster.snapshot())
+    total_bytes = 0
+    encode_time = decode_time = 0.0
+    for action in actions:
+        action.apply(data)
+        start_time = time.perf_counter()
+        message = broadcaster.make_patch(data)
+        encode_time += time.perf_counter() - start_time
+        if message is None:
+            continue
+        start_time = time.perf_counter()
+        assert replica.apply(message)
+        # Clients turn the state back into a SavedGameData after every patch
+        replica.to_game_data()
+        decode_time += time.perf_counter() - start_time
+        total_bytes += len(message)
+    assert replica.to_game_data() == data
+    return total_bytes, encode_time, decode_time
+
+
+def main():
+    actions = make_actions()
+    print(f"{len(actions)} actions (6 players joining, 6 tokens, {MOVE_COUNT} moves)")
+    for label, benchmark in (
+        ("Full JSON snapshots", benchmark_snapshots),
+        ("Binary patches", benchmark_patches),
+    ):
+        total_bytes, encode_time, decode_time = benchmark(actions)
+        print(label)
+        print(f"  {'bytes per action':>22}: {total_bytes / len(actions):8.1f}")
+        print(
+            f"  {'encode µs per action':>22}: {encode_time / len(actions) * 1e6:8.1f}"
+        )
+        print(
+            f"  {'decode µs per action':>22}: {decode_time / len(actions) * 1e6:8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+from __future__ import annotations
+from enum import Enum
+
+
+class SpaceType(Enum):
+    GO = "go"
+    PROPERTY = "property"
+    STATION = "station"
+    UTILITY = "utility"
+    COMMUNITY_CHEST = "community chest"
+    CHANCE = "chance"
+    TAX = "tax"
+    JAIL = "jail"
+    FREE_PARKING = "free parking"
+    GO_TO_JAIL = "go to jail"
+
+
+class ColorGroup(Enum):
+    """A set of properties that can be collected to form a monopoly"""
+
+    BROWN = "brown"
+    LIGHT_BLUE = "light blue"
+    PINK = "pink"
+    ORANGE = "orange"
+    RED = "red"
+    YELLOW = "yellow"
+    GREEN = "green"
+    DARK_BLUE = "dark blue"
+
+
+class Space:
+    """A single space on the board, as printed on the board and its title deed card"""
+
+    def __init__(
+        self,
+        name: str,
+        space_type: SpaceType,
+        price: int | None = None,
+        color_group: ColorGroup | None = None,
+        rents: tuple[int, ...] = (),
+        house_cost: int | None = None,
+        tax: int | None = None,
+    ) -> None:
+        self.name = name
+        self.space_type = space_type
+        self.price = price
+        self.color_group = color_group
+        # For properties, this is the rent with 0-4 houses then with a hotel.
+        # For stations, this is the rent when 1-4 stations are owned.
+        self.rents = rents
+        self.house_cost = house_cost
+        self.tax = tax
+
+    def is_purchasable(self) -> bool:
+        return self.price is not None
+
+    def mortgage_value(self) -> int:
+        assert self.price is not None, f"{self} can't be mortgaged"
+        return self.price // 2
+
+    def __str__(self) -> str:
+        return self.name
+
+
+def property_space(
+    name: str,
+    color_group: ColorGroup,
+    price: int,
+    house_cost: int,
+    rents: tuple[int, int, int, int, int, int],
+) -> Space:
+    return Space(name, SpaceType.PROPERTY, price, color_group, rents, house_cost)
+
+
+def station_space(name: str) -> Space:
+    return Space(name, SpaceType.STATION, 200, rents=(25, 50, 100, 200))
+
+
+# The spaces of the British edition of the board, starting from GO and going clockwise
+# fmt: off
+BOARD_SPACES: list[Space] = [
+    Space("GO", SpaceType.GO),
+    property_space("Old Kent Road", ColorGroup.BROWN, 60, 50, (2, 10, 30, 90, 160, 250)),
+    Space("Community Chest", SpaceType.COMMUNITY_CHEST),
+    property_space("Whitechapel Road", ColorGroup.BROWN, 60, 50, (4, 20, 60, 180, 320, 450)),
+    Space("Income Tax", SpaceType.TAX, tax=200),
+    station_space("King's Cross Station"),
+    property_space("The Angel Islington", ColorGroup.LIGHT_BLUE, 100, 50, (6, 30, 90, 270, 400, 550)),
+    Space("Chance", SpaceType.CHANCE),
+    property_space("Euston Road", ColorGroup.LIGHT_BLUE, 100, 50, (6, 30, 90, 270, 400, 550)),
+    property_space("Pentonville Road", ColorGroup.LIGHT_BLUE, 120, 50, (8, 40, 100, 300, 450, 600)),
+    Space("Jail", SpaceType.JAIL),
+    property_space("Pall Mall", ColorGroup.PINK, 140, 100, (10, 50, 150, 450, 625, 750)),
+    Space("Electric Company", SpaceType.UTILITY, 150),
+    property_space("Whitehall", ColorGroup.PINK, 140, 100, (10, 50, 150, 450, 625, 750)),
+    property_space("Northumberland Avenue", ColorGroup.PINK, 160, 100, (12, 60, 180, 500, 700, 900)),
+    station_space("Marylebone Station"),
+    property_space("Bow Street", ColorGroup.ORANGE, 180, 100, (14, 70, 200, 550, 750, 950)),
+    Space("Community Chest", SpaceType.COMMUNITY_CHEST),
+    property_space("Marlborough Street", ColorGroup.ORANGE, 180, 100, (14, 70, 200, 550, 750, 950)),
+    property_space("Vine Street", ColorGroup.ORANGE, 200, 100, (16, 80, 220, 600, 800, 1000)),
+    Space("Free Parking", SpaceType.FREE_PARKING),
+    property_space("Strand", ColorGroup.RED, 220, 150, (18, 90, 250, 700, 875, 1050)),
+    Space("Chance", SpaceType.CHANCE),
+    property_space("Fleet Street", ColorGroup.RED, 220, 150, (18, 90, 250, 700, 875, 1050)),
+    property_space("Trafalgar Square", ColorGroup.RED, 240, 150, (20, 100, 300, 750, 925, 1100)),
+    station_space("Fenchurch St. Station"),
+    property_space("Leicester Square", ColorGroup.YELLOW, 260, 150, (22, 110, 330, 800, 975, 1150)),
+    property_space("Coventry Street", ColorGroup.YELLOW, 260, 150, (22, 110, 330, 800, 975, 1150)),
+    Space("Water Works", SpaceType.UTILITY, 150),
+    property_space("Piccadilly", ColorGroup.YELLOW, 280, 150, (24, 120, 360, 850, 1025, 1200)),
+    Space("Go to Jail", SpaceType.GO_TO_JAIL),
+    property_space("Regent Street", ColorGroup.GREEN, 300, 200, (26, 130, 390, 900, 1100, 1275)),
+    property_space("Oxford Street", ColorGroup.GREEN, 300, 200, (26, 130, 390, 900, 1100, 1275)),
+    Space("Community Chest", SpaceType.COMMUNITY_CHEST),
+    property_space("Bond Street", ColorGroup.GREEN, 320, 200, (28, 150, 450, 1000, 1200, 1400)),
+    station_space("Liverpool St. Station"),
+    Space("Chance", SpaceType.CHANCE),
+    property_space("Park Lane", ColorGroup.DARK_BLUE, 350, 200, (35, 175, 500, 1100, 1300, 1500)),
+    Space("Super Tax", SpaceType.TAX, tax=100),
+    property_space("Mayfair", ColorGroup.DARK_BLUE, 400, 200, (50, 200, 600, 1400, 1700, 2000)),
+]
+# fmt: on
+SPACE_COUNT = len(BOARD_SPACES)
+# The number of spaces along each side of the board, including the corner that the side starts from
+SPACES_PER_SIDE = SPACE_COUNT // 4
@@ -0,0 +1,459 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Callable, Tuple
+
+import pygame
+from pygame import Color, Rect, Surface
+
+from animation import Tween, ease_in_out_cubic
+from board import (
+    BOARD_SPACES,
+    SPACE_COUNT,
+    SPACES_PER_SIDE,
+    ColorGroup,
+    Space,
+)
+from event_bus import PropagatingEvent
+from events import GameEvent, Subscriptions
+from game_engine import GameObject, PointSpecifier, Texture
+
+if TYPE_CHECKING:
+    from data_storage import Player
+    from main import Monopoly
+
+
+COLOR_GROUP_COLORS = {
+    ColorGroup.BROWN: Color("#955436"),
+    ColorGroup.LIGHT_BLUE: Color("#aae0fa"),
+    ColorGroup.PINK: Color("#d93a96"),
+    ColorGroup.ORANGE: Color("#f7941d"),
+    ColorGroup.RED: Color("#ed1b24"),
+    ColorGroup.YELLOW: Color("#fef200"),
+    ColorGroup.GREEN: Color("#1fb25a"),
+    ColorGroup.DARK_BLUE: Color("#0072bb"),
+}
+PLAYER_COLORS = [
+    Color("#e6194b"),
+    Color("#3cb44b"),
+    Color("#4363d8"),
+    Color("#f58231"),
+    Color("#911eb4"),
+    Color("#42d4f4"),
+    Color("#f032e6"),
+]
+BOARD_BACKGROUND = Color("#cde6d0")
+BOARD_LINES = Color("black")
+
+# Sizes are measured in "units", where a normal space is 1 unit wide and a corner is 2 units wide
+CORNER_UNITS = 2
+UNITS_PER_SIDE = CORNER_UNITS * 2 + (SPACES_PER_SIDE - 1)
+CELLS_PER_SIDE = SPACES_PER_SIDE + 1
+
+
+def get_player_color(player_index: int) -> Color:
+    return PLAYER_COLORS[player_index % len(PLAYER_COLORS)]
+
+
+class BoardLayer:
+    """Something that gets drawn on top of the static board every frame (e.g. tokens)"""
+
+    def draw(self, board: BoardTexture, top_left: Tuple[float, float]):
+        raise NotImplementedError()
+
+
+class OwnershipLayer(BoardLayer):
+    """Draws a strip in the owner's colour along the outer edge of each owned space"""
+
+    def __init__(self, get_owners: Callable[[], dict[int, int]]) -> None:
+        # Maps the index of each owned space to the index of the player that owns it.
+        # Pass a game's `get_rules(data).get_owners` to show who owns what.
+        self.get_owners = get_owners
+
+    def draw(self, board: BoardTexture, top_left: Tuple[float, float]):
+        strip_size = max(2, board.unit_size() // 8)
+        for space_index, owner_index in self.get_owners().items():
+            rect = board.space_rect(space_index, top_left)
+            side = board.side_of(space_index)
+            # Outer edge of the space, for the bottom, left, top, and right sides respectively
+            if side == 0:
+                strip = Rect(
+                    rect.left, rect.bottom - strip_size, rect.width, strip_size
+                )
+            elif side == 1:
+                strip = Rect(rect.left, rect.top, strip_size, rect.height)
+            elif side == 2:
+                strip = Rect(rect.left, rect.top, rect.width, strip_size)
+            else:
+                strip = Rect(rect.right - strip_size, rect.top, strip_size, rect.height)
+            pygame.draw.rect(board.game.surface, get_player_color(owner_index), strip)
+
+
+class BuildingsLayer(BoardLayer):
+    """Draws houses (green squares) and hotels (a red rectangle) on each property's colour bar"""
+
+    def __init__(self, get_buildings: Callable[[], dict[int, int]]) -> None:
+        # Maps space indexes to the number of buildings on them, where 5 means a hotel.
+        # Pass a game's `get_rules(data).get_buildings` to show what's been built.
+        self.get_buildings = get_buildings
+
+    def draw(self, board: BoardTexture, top_left: Tuple[float, float]):
+        for space_index, building_count in self.get_buildings().items():
+            if not building_count:
+                continue
+            bar = board.color_bar_rect(space_index, top_left)
+            if building_count == 5:
+                hotel = bar.inflate(-bar.width // 3, -bar.height // 3)
+                pygame.draw.rect(board.game.surface, Color("#c8102e"), hotel)
+                continue
+            is_horizontal = bar.width >= bar.height
+            slot_count = 4
+            slot_length = (bar.width if is_horizontal else bar.height) / slot_count
+            house_size = max(2, int(min(slot_length, min(bar.size)) * 0.7))
+            for house_number in range(building_count):
+                offset = slot_length * (house_number + 0.5)
+                if is_horizontal:
+                    center = (bar.left + offset, bar.centery)
+                else:
+                    center = (bar.centerx, bar.top + offset)
+                house = Rect(0, 0, house_size, house_size)
+                house.center = (int(center[0]), int(center[1]))
+                pygame.draw.rect(board.game.surface, Color("#00843d"), house)
+
+
+class TokenMovements:
+    """Animates tokens travelling around the board, passing through each space on the way
+
+    - The game state should be updated straight away; this only changes where the tokens are drawn
+    - Use `get_position` as a TokenLayer's `get_token_position` to draw the animated positions
+    """
+
+    MILLISECONDS_PER_SPACE = 150
+
+    def __init__(self, game: Monopoly) -> None:
+        self.game = game
+        # Active movement tweens, keyed by the ID of the Player object
+        self.movements: dict[int, Tween] = {}
+
+    def get_position(self, player: Player) -> float:
+        movement = self.movements.get(id(player))
+        if movement:
+            return movement.value
+        return player.position
+
+    def animate_move(
+        self,
+        player: Player,
+        from_position: float,
+        to_position: int,
+        on_finish: Callable[[], None] | None = None,
+    ):
+        """Moves the player's token forwards from one space to another (going past GO if needed)"""
+        existing_movement = self.movements.pop(id(player), None)
+        if existing_movement:
+            # Carry on from wherever the token currently is
+            from_position = existing_movement.value
+            self.game.animator.cancel(existing_movement)
+        from_position %= SPACE_COUNT
+        distance = (to_position - from_position) % SPACE_COUNT
+
+        def finish_movement():
+            self.movements.pop(id(player), None)
+            if on_finish:
+                on_finish()
+
+        movement = Tween(
+            from_position,
+            from_position + distance,
+            distance * self.MILLISECONDS_PER_SPACE,
+            easing=ease_in_out_cubic,
+            on_finish=finish_movement,
+        )
+        self.movements[id(player)] = movement
+        self.game.animator.add(movement)
+
+    def is_moving(self) -> bool:
+        return bool(self.movements)
+
+
+class TokenLayer(BoardLayer):
+    """Draws a marker for each player's token on the space that they're on"""
+
+    def __init__(
+        self,
+        get_players: Callable[[], list[Player]],
+        get_token_position: Callable[[Player], float] | None = None,
+    ) -> None:
+        self.get_players = get_players
+        # Can be overridden to return fractional positions, e.g. while a token is moving between spaces
+        self.get_token_position = get_token_position or (lambda player: player.position)
+
+    def draw(self, board: BoardTexture, top_left: Tuple[float, float]):
+        players = self.get_players()
+        radius = max(3, board.unit_size() // 5)
+        for player_index, player in enumerate(players):
+            x, y = board.point_along_track(self.get_token_position(player), top_left)
+            # Spread the tokens out, so that players on the same space don't hide each other
+            column = player_index % 3 - 1
+            row = player_index // 3 - 0.5
+            center = (int(x + column * radius * 2), int(y + row * radius * 2))
+            pygame.draw.circle(
+                board.game.surface, get_player_color(player_index), center, radius
+            )
+            pygame.draw.circle(board.game.surface, BOARD_LINES, center, radius, 1)
+
+
+class BoardTexture(Texture):
+    """Draws the board from a surface that is only rendered again when the board is resized
+
+    - Layers (ownership markers, buildings, tokens) are drawn on top of the cached surface every frame
+    - Also keeps a hit map, so that the space under a point can be found in O(1)
+    """
+
+    def __init__(
+        self,
+        game: Monopoly,
+        get_side_length: Callable[[], float],
+        layers: list[BoardLayer] | None = None,
+    ) -> None:
+        self.game = game
+        self.get_side_length = get_side_length
+        self.layers = layers or []
+        # The last proper render of the board, and what is actually drawn (which may be a stretched copy of it)
+        self.rendered_board: Surface | None = None
+        self.static_surface: Surface | None = None
+        # Rects of each space, relative to the top-left of the board
+        self.space_rects: list[Rect] = []
+        # Maps each pixel coordinate (along one axis) to the cell that it's in
+        self.column_at_pixel: list[int] = []
+        # Maps cell positions (row * CELLS_PER_SIDE + column) to space indexes (None in the middle)
+        self.cell_spaces: list[int | None] = [None] * (CELLS_PER_SIDE * CELLS_PER_SIDE)
+        self.current_top_left: Tuple[float, float] | None = None
+        self.game_subscriptions = Subscriptions()
+        self.game_subscriptions.on(
+            game.events, GameEvent.WINDOW_RESIZED, self.on_window_resized
+        )
+
+    def release(self):
+        # The game outlives the board, so its listener would otherwise keep the board's surfaces alive
+        self.game_subscriptions.remove_all()
+        self.rendered_board = None
+        self.static_surface = None
+
+    def on_window_resized(self, _):
+        # Forget the stretched copy, so that the board is rendered properly at its new size
+        if self.static_surface is not self.rendered_board:
+            self.static_surface = None
+
+    def side_length(self) -> int:
+        return int(self.get_side_length())
+
+    def width(self) -> float:
+        return self.side_length()
+
+    def height(self) -> float:
+        return self.side_length()
+
+    def unit_size(self) -> int:
+        return self.side_length() // UNITS_PER_SIDE
+
+    def corner_size(self) -> int:
+        # Corners absorb any leftover pixels, so that the board fills its whole size
+        return (self.side_length() - self.unit_size() * (SPACES_PER_SIDE - 1)) // 2
+
+    def side_of(self, space_index: int) -> int:
+        """Returns 0, 1, 2, or 3 for spaces on the bottom, left, top, and right sides respectively"""
+        return space_index // SPACES_PER_SIDE
+
+    def cell_of(self, space_index: int) -> Tuple[int, int]:
+        """Works out the (column, row) of a space, where (0, 0) is the top-left corner"""
+        last = CELLS_PER_SIDE - 1
+        side = self.side_of(space_index)
+        steps = space_index % SPACES_PER_SIDE
+        if side == 0:
+            return last - steps, last
+        if side == 1:
+            return 0, last - steps
+        if side == 2:
+            return steps, 0
+        return last, steps
+
+    def cell_edges(self) -> list[int]:
+        """Returns the pixel offsets of the edges of each column (which are the same for each row)"""
+        unit = self.unit_size()
+        corner = self.corner_size()
+        edges = [0, corner]
+        for _ in range(SPACES_PER_SIDE - 1):
+            edges.append(edges[-1] + unit)
+        edges.append(edges[-1] + corner)
+        return edges
+
+    def build_layout(self):
+        edges = self.cell_edges()
+        self.space_rects = []
+        self.cell_spaces = [None] * (CELLS_PER_SIDE * CELLS_PER_SIDE)
+        for space_index in range(len(BOARD_SPACES)):
+            column, row = self.cell_of(space_index)
+            left, right = edges[column], edges[column + 1]
+            top, bottom = edges[row], edges[row + 1]
+            self.space_rects.append(Rect(left, top, right - left, bottom - top))
+            self.cell_spaces[row * CELLS_PER_SIDE + column] = space_index
+        self.column_at_pixel = []
+        for column in range(CELLS_PER_SIDE):
+            self.column_at_pixel.extend([column] * (edges[column + 1] - edges[column]))
+
+    def render_space_content(self, space: Space, size: Tuple[int, int]) -> Surface:
+        """Renders a space upright (colour bar at the top), ready to be rotated to face the middle"""
+        width, height = size
+        surface = Surface(size, pygame.SRCALPHA)
+        text_top = 2
+        if space.color_group:
+            bar_height = height // 5
+            pygame.draw.rect(
+                surface,
+                COLOR_GROUP_COLORS[space.color_group],
+                Rect(0, 0, width, bar_height),
+            )
+            pygame.draw.line(surface, BOARD_LINES, (0, bar_height), (width, bar_height))
+            text_top += bar_height
+        font = self.game.fonts.load(None, max(8, self.unit_size() // 4))
+        line_top = text_top
+        text_metrics = self.game.text_metrics
+        for line in text_metrics.split_text(space.name.upper(), width - 4, font):
+            rendered_line = font.render(line, True, BOARD_LINES)
+            surface.blit(
+                rendered_line, ((width - rendered_line.get_width()) // 2, line_top)
+            )
+            line_top += rendered_line.get_height()
+        if space.price or space.tax:
+            amount = space.price or space.tax
+            rendered_price = font.render(f"£{amount}", True, BOARD_LINES)
+            surface.blit(
+                rendered_price,
+                (
+                    (width - rendered_price.get_width()) // 2,
+                    height - rendered_price.get_height() - 2,
+                ),
+            )
+        return surface
+
+    def render_static_board(self) -> Surface:
+        side_length = self.side_length()
+        surface = Surface((side_length, side_length))
+        surface.fill(BOARD_BACKGROUND)
+        for space_index, space in enumerate(BOARD_SPACES):
+            rect = self.space_rects[space_index]
+            is_corner = space_index % SPACES_PER_SIDE == 0
+            if is_corner:
+                content = self.render_space_content(space, rect.size)
+            else:
+                # Render upright, then rotate so that the colour bar faces the middle of the board
+                side = self.side_of(space_index)
+                upright_size = rect.size if side % 2 == 0 else (rect.height, rect.width)
+                content = self.render_space_content(space, upright_size)
+                content = pygame.transform.rotate(content, [0, -90, 180, 90][side])
+            surface.blit(content, rect.topleft)
+            pygame.draw.rect(surface, BOARD_LINES, rect, 1)
+        return surface
+
+    def ensure_static_board(self):
+        """Renders the static board again if the board's size has changed
+
+        - While the window is being resized, the old render is stretched instead, and the board is only
+          rendered again once the size has settled
+        """
+        side_length = self.side_length()
+        if self.static_surface and self.static_surface.get_width() == side_length:
+            return
+        if self.rendered_board and self.game.is_resizing():
+            self.build_layout()
+            self.static_surface = pygame.transform.scale(
+                self.rendered_board, (side_length, side_length)
+            )
+            return
+        print(f"BoardTexture: Rendering static board at {side_length}px")
+        self.build_layout()
+        self.rendered_board = self.render_static_board()
+        self.static_surface = self.rendered_board
+
+    def space_rect(self, space_index: int, top_left: Tuple[float, float]) -> Rect:
+        return self.space_rects[space_index].move(int(top_left[0]), int(top_left[1]))
+
+    def color_bar_rect(self, space_index: int, top_left: Tuple[float, float]) -> Rect:
+        """Calculates where a space's colour bar is, which is along the edge facing the middle of the board"""
+        rect = self.space_rect(space_index, top_left)
+        side = self.side_of(space_index)
+        if side == 0:
+            return Rect(rect.left, rect.top, rect.width, rect.height // 5)
+        if side == 1:
+            return Rect(
+                rect.right - rect.width // 5, rect.top, rect.width // 5, rect.height
+            )
+        if side == 2:
+            return Rect(
+                rect.left, rect.bottom - rect.height // 5, rect.width, rect.height // 5
+            )
+        return Rect(rect.left, rect.top, rect.width // 5, rect.height)
+
+    def point_along_track(
+        self, position: float, top_left: Tuple[float, float]
+    ) -> Tuple[float, float]:
+        """Finds the point for a (possibly fractional) position around the board, e.g. 4.5 is half way from 4 to 5"""
+        space_count = len(BOARD_SPACES)
+        start_index = int(position) % space_count
+        end_index = (start_index + 1) % space_count
+        progress = position - int(position)
+        start_x, start_y = self.space_rect(start_index, top_left).center
+        end_x, end_y = self.space_rect(end_index, top_left).center
+        return (
+            start_x + (end_x - start_x) * progress,
+            start_y + (end_y - start_y) * progress,
+        )
+
+    def space_at(self, point: Tuple[float, float]) -> int | None:
+        """Returns the index of the space at a point in the window, or None if there isn't one"""
+        if not self.current_top_left:
+            return None
+        x = int(point[0] - self.current_top_left[0])
+        y = int(point[1] - self.current_top_left[1])
+        if not (
+            0 <= x < len(self.column_at_pixel) and 0 <= y < len(self.column_at_pixel)
+        ):
+            return None
+        # The board is square, so rows use the same lookup as columns
+        column = self.column_at_pixel[x]
+        row = self.column_at_pixel[y]
+        return self.cell_spaces[row * CELLS_PER_SIDE + column]
+
+    def draw_at(self, position: PointSpecifier):
+        self.ensure_static_board()
+        assert self.static_surface
+        top_left = position.calculate_top_left(self.game, self.width(), self.height())
+        self.current_top_left = top_left
+        # The layers draw relative to this, so they end up in the right place when rendered offscreen too
+        surface_top_left = self.game.to_surface_coordinates(top_left)
+        self.game.surface.blit(self.static_surface, surface_top_left)
+        for layer in self.layers:
+            layer.draw(self, surface_top_left)
+
+
+class Board(GameObject["Monopoly"]):
+    """The Monopoly board, drawn as a single object. Emits SPACE_CLICKED when a space is clicked."""
+
+    def __init__(
+        self,
+        game: Monopoly,
+        spawn_at: PointSpecifier,
+        get_side_length: Callable[[], float],
+        layers: list[BoardLayer] | None = None,
+    ) -> None:
+        self.spawn_at = spawn_at
+        self.board_texture = BoardTexture(game, get_side_length, layers)
+        super().__init__(game, self.board_texture)
+        self.events.on(GameEvent.CLICK, self.on_click)
+
+    def spawn_point(self) -> PointSpecifier:
+        return self.spawn_at
+
+    def on_click(self, event: PropagatingEvent):
+        space_index = self.board_texture.space_at(event.original.pos)
+        if space_index is not None:
+            self.events.emit(GameEvent.SPACE_CLICKED, space_index)
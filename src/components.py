@@ -1,14 +1,19 @@
 from __future__ import annotations
+import math
 from typing import TYPE_CHECKING, Callable, Tuple
 
-from pygame import Color
+import numpy as np
+import pygame
+from pygame import Color, Surface
 from pygame.font import Font
+from event_bus import PropagatingEvent
 from events import GameEvent
 from game_engine import (
     CENTER,
     START,
     Alignment2D,
     BelowObject,
+    Box,
     CenterAlignedToObject,
     CoordinateSpecifier,
     Corner,
@@ -30,9 +35,15 @@ class Container(GameObject["Monopoly"]):
     """Used for easy placement of multiple objects in a single row/column"""
 
     class AutoPlacement(PointSpecifier):
+        __slots__ = ("gap_pixels",)
+
         def __init__(self, gap_pixels=0):
             self.gap_pixels = gap_pixels
 
+        def depends_on_window_size(self) -> bool:
+            # It will be replaced by a real position once the container works out where it goes
+            return False
+
     def __init__(
         self,
         game: Monopoly,
@@ -40,9 +51,16 @@ class Container(GameObject["Monopoly"]):
         get_size: Callable[[], Tuple[float, float]],
         color: Color | None = None,
         padding_top: float = 0,
+        cache_as_bitmap: bool = False,
     ) -> None:
         # self.game = game
         self._children: list[GameObject] = []
+        # If enabled, the container and its children are rendered to a bitmap, which is reused until one of them
+        # calls invalidate_cache(), or the container itself moves or resizes
+        self.cache_as_bitmap = cache_as_bitmap
+        self.cached_bitmap: Surface | None = None
+        self.cached_bitmap_top_left: Tuple[int, int] = (0, 0)
+        self.cached_bitmap_key: tuple | None = None
         texture = PlainColorTexture(game, color, get_size)
         self.spawn_at = spawn_at
         super().__init__(game, texture)
@@ -56,12 +74,74 @@ class Container(GameObject["Monopoly"]):
         return self.spawn_at
 
     def draw(self):
+        if self.cache_as_bitmap:
+            self.draw_from_cache()
+            return
+        self.draw_directly()
+
+    def draw_directly(self):
         super().draw()
+        self.draw_children()
+
+    def draw_children(self):
         for child in self._children:
             # If it wants to be automatically positioned, then work out where it should go (and store that)
             self.resolve_auto_placement(child)
             child.draw()
 
+    def invalidate_cache(self):
+        """Makes sure that the container is rendered again next frame, e.g. because one of its children changed"""
+        self.cached_bitmap = None
+        super().invalidate_cache()
+
+    def calculate_render_bounds(self) -> Box:
+        """Calculates the box that contains the container and all of its descendants, within the window"""
+        bounds = self.collision_box()
+        x1, y1, x2, y2 = bounds.x1, bounds.y1, bounds.x2, bounds.y2
+        descendants = self.list_children()
+        while descendants:
+            descendant = descendants.pop()
+            if not descendant.exists:
+                continue
+            descendants.extend(descendant.list_children())
+            box = descendant.collision_box()
+            x1, y1 = min(x1, box.x1), min(y1, box.y1)
+            x2, y2 = max(x2, box.x2), max(y2, box.y2)
+        window = self.game.window_box()
+        return Box(
+            max(math.floor(x1), window.x1),
+            max(math.floor(y1), window.y1),
+            min(math.ceil(x2), window.x2),
+            min(math.ceil(y2), window.y2),
+        )
+
+    def calculate_cache_key(self) -> tuple:
+        """Returns the things that would change the cached bitmap without any of the children knowing about it"""
+        width = self.width()
+        height = self.height()
+        top_left = self.position().calculate_top_left(self.game, width, height)
+        return (self.game.width(), self.game.height(), top_left, width, height)
+
+    def render_bitmap(self):
+        bounds = self.calculate_render_bounds()
+        self.cached_bitmap = self.game.render_offscreen(self.draw_directly, bounds)
+        self.cached_bitmap_top_left = (int(bounds.x1), int(bounds.y1))
+
+    def draw_from_cache(self):
+        if (
+            self.cached_bitmap is None
+            or self.calculate_cache_key() != self.cached_bitmap_key
+        ):
+            self.render_bitmap()
+            # Worked out after rendering, so if the render itself changes the layout
+            # (e.g. by wrapping text), the next frame will notice and render again
+            self.cached_bitmap_key = self.calculate_cache_key()
+        assert self.cached_bitmap
+        self.game.surface.blit(
+            self.cached_bitmap,
+            self.game.to_surface_coordinates(self.cached_bitmap_top_left),
+        )
+
     def get_previous_auto_positioned_child(
         self, current_child: GameObject
     ) -> GameObject | None:
@@ -125,6 +205,7 @@ class Container(GameObject["Monopoly"]):
         self._children.extend(objects)
         if self.exists:
             self.game.all_objects.extend(objects)
+        self.invalidate_cache()
 
     def spawn_children(self):
         assert self.exists, "Children should only be spawned once the container exists"
@@ -136,17 +217,23 @@ class Container(GameObject["Monopoly"]):
         for child in self._children:
             child.exists = False
             child.events.emit(GameEvent.OBJECT_REMOVE)
-            self.game.all_objects.remove(child)
+            self.forget_child(child)
         self._children.clear()
 
-    def list_children(self):
+    def list_children(self) -> list[GameObject]:
         return self._children.copy()
 
     def remove_child(self, child: GameObject):
         child.exists = False
         child.events.emit(GameEvent.OBJECT_REMOVE)
         self._children.remove(child)
-        self.game.all_objects.remove(child)
+        self.forget_child(child)
+        self.invalidate_cache()
+
+    def forget_child(self, child: GameObject):
+        # Children are only in the game's object list if they've been spawned while the page is active
+        if child in self.game.all_objects:
+            self.game.all_objects.remove(child)
 
     def run_child_tick_tasks(self):
         for child in self._children:
@@ -175,6 +262,246 @@ class Container(GameObject["Monopoly"]):
     #     return (widest_child.width(), tallest_child.height())
 
 
+class GridContainer(Container):
+    """Lays its children out in rows and columns, working out every child's position in one pass
+
+    - Children fill each row from left to right, and wrap onto a new row after `column_count` children
+    - If `column_count` isn't provided, as many equal-width columns as fit within `get_max_width()` are used
+    - Each column is as wide as its widest child and each row is as tall as its tallest child,
+      and children are aligned within their cell according to `cell_alignment`
+    - The layout is only calculated again when the children's sizes or the container's position change
+    """
+
+    def __init__(
+        self,
+        game: Monopoly,
+        spawn_at: PointSpecifier,
+        column_count: int | None = None,
+        get_max_width: Callable[[], float] | None = None,
+        gap_pixels: Tuple[float, float] = (0, 0),
+        cell_alignment: Alignment2D = Alignment2D.CENTER,
+        color: Color | None = None,
+        padding_top: float = 0,
+        cache_as_bitmap: bool = False,
+    ) -> None:
+        assert (
+            column_count or get_max_width
+        ), "Either a column count or a max width is needed"
+        self.column_count = column_count
+        self.get_max_width = get_max_width
+        self.gap_pixels = gap_pixels
+        self.cell_alignment = cell_alignment
+        self.layout_size: Tuple[float, float] = (0, 0)
+        # The inputs that the current layout was calculated from
+        self.laid_out_sizes: np.ndarray | None = None
+        self.laid_out_column_count = 0
+        self.laid_out_top_left: Tuple[float, float] | None = None
+        # Positions of each child's top-left corner, relative to the top-left of the grid
+        self.child_offsets = np.zeros((0, 2))
+        super().__init__(
+            game,
+            spawn_at,
+            lambda: self.layout_size,
+            color,
+            padding_top,
+            cache_as_bitmap,
+        )
+
+    def calculate_column_count(self, widest_cell: float) -> int:
+        if self.column_count:
+            return self.column_count
+        assert self.get_max_width
+        gap_x, _ = self.gap_pixels
+        columns_that_fit = (self.get_max_width() + gap_x) // (widest_cell + gap_x)
+        return max(1, int(columns_that_fit))
+
+    def calculate_layout(self, sizes: np.ndarray, column_count: int):
+        """Works out the offset of every child and the size of the whole grid, using array operations"""
+        child_count = len(sizes)
+        gap_x, gap_y = self.gap_pixels
+        column_count = min(column_count, child_count)
+        row_count = -(-child_count // column_count)
+        # Pad the list of sizes to fill the last row, so that it can be reshaped into a grid
+        cells = np.zeros((row_count * column_count, 2))
+        cells[:child_count] = sizes
+        cells = cells.reshape(row_count, column_count, 2)
+        column_widths = cells[:, :, 0].max(axis=0)
+        row_heights = cells[:, :, 1].max(axis=1)
+        column_lefts = np.concatenate(([0], np.cumsum(column_widths + gap_x)[:-1]))
+        row_tops = np.concatenate(([0], np.cumsum(row_heights + gap_y)[:-1]))
+
+        indexes = np.arange(child_count)
+        columns = indexes % column_count
+        rows = indexes // column_count
+        # Alignment values go from -1 (start) to 1 (end), so this turns them into a fraction of the free space
+        align_x, align_y = self.cell_alignment.value
+        free_x = column_widths[columns] - sizes[:, 0]
+        free_y = row_heights[rows] - sizes[:, 1]
+        self.child_offsets = np.column_stack(
+            (
+                column_lefts[columns] + free_x * (align_x + 1) / 2,
+                row_tops[rows] + free_y * (align_y + 1) / 2 + self.padding_top,
+            )
+        )
+        width = column_widths.sum() + gap_x * (column_count - 1)
+        height = row_heights.sum() + gap_y * (row_count - 1) + self.padding_top
+        self.layout_size = (float(width), float(height))
+
+    def update_layout(self):
+        children = self._children
+        sizes = np.array([(child.width(), child.height()) for child in children])
+        if not children:
+            self.layout_size = (0, self.padding_top)
+            return
+        column_count = self.calculate_column_count(sizes[:, 0].max())
+        sizes_changed = (
+            self.laid_out_sizes is None
+            or column_count != self.laid_out_column_count
+            or not np.array_equal(sizes, self.laid_out_sizes)
+        )
+        if sizes_changed:
+            self.calculate_layout(sizes, column_count)
+            self.laid_out_sizes = sizes
+            self.laid_out_column_count = column_count
+
+        width, height = self.layout_size
+        top_left = self.position().calculate_top_left(self.game, width, height)
+        if not sizes_changed and top_left == self.laid_out_top_left:
+            return
+        self.laid_out_top_left = top_left
+        left, top = top_left
+        for child, (x, y) in zip(children, (self.child_offsets + (left, top)).tolist()):
+            child.set_position(PixelsPoint(x, y))
+
+    def draw_directly(self):
+        self.update_layout()
+        super().draw_directly()
+
+
+class VirtualList(Container):
+    """A scrollable list that only creates and draws rows for the items that are in view
+
+    - Rows are made by `create_row()` and reused as the list scrolls; `bind_row(row, index)` makes a row show an item
+    - The offset of every row is worked out up front from `get_row_height()`, so call `refresh()` if the items change
+    - Rows are clipped to the list's box, and the list scrolls with the mouse wheel
+    """
+
+    clips_children = True
+
+    def __init__(
+        self,
+        game: Monopoly,
+        spawn_at: PointSpecifier,
+        get_size: Callable[[], Tuple[float, float]],
+        get_item_count: Callable[[], int],
+        get_row_height: Callable[[int], float],
+        create_row: Callable[[], GameObject],
+        bind_row: Callable[[GameObject, int], None],
+        color: Color | None = None,
+        scroll_speed: float = 40,
+    ) -> None:
+        self.get_item_count = get_item_count
+        self.get_row_height = get_row_height
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.scroll_speed = scroll_speed
+        self.scroll_position = 0.0
+        # The top of each row relative to the top of the list, with the total height of the rows at the end
+        self.row_offsets = np.zeros(1)
+        # Rows that are showing an item, keyed by the item's index, and rows that are waiting to be reused
+        self.visible_rows: dict[int, GameObject] = {}
+        self.spare_rows: list[GameObject] = []
+        # The top-left corner, scroll position and visible rows that the rows were last positioned for
+        self.laid_out_for: tuple | None = None
+        super().__init__(game, spawn_at, get_size, color)
+        self.events.on(GameEvent.SCROLL, self.on_scroll)
+        self.refresh()
+
+    def refresh(self):
+        """Works out the row offsets again, and re-binds the visible rows (e.g. after items are added or removed)"""
+        item_count = self.get_item_count()
+        row_heights = np.fromiter(
+            (self.get_row_height(index) for index in range(item_count)),
+            dtype=float,
+            count=item_count,
+        )
+        self.row_offsets = np.concatenate(([0.0], np.cumsum(row_heights)))
+        self.spare_rows.extend(self.visible_rows.values())
+        self.visible_rows.clear()
+        self.laid_out_for = None
+        self.scroll_to(self.scroll_position)
+        self.invalidate_cache()
+
+    def content_height(self) -> float:
+        return float(self.row_offsets[-1])
+
+    def scroll_to(self, scroll_position: float):
+        max_scroll_position = max(0.0, self.content_height() - self.height())
+        scroll_position = min(max(scroll_position, 0.0), max_scroll_position)
+        if scroll_position != self.scroll_position:
+            self.scroll_position = scroll_position
+            self.invalidate_cache()
+
+    def on_scroll(self, event: PropagatingEvent):
+        # Scrolling the wheel up (positive y) moves the view up the list
+        self.scroll_to(self.scroll_position - event.original.y * self.scroll_speed)
+        event.stop_propagation()
+
+    def visible_index_range(self) -> Tuple[int, int]:
+        """Returns the index of the first visible item, and the index after the last visible item"""
+        viewport_top = self.scroll_position
+        viewport_bottom = viewport_top + self.height()
+        first_index = int(np.searchsorted(self.row_offsets, viewport_top, "right")) - 1
+        end_index = int(np.searchsorted(self.row_offsets, viewport_bottom, "left"))
+        return max(first_index, 0), min(end_index, len(self.row_offsets) - 1)
+
+    def update_visible_rows(self):
+        first_index, end_index = self.visible_index_range()
+        for index in list(self.visible_rows):
+            if not first_index <= index < end_index:
+                self.spare_rows.append(self.visible_rows.pop(index))
+        for index in range(first_index, end_index):
+            if index in self.visible_rows:
+                continue
+            if self.spare_rows:
+                row = self.spare_rows.pop()
+            else:
+                row = self.create_row()
+                self.add_children(row)
+            self.bind_row(row, index)
+            self.visible_rows[index] = row
+            self.laid_out_for = None
+
+        left, top = self.position().calculate_top_left(
+            self.game, self.width(), self.height()
+        )
+        layout = (left, top, self.scroll_position, first_index, end_index)
+        if layout == self.laid_out_for:
+            return
+        self.laid_out_for = layout
+        for index, row in self.visible_rows.items():
+            row_top = top + float(self.row_offsets[index]) - self.scroll_position
+            row.set_position(PixelsPoint(left, row_top))
+
+    def list_children(self) -> list[GameObject]:
+        return list(self.visible_rows.values())
+
+    def draw_directly(self):
+        self.update_visible_rows()
+        super().draw_directly()
+
+    def draw_children(self):
+        surface = self.game.surface
+        previous_clip = surface.get_clip()
+        clip_rect = self.game.to_surface_rect(self.collision_box().to_rect())
+        surface.set_clip(clip_rect.clip(previous_clip))
+        try:
+            for row in self.visible_rows.values():
+                row.draw()
+        finally:
+            surface.set_clip(previous_clip)
+
+
 class Header(Container):
     def __init__(self, game: Monopoly, page_title: str | None = None) -> None:
         HEADER_HEIGHT = 40
@@ -211,6 +538,11 @@ class Header(Container):
 
 
 class TextObject(GameObject["Monopoly"]):
+    """Shows the text returned by `get_content()`
+
+    - Call `invalidate_cache()` whenever the text changes, so that it's drawn again inside cached containers
+    """
+
     def spawn_point(self) -> PointSpecifier:
         return self.spawn_at
 
@@ -248,20 +580,20 @@ class ButtonTexture(TextTexture):
         self.button = object
         self.base_color = base_color
         self.is_enabled = is_enabled
+        # Lighten the color if the button is hovered or pressed
+        self.hover_color = self.base_color.lerp("white", 0.4)
+        self.pressed_color = self.base_color.lerp("white", 0.6)
 
     def get_background_color(self) -> Color | None:
-        # Lighten the color if the button is hovered or pressed
-        hover_color = self.base_color.lerp("white", 0.4)
-        pressed_color = self.base_color.lerp("white", 0.6)
         self.opacity = 1
         if not self.is_enabled():
             # Apply 30% opacity if the button is disabled
             self.opacity = 0.3
             return self.base_color
         if self.button.is_pressed():
-            return pressed_color
+            return self.pressed_color
         if self.button.is_hover():
-            return hover_color
+            return self.hover_color
         return self.base_color
 
     def get_padding(self) -> Tuple[float, float]:
@@ -283,7 +615,7 @@ class Button(GameObject):
         self,
         game: Monopoly,
         label: str,
-        callback: Callable,
+        callback: Callable | None,
         spawn_at: PointSpecifier,
         font: Font | None = None,
         border_radius: float = 5,
@@ -306,10 +638,24 @@ class Button(GameObject):
             self.is_enabled,
         )
         super().__init__(game, self.texture)
-        self.events.on(GameEvent.CLICK, self.run_callback)
+        # Whether the button was enabled, hovered and pressed last tick, to notice when it needs drawing again
+        self.appearance: Tuple[bool, bool, bool] | None = None
+        self.tick_tasks.append(self.check_appearance)
+        # Buttons without a callback are expected to be handled by a delegated handler on their container
+        if self.callback:
+            self.events.on(GameEvent.CLICK, self.run_callback)
+
+    def check_appearance(self):
+        if self.current_coordinates is None:
+            # It hasn't been drawn yet, so it might not have been given a position
+            return
+        appearance = (self.is_enabled(), self.is_hover(), self.is_pressed())
+        if appearance != self.appearance:
+            self.appearance = appearance
+            self.invalidate_cache()
 
     def run_callback(self, _):
-        if not self.is_enabled():
+        if not self.is_enabled() or not self.callback:
             return
         self.callback()
 
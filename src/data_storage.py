@@ -2,7 +2,7 @@ from __future__ import annotations
 from datetime import datetime
 from enum import Enum
 import random
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class Token(Enum):
@@ -20,6 +20,9 @@ class Token(Enum):
 class Player(BaseModel):
     nickname: str
     token: Token | None = None
+    # The index of the board space that the player's token is on (0 is GO)
+    position: int = 0
+    cash: int = 1500
 
     def set_token(self, game_token: Token):
         self.token = game_token
@@ -31,12 +34,51 @@ class Player(BaseModel):
         return self.get_nickname()
 
 
+class OwnedProperty(BaseModel):
+    """The state of a property (or station or utility) that has been bought"""
+
+    owner_index: int
+    # 0-4 houses, or 5 for a hotel
+    building_count: int = 0
+    is_mortgaged: bool = False
+
+
+class Auction(BaseModel):
+    """A property being auctioned off, after the player who landed on it decided not to buy it"""
+
+    space_index: int
+    highest_bid: int = 0
+    highest_bidder_index: int | None = None
+    # Goes up by one with every accepted bid, so that everyone agrees on the order that bids happened in
+    bid_number: int = 0
+    # How long the auction carries on for after the last bid (or after it starts, if nobody has bid yet)
+    countdown_ms: int = 10_000
+
+
+def new_seed() -> int:
+    return random.getrandbits(32)
+
+
 class SavedGameData(BaseModel):
     started_at: datetime
     is_saved_to_disk: bool
     players: list[Player]
     max_player_count: int = 6
     min_player_count: int = 2
+    # Maps the index of each space that has been bought to its state. Use the RulesEngine to change them.
+    properties: dict[int, OwnedProperty] = {}
+    houses_in_bank: int = 32
+    hotels_in_bank: int = 12
+    auction: Auction | None = None
+    # Anything random that happens in the game must come from get_random(), so that replays are deterministic
+    seed: int = Field(default_factory=new_seed)
+    random_draw_count: int = 0
+
+    def get_random(self) -> random.Random:
+        """Returns the next random number generator in the game's sequence, which is decided by the seed"""
+        randomiser = random.Random(f"{self.seed}:{self.random_draw_count}")
+        self.random_draw_count += 1
+        return randomiser
 
     def get_unused_tokens(self) -> list[Token]:
         return [
@@ -0,0 +1,178 @@
+from __future__ import annotations
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Callable, Union
+
+from events import EventEmitter, GameEvent, Listener
+
+if TYPE_CHECKING:
+    from game_engine import GameObject
+
+
+class EventPhase(Enum):
+    # Travelling down from the top-level object towards the target
+    CAPTURE = "capture"
+    # Being delivered to the target object itself
+    TARGET = "target"
+    # Travelling back up from the target towards the top-level object
+    BUBBLE = "bubble"
+
+
+class PropagatingEvent:
+    """An event that travels through the GameObject.parent chain of its target"""
+
+    __slots__ = (
+        "event_type",
+        "target",
+        "current_target",
+        "phase",
+        "original",
+        "propagation_stopped",
+    )
+
+    def __init__(
+        self, event_type: GameEvent, target: GameObject, original: Any = None
+    ) -> None:
+        self.event_type = event_type
+        # The object that the event was dispatched to, e.g. the topmost object under the mouse
+        self.target = target
+        # The object whose handlers are currently being run
+        self.current_target = target
+        self.phase = EventPhase.CAPTURE
+        # The pygame event that caused this event, if any
+        self.original = original
+        self.propagation_stopped = False
+
+    def stop_propagation(self):
+        """Prevents the event from reaching any more objects (handlers on the current object still run)"""
+        self.propagation_stopped = True
+
+
+# Either a GameObject subclass, or a function that decides if an object should be handled
+DelegateSelector = Union[type, Callable[["GameObject"], bool]]
+
+
+class DelegatedHandler:
+    __slots__ = ("event_type", "selector", "callback")
+
+    def __init__(
+        self,
+        event_type: GameEvent,
+        selector: DelegateSelector,
+        callback: Callable[[Any, PropagatingEvent], None],
+    ) -> None:
+        self.event_type = event_type
+        self.selector = selector
+        self.callback = callback
+
+    def matches(self, object: GameObject) -> bool:
+        if isinstance(self.selector, type):
+            return isinstance(object, self.selector)
+        return self.selector(object)
+
+
+class EventBus:
+    """Dispatches events through the object tree, in capture, target, and bubble phases
+
+    - Bubble-phase handlers are the normal listeners registered with `object.events.on()`
+    - Capture-phase handlers run on the way down, before the target's own handlers
+    - Delegated handlers let a container handle events for any of its descendants in one place
+    """
+
+    def __init__(self) -> None:
+        self._capture_listeners: dict[GameObject, EventEmitter] = {}
+        self._delegated_handlers: dict[GameObject, list[DelegatedHandler]] = {}
+
+    def forget(self, object: GameObject):
+        """Drops any capture or delegated handlers that were registered on the object"""
+        self._capture_listeners.pop(object, None)
+        self._delegated_handlers.pop(object, None)
+
+    def watch_for_removal(self, object: GameObject):
+        if object in self._capture_listeners or object in self._delegated_handlers:
+            return
+        object.events.on(GameEvent.OBJECT_REMOVE, lambda: self.forget(object))
+
+    def on_capture(
+        self,
+        object: GameObject,
+        event_type: GameEvent,
+        callback: Callable[[PropagatingEvent], None],
+    ) -> Listener:
+        self.watch_for_removal(object)
+        emitter = self._capture_listeners.setdefault(object, EventEmitter())
+        return emitter.on(event_type, callback)
+
+    def delegate(
+        self,
+        container: GameObject,
+        event_type: GameEvent,
+        selector: DelegateSelector,
+        callback: Callable[[Any, PropagatingEvent], None],
+    ) -> DelegatedHandler:
+        """Handles events that bubble up to the container from a descendant matching the selector
+
+        - The callback is given the matching descendant (closest to the target) and the event
+        """
+        self.watch_for_removal(container)
+        handler = DelegatedHandler(event_type, selector, callback)
+        self._delegated_handlers.setdefault(container, []).append(handler)
+        return handler
+
+    def remove_delegate(self, container: GameObject, handler: DelegatedHandler):
+        handlers = self._delegated_handlers.get(container)
+        if handlers and handler in handlers:
+            handlers.remove(handler)
+
+    def run_capture_listeners(self, object: GameObject, event: PropagatingEvent):
+        emitter = self._capture_listeners.get(object)
+        if emitter:
+            event.current_target = object
+            emitter.emit(event.event_type, event)
+
+    def run_delegated_handlers(
+        self, container: GameObject, path: list[GameObject], event: PropagatingEvent
+    ):
+        """Runs the container's delegated handlers. The path is the target's ancestry below the container."""
+        handlers = self._delegated_handlers.get(container)
+        if not handlers:
+            return
+        event.current_target = container
+        for handler in handlers:
+            if handler.event_type != event.event_type:
+                continue
+            for descendant in path:
+                if handler.matches(descendant):
+                    handler.callback(descendant, event)
+                    break
+
+    def dispatch(
+        self, target: GameObject, event_type: GameEvent, original: Any = None
+    ) -> PropagatingEvent:
+        event = PropagatingEvent(event_type, target, original)
+        # The target followed by each of its ancestors
+        path = [target]
+        while path[-1].parent:
+            path.append(path[-1].parent)
+
+        event.phase = EventPhase.CAPTURE
+        for object in reversed(path[1:]):
+            self.run_capture_listeners(object, event)
+            if event.propagation_stopped:
+                return event
+
+        event.phase = EventPhase.TARGET
+        self.run_capture_listeners(target, event)
+        event.current_target = target
+        target.events.emit(event_type, event)
+        if event.propagation_stopped:
+            return event
+
+        event.phase = EventPhase.BUBBLE
+        for depth in range(1, len(path)):
+            ancestor = path[depth]
+            self.run_delegated_handlers(ancestor, path[:depth], event)
+            event.current_target = ancestor
+            ancestor.events.emit(event_type, event)
+            if event.propagation_stopped:
+                break
+        return event
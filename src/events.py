@@ -1,4 +1,7 @@
+from __future__ import annotations
+from collections import deque
 from enum import Enum
+from typing import Callable, Iterable
 
 
 class GameEvent(Enum):
@@ -6,28 +9,174 @@ class GameEvent(Enum):
     OBJECT_REMOVE = "object_remove"
     BEFORE_SPAWN = "before_first_draw"
     TOKEN_SELECTED = "token_selection.token_selected"
+    GAME_STATE_CHANGED = "game_state_changed"
+    CURRENT_GAME_CHANGED = "current_game_changed"
+    PLAYER_ADDED = "game_state.player_added"
+    PLAYER_REMOVED = "game_state.player_removed"
+    PLAYER_TOKEN_CHANGED = "game_state.player_token_changed"
+    PROPERTY_CHANGED = "game_state.property_changed"
+    AUCTION_CHANGED = "game_state.auction_changed"
+    SPACE_CLICKED = "board.space_clicked"
+    WINDOW_RESIZED = "window_resized"
+    SCROLL = "scroll"
+
+    # Set below: the position of the event type in the enum, used to index listener lists
+    index: int
+
+
+for _index, _event_type in enumerate(GameEvent):
+    _event_type.index = _index
+EVENT_TYPE_COUNT = len(GameEvent)
+
+
+class Listener:
+    """A registered callback. Also acts as the ID used to remove the listener."""
+
+    __slots__ = ("callback",)
+
+    def __init__(self, callback: Callable) -> None:
+        self.callback = callback
 
 
 class EventEmitter:
+    """Calls the registered callbacks when an event is emitted
+
+    - Listener lists are only allocated once something listens to that event type
+    - Emitting doesn't copy anything. Instead, if the listeners are changed mid-dispatch,
+      the list is replaced (copy-on-write) so that the ongoing dispatch isn't affected.
+    """
+
+    __slots__ = ("_listeners", "_dispatch_depth")
+
     def __init__(self):
-        self.listeners = {event_type.value: {} for event_type in GameEvent}
-
-    def on(self, event_name: GameEvent, callback):
-        event_id = object()
-        if event_name.value not in self.listeners:
-            self.listeners[event_name.value] = {}
-        self.listeners[event_name.value][event_id] = callback
-        return event_id
-
-    def emit(self, event_name: GameEvent, *args, **kwargs):
-        if event_name.value in self.listeners:
-            callbacks = list(self.listeners[event_name.value].values())
-            for callback in callbacks:
-                callback(*args, **kwargs)
-
-    def remove_listener(self, event_name: GameEvent, event_id):
-        if (
-            event_name.value in self.listeners
-            and event_id in self.listeners[event_name.value]
-        ):
-            del self.listeners[event_name.value][event_id]
+        # Indexed by GameEvent.index. Stays as None until the first listener is added.
+        self._listeners: list[list[Listener] | None] | None = None
+        # The number of emit() calls that are currently iterating over our listener lists
+        self._dispatch_depth = 0
+
+    def on(self, event_type: GameEvent, callback: Callable) -> Listener:
+        listener = Listener(callback)
+        if self._listeners is None:
+            self._listeners = [None] * EVENT_TYPE_COUNT
+        listeners = self._listeners[event_type.index]
+        if listeners is None:
+            self._listeners[event_type.index] = [listener]
+        elif self._dispatch_depth:
+            self._listeners[event_type.index] = listeners + [listener]
+        else:
+            listeners.append(listener)
+        return listener
+
+    def emit(self, event_type: GameEvent, *args, **kwargs):
+        if self._listeners is None:
+            return
+        listeners = self._listeners[event_type.index]
+        if not listeners:
+            return
+        self._dispatch_depth += 1
+        try:
+            for listener in listeners:
+                listener.callback(*args, **kwargs)
+        finally:
+            self._dispatch_depth -= 1
+
+    def remove_listener(self, event_type: GameEvent, listener: Listener):
+        if self._listeners is None:
+            return
+        listeners = self._listeners[event_type.index]
+        if not listeners or listener not in listeners:
+            return
+        if self._dispatch_depth:
+            self._listeners[event_type.index] = [
+                other for other in listeners if other is not listener
+            ]
+        else:
+            listeners.remove(listener)
+
+    def has_listeners(self, event_type: GameEvent) -> bool:
+        return bool(self._listeners and self._listeners[event_type.index])
+
+
+class Subscriptions:
+    """Keeps track of listeners registered on other emitters, so that they can all be removed at once"""
+
+    def __init__(self) -> None:
+        self._listeners: list[tuple[EventEmitter, GameEvent, Listener]] = []
+
+    def on(self, emitter: EventEmitter, event_type: GameEvent, callback: Callable):
+        listener = emitter.on(event_type, callback)
+        self._listeners.append((emitter, event_type, listener))
+        return listener
+
+    def remove_all(self):
+        for emitter, event_type, listener in self._listeners:
+            emitter.remove_listener(event_type, listener)
+        self._listeners.clear()
+
+
+class QueuedEvent:
+    __slots__ = ("emitter", "event_type", "args", "kwargs")
+
+    def __init__(
+        self, emitter: EventEmitter, event_type: GameEvent, args: tuple, kwargs: dict
+    ) -> None:
+        self.emitter = emitter
+        self.event_type = event_type
+        self.args = args
+        self.kwargs = kwargs
+
+
+class EventQueue:
+    """Holds events back so that they can be delivered in a batch, at a defined point in the tick
+
+    - Coalesced event types are only delivered once per emitter per batch, with the most recent arguments
+    - At most `max_events_per_flush` events are delivered per flush; the rest wait for the next one
+    """
+
+    def __init__(
+        self,
+        max_events_per_flush: int = 64,
+        coalesced_event_types: Iterable[GameEvent] = (),
+    ) -> None:
+        self.max_events_per_flush = max_events_per_flush
+        self.coalesced_event_types = set(coalesced_event_types)
+        self._pending: deque[QueuedEvent] = deque()
+        # Pending events that later posts can be merged into, keyed by (emitter, event type)
+        self._coalescable: dict[tuple[EventEmitter, GameEvent], QueuedEvent] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def post(self, emitter: EventEmitter, event_type: GameEvent, *args, **kwargs):
+        """Queues up an event to be emitted by the provided emitter during the next flush"""
+        if event_type in self.coalesced_event_types:
+            key = (emitter, event_type)
+            existing_event = self._coalescable.get(key)
+            if existing_event:
+                existing_event.args = args
+                existing_event.kwargs = kwargs
+                return
+            queued_event = QueuedEvent(emitter, event_type, args, kwargs)
+            self._coalescable[key] = queued_event
+        else:
+            queued_event = QueuedEvent(emitter, event_type, args, kwargs)
+        self._pending.append(queued_event)
+
+    def flush(self) -> int:
+        """Delivers the queued events, returning how many were delivered
+
+        - Events posted by the handlers themselves are left for the next flush
+        """
+        delivery_count = min(len(self._pending), self.max_events_per_flush)
+        for _ in range(delivery_count):
+            queued_event = self._pending.popleft()
+            if queued_event.event_type in self.coalesced_event_types:
+                del self._coalescable[(queued_event.emitter, queued_event.event_type)]
+            queued_event.emitter.emit(
+                queued_event.event_type, *queued_event.args, **queued_event.kwargs
+            )
+        return delivery_count
+
+    def clear(self):
+        self._pending.clear()
+        self._coalescable.clear()
@@ -3,16 +3,22 @@ import copy
 import math
 from collections import deque
 from enum import Enum
+import json
+import os
+from pathlib import Path
 import re
 
-from typing import Callable, Generic, Literal, Optional, Tuple, TypeVar
+from typing import Callable, Generic, Iterable, Literal, Optional, Tuple, TypeVar
 import pygame
 from pygame import Color, Surface
 from pygame.rect import Rect
 from pygame.event import Event
 from pygame.font import Font
 
-from events import EventEmitter, GameEvent
+from animation import Animator
+from event_bus import EventBus
+from events import EventEmitter, EventQueue, GameEvent
+from task_scheduler import Task, TaskScheduler, WorkerKind
 
 
 class Corner(Enum):
@@ -37,6 +43,18 @@ class Edge(Enum):
     RIGHT = (1, 0)
 
 
+# Events that count as user input, which keep the game running at full frame rate for a while
+INPUT_EVENT_TYPES = {
+    pygame.MOUSEMOTION,
+    pygame.MOUSEBUTTONDOWN,
+    pygame.MOUSEBUTTONUP,
+    pygame.MOUSEWHEEL,
+    pygame.KEYDOWN,
+    pygame.KEYUP,
+    pygame.VIDEORESIZE,
+    pygame.WINDOWENTER,
+}
+
 START = -1
 CENTER = 0
 END = 1
@@ -45,9 +63,35 @@ END = 1
 LineEdge = Literal[-1, 0, 1]
 
 
+def split_text(text: str, max_width: float, font: Font) -> list[str]:
+    """Splits the provides string into lines by applying word wrapping
+
+    - Each line will be no longer than max_width, unless it is a single word that doesn't fit by itself
+    - Uses pygame.font.Font.size() to determine how wide the text will be
+    """
+    words = re.split(r"(\s+)", text)
+    lines = []
+    current_line = ""  # The words that will definitely be on the current line
+    for word in words:
+        candidate_line = current_line + word
+        text_width, _ = font.size(candidate_line.strip())
+        if text_width > max_width and current_line.strip() and word.strip():
+            # The word doesn't fit, so it starts the next line
+            lines.append(current_line.strip())
+            current_line = word
+        else:
+            current_line = candidate_line
+    if current_line.strip():
+        # Add the final line
+        lines.append(current_line.strip())
+    return lines
+
+
 class CoordinateSpecifier:
     """A specifier for a single coordinate value (either x or y)"""
 
+    __slots__ = ("outer_edge", "self_edge", "move_by_pixels")
+
     # 0 would mean the top or left edge of the window (greater pixels value moves right/down);
     # whereas 1 would mean the bottom or right edge of the window (greater pixels value moves left/up)
     outer_edge: Literal[-1, 1]
@@ -56,7 +100,14 @@ class CoordinateSpecifier:
     # In an object, -1 is the left/top edge, 0 is the center, and 1 is the right/bottom edge
     self_edge: LineEdge | None
     # Stores a postive or negative number of pixels that the resolved value should be "moved" by
-    move_by_pixels: float = 0
+    move_by_pixels: float
+
+    def __init__(
+        self, outer_edge: Literal[-1, 1] = -1, self_edge: LineEdge | None = None
+    ) -> None:
+        self.outer_edge = outer_edge
+        self.self_edge = self_edge
+        self.move_by_pixels = 0
 
     def _apply_movement(self, resolved_coordinate) -> float:
         return resolved_coordinate + self.move_by_pixels
@@ -97,22 +148,39 @@ class CoordinateSpecifier:
     def find_edge(self, edge: LineEdge, outer_size: float, self_length: float) -> float:
         raise NotImplementedError()
 
+    def depends_on_window_size(self) -> bool:
+        """Returns True if the resolved value changes when the window is resized"""
+        return False
+
+    def depends_on_other_objects(self) -> bool:
+        """Returns True if the resolved value changes when other objects move, so it can't be cached"""
+        return True
+
 
 class Pixels(CoordinateSpecifier):
+    __slots__ = ("pixels",)
+
     def __init__(
         self,
         pixels: float,
         outer_edge: Literal[-1, 1] = -1,
         position: LineEdge | None = None,
     ) -> None:
+        # The outer edge is the outer reference point, and the position is the inner reference point
+        super().__init__(outer_edge, position)
         self.pixels = pixels
-        self.outer_edge = outer_edge  # Outer reference point
-        self.self_edge = position  # Inner reference point
 
     def move_by(self, pixels: float):
         pixel_movement = -pixels if self.outer_edge == 1 else +pixels
         self.pixels += pixel_movement
 
+    def depends_on_window_size(self) -> bool:
+        # Measuring from the right/bottom of the window means it moves when the window is resized
+        return self.outer_edge == END
+
+    def depends_on_other_objects(self) -> bool:
+        return False
+
     def resolve_unmoved_value(self, outer_size: float) -> float:
         start_from = outer_size if self.outer_edge == 1 else 0
         offset = -self.pixels if self.outer_edge == 1 else +self.pixels
@@ -128,40 +196,44 @@ class Pixels(CoordinateSpecifier):
 
 
 class Percent(CoordinateSpecifier):
+    __slots__ = ("percent",)
+
     def __init__(
         self,
         percent: float,
         outer_edge: Literal[-1, 1] = -1,
         position: LineEdge | None = None,
     ) -> None:
+        # The outer edge is the outer reference point, and the position is the inner reference point
+        super().__init__(outer_edge, position)
         self.percent = percent
-        self.outer_edge = outer_edge  # Outer reference point
-        self.self_edge = position  # Inner reference point
 
-    def resolve_unmoved_value(self, outer_size: float) -> float:
-        pixels_specifier = Pixels(
-            self.percent * outer_size, self.outer_edge, self.self_edge
-        )
-        return pixels_specifier.resolve(outer_size)
+    def depends_on_window_size(self) -> bool:
+        return True
 
-    def calculate_offest_to_edge(self, target_edge: LineEdge, line_length: float):
-        pixels_specifier = Pixels(
-            self.percent * line_length, self.outer_edge, self.self_edge
-        )
-        return pixels_specifier.calculate_offest_to_edge(target_edge, line_length)
+    def depends_on_other_objects(self) -> bool:
+        return False
+
+    def resolve_unmoved_value(self, outer_size: float) -> float:
+        # Works the same as Pixels, with the pixels being a percentage of the outer size
+        pixels = self.percent * outer_size
+        return outer_size - pixels if self.outer_edge == 1 else pixels
 
     def find_edge(self, edge: LineEdge, outer_size: float, self_length: float) -> float:
-        pixels_specifier = Pixels(
-            self.percent * outer_size, self.outer_edge, self.self_edge
-        )
-        return pixels_specifier.find_edge(edge, outer_size, self_length)
+        coordinate_value = self.resolve(outer_size)
+        if self.self_edge is None:
+            raise RuntimeError("Cannot find edge of a standalone coordinate")
+        offset = self.calculate_offest_to_edge(edge, self_length)
+        return coordinate_value + offset
 
 
 class BelowObject(CoordinateSpecifier):
+    __slots__ = ("leader_object", "gap_pixels")
+
     def __init__(self, leader_object: GameObject, gap_pixels: float = 0) -> None:
+        super().__init__(self_edge=START)
         self.leader_object = leader_object
         self.gap_pixels = gap_pixels
-        self.self_edge = START
         print(f"Specified point {gap_pixels}px below {leader_object}")
 
     def resolve_unmoved_value(self, outer_size: float) -> float:
@@ -181,12 +253,14 @@ class BelowObject(CoordinateSpecifier):
 
 
 class BelowPoint(CoordinateSpecifier):
+    __slots__ = ("leader_point", "gap_pixels")
+
     def __init__(
         self, leader_point: Callable[[], Tuple[float, float]], gap_pixels=0.0
     ) -> None:
+        super().__init__(self_edge=START)
         self.leader_point = leader_point
         self.gap_pixels = gap_pixels
-        self.self_edge = START
 
     def resolve_leader_point(self) -> Tuple[float, float]:
         leader_point = self.leader_point()
@@ -204,10 +278,12 @@ class BelowPoint(CoordinateSpecifier):
 
 
 class RightOfObject(CoordinateSpecifier):
+    __slots__ = ("leader_object", "gap_pixels")
+
     def __init__(self, leader_object: GameObject, gap_pixels: float) -> None:
+        super().__init__(self_edge=START)
         self.leader_object = leader_object
         self.gap_pixels = gap_pixels
-        self.self_edge = START
 
     def resolve_unmoved_value(self, outer_size: float) -> float:
         leader_position = self.leader_object.current_coordinates
@@ -226,13 +302,15 @@ class RightOfObject(CoordinateSpecifier):
 
 
 class CenterAlignedToObject(CoordinateSpecifier):
+    __slots__ = ("leader_object", "get_leader_object_length")
+
     def __init__(
         self, leader_object: GameObject, get_leader_object_length: Callable[[], float]
     ) -> None:
+        super().__init__(self_edge=CENTER)
         self.leader_object = leader_object
         # This should be set to te width or height of the leader_object, depending on which axis is being used
         self.get_leader_object_length = get_leader_object_length
-        self.self_edge = CENTER
 
     def resolve_unmoved_value(self, _=None) -> float:
         leader_position = self.leader_object.current_coordinates
@@ -250,6 +328,22 @@ class CenterAlignedToObject(CoordinateSpecifier):
 
 
 class PointSpecifier:
+    """A position in the window, made up of an x and a y coordinate
+
+    - If neither coordinate depends on other objects, the top-left corner that it resolves to is cached,
+      keyed by the window size and the object's size
+    """
+
+    __slots__ = (
+        "x",
+        "y",
+        "outer_corner",
+        "self_corner",
+        "is_cacheable",
+        "cached_top_left",
+        "cached_for",
+    )
+
     def __init__(
         self,
         x: CoordinateSpecifier,
@@ -261,6 +355,12 @@ class PointSpecifier:
         self.y = y
         self.outer_corner = outer_corner
         self.self_corner = self_corner
+        self.is_cacheable = not (
+            x.depends_on_other_objects() or y.depends_on_other_objects()
+        )
+        self.cached_top_left: Tuple[float, float] | None = None
+        # The window width and height, and the object width and height, that the top-left was cached for
+        self.cached_for: Tuple[float, float, float, float] | None = None
 
     def resolve(self, game: Game) -> Tuple[float, float]:
         resolved_x_coordinate = self.x.resolve(game.width())
@@ -268,11 +368,26 @@ class PointSpecifier:
         return (resolved_x_coordinate, resolved_y_coordinate)
 
     def on_window_resize(self, event: Event):
-        """Responds to a window resize event to keep the position within window bounds"""
-        pass
+        """Forgets the position that was cached for the old window size
+
+        - Only called once the window size has settled, and only if `depends_on_window_size()` is True
+        """
+        self.cached_top_left = None
+        self.cached_for = None
+
+    def depends_on_window_size(self) -> bool:
+        return self.x.depends_on_window_size() or self.y.depends_on_window_size()
 
     def calculate_top_left(self, game: Game, object_width: float, object_height: float):
-        return self.find_corner(Corner.TOP_LEFT, game, object_width, object_height)
+        if not self.is_cacheable:
+            return self.find_corner(Corner.TOP_LEFT, game, object_width, object_height)
+        sizes = (game.width(), game.height(), object_width, object_height)
+        if sizes != self.cached_for or self.cached_top_left is None:
+            self.cached_top_left = self.find_corner(
+                Corner.TOP_LEFT, game, object_width, object_height
+            )
+            self.cached_for = sizes
+        return self.cached_top_left
 
     def find_corner(
         self, corner: Corner, game: Game, object_width: float, object_height: float
@@ -284,6 +399,8 @@ class PointSpecifier:
 
 
 class PercentagePoint(PointSpecifier):
+    __slots__ = ()
+
     def __init__(
         self,
         x: float,
@@ -302,6 +419,8 @@ class PercentagePoint(PointSpecifier):
 
 
 class PixelsPoint(PointSpecifier):
+    __slots__ = ()
+
     def __init__(self, x_pixels: float, y_pixels: float):
         super().__init__(
             Pixels(x_pixels, position=START),
@@ -311,6 +430,13 @@ class PixelsPoint(PointSpecifier):
 
 
 class Box:
+    """A rectangle described by its top-left (x1, y1) and bottom-right (x2, y2) corners
+
+    - Boxes aren't changed after they're created; methods like `enlarged_by()` return a new box instead
+    """
+
+    __slots__ = ("x1", "y1", "x2", "y2")
+
     def __init__(self, x1: float, y1: float, x2: float, y2: float):
         self.x1 = x1
         self.y1 = y1
@@ -345,15 +471,14 @@ class Box:
     def top_left(self) -> Tuple[float, float]:
         return (self.x1, self.y1)
 
-    def enlarge_by_x(self, pixels: float):
-        """Enlarges the box by the provided number of pixels on the left and the right"""
-        self.x1 -= pixels
-        self.x2 += pixels
-
-    def enlarge_by_y(self, pixels: float):
-        """Enlarges the box by the provided number of pixels on the top and the bottom"""
-        self.y1 -= pixels
-        self.y2 += pixels
+    def enlarged_by(self, x_pixels: float, y_pixels: float) -> Box:
+        """Returns a box that is bigger by x_pixels on the left and right, and by y_pixels on the top and bottom"""
+        return Box(
+            self.x1 - x_pixels,
+            self.y1 - y_pixels,
+            self.x2 + x_pixels,
+            self.y2 + y_pixels,
+        )
 
     def center(self) -> Tuple[float, float]:
         """Calculates the coordinates of the center of the box"""
@@ -399,6 +524,52 @@ class Box:
         return Box(x1=rect.left, y1=rect.top, x2=rect.right, y2=rect.bottom)
 
 
+# The size and corner radius of a background, in whole pixels
+BackgroundShape = Tuple[int, int, int]
+
+
+class BackgroundCache:
+    """Pre-rendered (rounded) rectangle backgrounds, so that they don't have to be drawn every frame
+
+    - Backgrounds are grouped by shape, and each shape has a surface for every colour and opacity it's been drawn in
+    - Textures register themselves as users of a shape, and a shape's surfaces are dropped once it has no users
+    """
+
+    def __init__(self) -> None:
+        self._surfaces: dict[BackgroundShape, dict[tuple, Surface]] = {}
+        self._user_counts: dict[BackgroundShape, int] = {}
+
+    def add_user(self, shape: BackgroundShape):
+        self._user_counts[shape] = self._user_counts.get(shape, 0) + 1
+
+    def remove_user(self, shape: BackgroundShape):
+        user_count = self._user_counts.get(shape, 0) - 1
+        if user_count > 0:
+            self._user_counts[shape] = user_count
+            return
+        self._user_counts.pop(shape, None)
+        self._surfaces.pop(shape, None)
+
+    def get(self, shape: BackgroundShape, color: Color, alpha: int) -> Surface:
+        surfaces = self._surfaces.setdefault(shape, {})
+        key = (tuple(color), alpha)
+        surface = surfaces.get(key)
+        if surface:
+            return surface
+        width, height, border_radius = shape
+        # We have to use a seperate surface becuase rectangles can't be transparent, https://stackoverflow.com/a/6350227/
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.set_alpha(alpha)
+        pygame.draw.rect(
+            surface, color, surface.get_rect(), border_radius=border_radius
+        )
+        surfaces[key] = surface
+        return surface
+
+    def surface_count(self) -> int:
+        return sum(len(surfaces) for surfaces in self._surfaces.values())
+
+
 class Theme:
     """Colors and fonts used by the game, labeled according to their purpose"""
 
@@ -407,6 +578,25 @@ class Theme:
 
 
 class Fonts:
+    def __init__(self) -> None:
+        # Each font file is only loaded once per size
+        self.loaded_fonts: dict[tuple[str | None, int], Font] = {}
+        # Describes where each loaded font came from, because pygame fonts can't tell us
+        self.font_keys: dict[Font, str] = {}
+
+    def load(self, file: str | None, size: int) -> Font:
+        """Loads a font file at a size (or pygame's default font if the file is None), reusing it if it's already loaded"""
+        font = self.loaded_fonts.get((file, size))
+        if not font:
+            font = Font(file, size)
+            self.loaded_fonts[(file, size)] = font
+            self.font_keys[font] = describe_font(file, size)
+        return font
+
+    def font_key(self, font: Font) -> str | None:
+        """Identifies a font across launches, or returns None if it wasn't loaded with `load()`"""
+        return self.font_keys.get(font)
+
     def title(self) -> Font:
         raise NotImplementedError()
 
@@ -417,6 +607,124 @@ class Fonts:
         raise NotImplementedError()
 
 
+def describe_font(file: str | None, size: int) -> str:
+    """Returns a key that identifies a font file at a size, which changes if the file is changed"""
+    if file is None:
+        file = os.path.join(
+            os.path.dirname(pygame.__file__), pygame.font.get_default_font()
+        )
+    file_stats = os.stat(file)
+    return (
+        f"{os.path.basename(file)}:{file_stats.st_size}:{file_stats.st_mtime_ns}:{size}"
+    )
+
+
+class TextMetricsCache:
+    """Remembers how big text is and how it wraps, so that text doesn't have to be rendered just to measure it
+
+    - Can be saved to disk and loaded on the next launch, so that pages can be laid out without measuring anything
+    - Entries are keyed by the font (see `describe_font()`) and the text, so changed fonts or text just miss the cache
+    - Only entries that were used are saved, and only if something was missing, so stale entries drop out of the file
+    - The file is ignored if it was made by a different version of pygame, which could measure text differently
+    """
+
+    def __init__(self, fonts: Fonts) -> None:
+        self.fonts = fonts
+        self.file_path: Path | None = None
+        # Entries that have been used since launching, keyed by (font key, text)
+        self.sizes: dict[tuple[str, str], tuple[int, int]] = {}
+        # Keyed by (font key, max width, text). Widths are whole numbers of pixels, so the max width is rounded down.
+        self.layouts: dict[tuple[str, int, str], list[str]] = {}
+        # Entries from the file that haven't been used yet
+        self.saved_sizes: dict[tuple[str, str], tuple[int, int]] = {}
+        self.saved_layouts: dict[tuple[str, int, str], list[str]] = {}
+        self.has_new_entries = False
+
+    def load(self, file_path: Path):
+        """Uses the entries saved in a file, and saves back to it later"""
+        self.file_path = file_path
+        try:
+            with open(file_path) as file:
+                saved_data = json.load(file)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as error:
+            print(f"Ignoring text metrics cache at {file_path}: {error}")
+            return
+        if saved_data.get("pygame_version") != pygame.version.ver:
+            return
+        for font_key, entries in saved_data["fonts"].items():
+            for text, (width, height) in entries["sizes"].items():
+                self.saved_sizes[(font_key, text)] = (width, height)
+            for max_width, layouts in entries["layouts"].items():
+                for text, lines in layouts.items():
+                    self.saved_layouts[(font_key, int(max_width), text)] = lines
+
+    def save(self):
+        if not self.file_path or not self.has_new_entries:
+            return
+        fonts: dict[str, dict] = {}
+        for (font_key, text), size in self.sizes.items():
+            entries = fonts.setdefault(font_key, {"sizes": {}, "layouts": {}})
+            entries["sizes"][text] = size
+        for (font_key, max_width, text), lines in self.layouts.items():
+            entries = fonts.setdefault(font_key, {"sizes": {}, "layouts": {}})
+            entries["layouts"].setdefault(str(max_width), {})[text] = lines
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.file_path, "w") as file:
+            json.dump({"pygame_version": pygame.version.ver, "fonts": fonts}, file)
+        self.has_new_entries = False
+
+    def size(self, font: Font, text: str) -> tuple[int, int]:
+        """Returns the size that the text will be when it's rendered in the font"""
+        font_key = self.fonts.font_key(font)
+        if not font_key:
+            return font.size(text)
+        key = (font_key, text)
+        size = self.sizes.get(key)
+        if size is not None:
+            return size
+        size = self.saved_sizes.pop(key, None)
+        if size is None:
+            size = font.size(text)
+            self.has_new_entries = True
+        self.sizes[key] = size
+        return size
+
+    def split_text(self, text: str, max_width: float, font: Font) -> list[str]:
+        """Same as `split_text()`, but remembers the result"""
+        font_key = self.fonts.font_key(font)
+        if not font_key:
+            return split_text(text, max_width, font)
+        # A whole number of pixels only exceeds the max width if it exceeds the max width rounded down
+        key = (font_key, math.floor(max_width), text)
+        lines = self.layouts.get(key)
+        if lines is not None:
+            return lines
+        lines = self.saved_layouts.pop(key, None)
+        if lines is None:
+            lines = split_text(text, max_width, font)
+            self.has_new_entries = True
+        self.layouts[key] = lines
+        return lines
+
+
+def spawned_descendants_of(objects: Iterable[GameObject]) -> list[GameObject]:
+    """Returns the objects, plus any of their descendants that have already been spawned
+
+    - Children that haven't been spawned yet are left out, because they add themselves to the game when they spawn
+    """
+    found_objects = []
+    objects_to_check = deque(objects)
+    while objects_to_check:
+        object = objects_to_check.popleft()
+        found_objects.append(object)
+        objects_to_check.extend(
+            child for child in object.list_children() if child.exists
+        )
+    return found_objects
+
+
 class Game:
     def __init__(
         self,
@@ -425,6 +733,7 @@ class Game:
         fonts: Fonts,
         title: str,
         window_size: Tuple[int, int],
+        idle_fps=10,
     ):
         # Window display config
         self.theme = theme
@@ -432,46 +741,92 @@ class Game:
         self.background_color = self.theme.BACKGROUND
         self.title = title
 
+        # Only the subsystems that the game uses are started, because others (e.g. audio) can be slow to start
+        pygame.display.init()
+        pygame.font.init()
+        # pygame.time has no init() of its own: the timer is only started by a clock's first tick, and until then
+        # get_ticks() stays at 0, which would break idle detection, animations and auction countdowns
+        pygame.time.Clock().tick()
+
         # Initilise the display surface
-        self.surface = pygame.display.set_mode(window_size, pygame.RESIZABLE)
+        self.display_surface = pygame.display.set_mode(window_size, pygame.RESIZABLE)
+        # The surface that objects draw to, which is swapped out while rendering offscreen
+        self.surface = self.display_surface
         pygame.display.set_caption(title)
 
         # Initialise other game components
         self.max_fps = max_fps
+        # The frame rate to drop down to when nothing is animating and there hasn't been any recent input
+        self.idle_fps = idle_fps
+        self.idle_after_ms = 500
+        self.last_input_time = 0
+        # The event that ended an idle wait (see `wait_for_event()`)
+        self.waking_event: Event | None = None
         self.clock = pygame.time.Clock()
+        self.animator = Animator()
+        self.last_tick_time: int | None = None
         self.exited = False
         self.top_level_objects: list[GameObject] = []
         self.all_objects: list[GameObject] = []
         self.old_window_dimensions = (self.width(), self.height())
+        self.pending_resize_event: Event | None = None
+        self.last_resize_time = 0
+        # How long the window size has to stay the same before the layout is updated
+        self.resize_settle_ms = 150
         self.key_action_callbacks = {}
         self.key_up_callbacks = {}
         self.is_paused = False
         self.recent_frame_times = deque(maxlen=10)
         self.active_page: Page | None = None
+        self.tasks = TaskScheduler()
+        self.background_cache = BackgroundCache()
+        # Only kept in memory, unless a file is loaded (see `TextMetricsCache.load()`)
+        self.text_metrics = TextMetricsCache(fonts)
+        # Where the top-left corner of `self.surface` is within the window, which is only non-zero offscreen
+        self.surface_offset: Tuple[int, int] = (0, 0)
+        self.event_bus = EventBus()
+        # Game-wide events that aren't tied to a specific object
+        self.events = EventEmitter()
+        # Events that are posted here are delivered together, once the objects have ticked
+        self.event_queue = EventQueue(
+            coalesced_event_types=[GameEvent.GAME_STATE_CHANGED]
+        )
+
+        # Game-wide callbacks that run every tick, e.g. to handle network messages
+        self.tick_tasks: list[Callable[[], None]] = []
+        # Work that can wait until nothing else is happening (see `run_when_idle()`)
+        self.idle_callbacks: deque[Callable[[], object]] = deque()
 
         # Set up default keybinds
         self.keybinds = {}
 
-        pygame.init()
-
     def add_objects(self, *objects: GameObject):
-        self.all_objects.extend(objects)
+        self.all_objects.extend(spawned_descendants_of(objects))
         self.top_level_objects.extend(objects)
 
     def remove_object(self, object: GameObject):
-        self.all_objects.remove(object)
+        for descendant in spawned_descendants_of([object]):
+            if descendant in self.all_objects:
+                self.all_objects.remove(descendant)
         self.top_level_objects.remove(object)
 
+    def run_when_idle(self, callback: Callable[[], object]):
+        """Runs the callback on the main thread during a later idle frame, e.g. to construct a page in advance
+
+        - At most one callback is run per idle frame, so that the frame rate doesn't dip
+        """
+        self.idle_callbacks.append(callback)
+
     def get_initial_page(self) -> Page:
         raise NotImplementedError()
 
     def width(self) -> int:
         """Returns the width of the window, in pixels"""
-        return self.surface.get_width()
+        return self.display_surface.get_width()
 
     def height(self) -> int:
         """Returns the height of the window, in pixels"""
-        return self.surface.get_height()
+        return self.display_surface.get_height()
 
     def window_box(self) -> Box:
         """Calculates the box that represents the size of the window"""
@@ -482,21 +837,118 @@ class Game:
 
         return Box(x1, y1, x2, y2)
 
+    def render_offscreen(self, draw: Callable[[], None], bounds: Box) -> Surface:
+        """Runs the draw function with a transparent surface covering `bounds` in place of the display surface
+
+        - Objects keep drawing at their window coordinates, which `to_surface_coordinates()` moves onto the surface
+        - Returns the surface, with anything that was drawn outside of the bounds cut off
+        """
+        offscreen_surface = Surface(
+            (max(0, int(bounds.width)), max(0, int(bounds.height))), pygame.SRCALPHA
+        )
+        previous_surface = self.surface
+        previous_offset = self.surface_offset
+        self.surface = offscreen_surface
+        self.surface_offset = (int(bounds.x1), int(bounds.y1))
+        try:
+            draw()
+        finally:
+            self.surface = previous_surface
+            self.surface_offset = previous_offset
+        return offscreen_surface
+
+    def to_surface_coordinates(self, point: Tuple[float, float]) -> Tuple[float, float]:
+        """Converts a point within the window to the same point on `self.surface`"""
+        offset_x, offset_y = self.surface_offset
+        return point[0] - offset_x, point[1] - offset_y
+
+    def to_surface_rect(self, rect: Rect) -> Rect:
+        """Converts a rectangle within the window to the same rectangle on `self.surface`"""
+        offset_x, offset_y = self.surface_offset
+        return rect.move(-offset_x, -offset_y)
+
     def set_window_title(self, title_part: str):
         pygame.display.set_caption(f"{title_part} - {self.title}")
 
     def all_rendered_objects(self) -> list[GameObject]:
         return [object for object in self.all_objects if object.exists]
 
+    def find_object_at(self, point: Tuple[float, float]) -> GameObject | None:
+        """Returns the topmost rendered object at the provided point, i.e. the one that was drawn last"""
+
+        def find_within(objects: list[GameObject]) -> GameObject | None:
+            for object in reversed(objects):
+                if not object.exists:
+                    continue
+                contains_point = object.contains_point(point)
+                # Children are drawn on top of their parent, so they take priority, unless they've been clipped away
+                if contains_point or not object.clips_children:
+                    hit_child = find_within(object.list_children())
+                    if hit_child:
+                        return hit_child
+                if contains_point:
+                    return object
+            return None
+
+        return find_within(self.top_level_objects)
+
+    def is_resizing(self) -> bool:
+        """Returns True while the window is being resized, i.e. until the size has settled"""
+        return self.pending_resize_event is not None
+
+    def apply_settled_resize(self):
+        """Updates the layout once the window size has stopped changing for a while"""
+        if not self.pending_resize_event:
+            return
+        time_since_resize = pygame.time.get_ticks() - self.last_resize_time
+        if time_since_resize < self.resize_settle_ms:
+            return
+        event = self.pending_resize_event
+        self.pending_resize_event = None
+        new_window_dimensions = (self.width(), self.height())
+        if new_window_dimensions == self.old_window_dimensions:
+            # It ended up back at the size that it started at
+            return
+        event.old_dimensions = self.old_window_dimensions
+        # Only positions that are relative to the window's size need to know about the new size
+        for object in self.all_objects:
+            position = object.position()
+            if position.depends_on_window_size():
+                position.on_window_resize(event)
+        self.old_window_dimensions = new_window_dimensions
+        self.events.emit(GameEvent.WINDOW_RESIZED, event)
+
+    def is_idle(self) -> bool:
+        """Returns True if nothing is changing, so the game can run at a lower frame rate"""
+        if self.animator.is_active() or len(self.event_queue) or self.is_resizing():
+            return False
+        if self.tasks.pending_count():
+            return False
+        time_since_input = pygame.time.get_ticks() - self.last_input_time
+        return time_since_input > self.idle_after_ms
+
+    def wait_for_event(self, until_ms: int):
+        """Sleeps until the provided time, but wakes up as soon as an event arrives so that input isn't delayed
+
+        - The event that woke us up is handled at the start of the next tick
+        """
+        timeout_ms = until_ms - pygame.time.get_ticks()
+        if timeout_ms <= 0:
+            return
+        event = pygame.event.wait(timeout_ms)
+        if event.type != pygame.NOEVENT:
+            self.waking_event = event
+
     def on_event(self, event):
         # print(event)
+        if event.type in INPUT_EVENT_TYPES:
+            self.last_input_time = pygame.time.get_ticks()
         if event.type == pygame.QUIT:
             self.exited = True
         elif event.type == pygame.VIDEORESIZE:
-            event.old_dimensions = self.old_window_dimensions
-            for object in self.all_objects:
-                object.position().on_window_resize(event)
-            self.old_window_dimensions = (self.width(), self.height())
+            # SDL sends a flood of these while the window is being dragged, so wait for the size to settle
+            self.pending_resize_event = event
+            self.last_resize_time = pygame.time.get_ticks()
 
         # Keyboard input
         elif event.type == pygame.KEYDOWN:
@@ -513,10 +965,15 @@ class Game:
             if event.button != 1:
                 # Only trigger for left clicks
                 return
-            for object in self.all_rendered_objects():
-                if object.collision_box().intersects_with_point(event.pos):
-                    # Fire the click event for the object
-                    object.events.emit(GameEvent.CLICK, event)
+            clicked_object = self.find_object_at(event.pos)
+            if clicked_object:
+                # Fire the click event for the object, and let it bubble up to its parents
+                self.event_bus.dispatch(clicked_object, GameEvent.CLICK, event)
+        elif event.type == pygame.MOUSEWHEEL:
+            # Scroll whatever is under the mouse, or the closest ancestor that handles scrolling
+            scrolled_object = self.find_object_at(pygame.mouse.get_pos())
+            if scrolled_object:
+                self.event_bus.dispatch(scrolled_object, GameEvent.SCROLL, event)
 
     def trigger_key_action(self, action: str, event: pygame.event.Event):
         if action not in self.key_action_callbacks:
@@ -548,17 +1005,41 @@ class Game:
 
         - One tick should happen every frame
         - Runs the event handlers for any events emitted since the last tick
+        - Advances any animations
         - Runs the tick tasks for each game object
+        - Delivers any queued events (see `EventQueue`)
         - This is essentially the computational/"logical server" side of the game
         """
+        if self.waking_event:
+            self.on_event(self.waking_event)
+            self.waking_event = None
         for event in pygame.event.get():
             self.on_event(event)
+        self.apply_settled_resize()
+
+        # Advance animations by however much time has passed since the last tick
+        current_time = pygame.time.get_ticks()
+        if self.last_tick_time is not None:
+            self.animator.update(current_time - self.last_tick_time)
+        self.last_tick_time = current_time
+
+        # Hand back the results of any background work that has finished
+        self.tasks.process_completions()
+        # Copied, because tasks can remove themselves (e.g. once an auction ends or the server disconnects)
+        for callback in tuple(self.tick_tasks):
+            callback()
 
         # Update each top-level object
         if not self.is_paused:
             for object in self.top_level_objects:
                 object.run_tick_tasks()
 
+        # Deliver the events that were queued up during this tick
+        self.event_queue.flush()
+
+        if self.idle_callbacks and self.is_idle():
+            self.idle_callbacks.popleft()()
+
     def draw_frame(self):
         """Redraws the screen, ready for the display to be refreshed
 
@@ -579,21 +1060,34 @@ class Game:
     def initialise_game_session(self):
         pass
 
+    def finalise_game_session(self):
+        """Runs once the game loop has stopped, before background tasks are shut down"""
+        pass
+
     def game_session(self):
         self.initialise_game_session()
         self.get_initial_page().activate()
 
         while not self.exited:
+            frame_started_at = pygame.time.get_ticks()
             self.execute_tick()
             self.draw_frame()
             self.update_display()
 
-            self.recent_frame_times.append(self.clock.get_rawtime())
-            self.clock.tick(self.max_fps)
+            self.recent_frame_times.append(pygame.time.get_ticks() - frame_started_at)
+            if self.is_idle():
+                self.wait_for_event(frame_started_at + 1000 // self.idle_fps)
+            else:
+                self.clock.tick(self.max_fps)
 
+        self.finalise_game_session()
         self.top_level_objects.clear()
         self.key_action_callbacks.clear()
         self.key_up_callbacks.clear()
+        self.event_queue.clear()
+        self.idle_callbacks.clear()
+        self.tasks.shutdown()
+        self.text_metrics.save()
 
 
 T = TypeVar("T", bound=Game)
@@ -609,6 +1103,9 @@ class Page(Generic[T]):
         self.page_header: GameObject[T] | None = None
 
     def activate(self):
+        previous_page = self.game.active_page
+        if previous_page and previous_page is not self:
+            previous_page.deactivate()
         if self.title:
             self.game.set_window_title(self.title)
         self.game.active_page = self
@@ -617,15 +1114,45 @@ class Page(Generic[T]):
         self.game.top_level_objects.clear()
         self.game.add_objects(*self._objects)
 
+    def deactivate(self):
+        """Called when another page replaces this one. Cancels any background work that the page started."""
+        self.game.tasks.cancel_owned_by(self)
+
+    def run_in_background(
+        self,
+        function: Callable,
+        *args,
+        kind: WorkerKind = WorkerKind.THREAD,
+        on_done: Callable | None = None,
+        on_error: Callable[[BaseException], None] | None = None,
+    ) -> Task:
+        """Submits work to the game's worker pools. It will be cancelled if the page is deactivated."""
+        return self.game.tasks.submit(
+            function, *args, kind=kind, owner=self, on_done=on_done, on_error=on_error
+        )
+
+    def is_active(self) -> bool:
+        return self.game.active_page is self
+
     def add_objects(self, *objects: GameObject[T]):
+        """Adds objects to the page. They're only added to the game if the page is currently being shown."""
         self._objects.extend(objects)
-        self.game.add_objects(*objects)
+        if self.is_active():
+            self.game.add_objects(*objects)
+
+    def detach_object(self, object: GameObject[T]):
+        """Takes an object off the page without destroying it, so that it can be added back later
+
+        - Unlike `remove_object()`, OBJECT_REMOVE isn't emitted and the object (and its children) keep existing
+        """
+        self._objects.remove(object)
+        if self.is_active():
+            self.game.remove_object(object)
 
     def remove_object(self, object: GameObject[T]):
         object.exists = False
         object.events.emit(GameEvent.OBJECT_REMOVE)
-        self._objects.remove(object)
-        self.game.remove_object(object)
+        self.detach_object(object)
 
     def get_content_start_point(
         self,
@@ -658,6 +1185,10 @@ class Texture:
     def draw_at(self, position: PointSpecifier):
         pass
 
+    def release(self):
+        """Frees up any cached resources, once the texture's object has been removed"""
+        pass
+
 
 class PlainColorTexture(Texture):
     def __init__(
@@ -681,11 +1212,12 @@ class PlainColorTexture(Texture):
             return
 
         x1, y1 = position.calculate_top_left(self.game, self.width(), self.height())
+        x1, y1 = self.game.to_surface_coordinates((x1, y1))
 
         pygame.draw.rect(
             self.game.surface,
             self.color,
-            Rect(x1, y1, self.width(), self.height()),
+            (x1, y1, self.width(), self.height()),
         )
 
 
@@ -726,40 +1258,12 @@ class TextTexture(Texture):
         text_rect.top = math.floor(start_y)
 
         padding_x, padding_y = padding
-        outer_box = Box.from_rect(text_rect)
-        outer_box.enlarge_by_x(padding_x)
-        outer_box.enlarge_by_y(padding_y)
+        outer_box = Box.from_rect(text_rect).enlarged_by(padding_x, padding_y)
 
         return text_surface, outer_box, text_rect
 
     def split_text(self, text: str, max_width: float, font: Font):
-        """Splits the provides string into lines by applying word wrapping
-
-        - Each line will be no longer than max_width
-        - Uses pygame.font.Font.size() to determine how wide the text will be
-        - Source: Written by GitHub Copilot
-        """
-        words = re.split(r"(\s+)", text)
-        lines = []
-        acceptable_line = ""  # A line that we can guarantee will fit
-        current_line = ""  # The line that we use to test if it fits
-        for word in words:
-            if not current_line:
-                current_line = word
-                continue
-            current_line += word
-            text_width, _ = font.size(current_line)
-            if text_width > max_width:
-                # The current line is too long, so use the acceptable_line from last iteration
-                lines.append(acceptable_line.lstrip())
-                current_line = word
-            else:
-                # The current line fits
-                acceptable_line = current_line
-        if current_line:
-            # Add the final line
-            lines.append(current_line.lstrip())
-        return lines
+        return self.game.text_metrics.split_text(text, max_width, font)
 
     def render_wrapped_text(
         self, top_left: Tuple[float, float], padding: Tuple[float, float]
@@ -804,17 +1308,16 @@ class TextTexture(Texture):
         text_rect.left = math.floor(start_x)
         text_rect.top = math.floor(start_y)
         padding_x, padding_y = padding
-        outer_box = Box.from_rect(text_rect)
-        outer_box.enlarge_by_x(padding_x)
-        outer_box.enlarge_by_y(padding_y)
+        outer_box = Box.from_rect(text_rect).enlarged_by(padding_x, padding_y)
 
         return text_surface, outer_box, text_rect
 
     def get_dummy_bounding_boxes(self):
-        text_content, text_color = self.get_content()
-        _, outer_box, text_rect = self.render_text_line(
-            text_content, text_color, 0, 0, self.get_padding()
-        )
+        text_content, _ = self.get_content()
+        # Measured rather than rendered, so that nothing has to be drawn until the text is shown
+        text_rect = Rect((0, 0), self.game.text_metrics.size(self.font, text_content))
+        padding_x, padding_y = self.get_padding()
+        outer_box = Box.from_rect(text_rect).enlarged_by(padding_x, padding_y)
         return outer_box, text_rect
 
     def __init__(
@@ -838,6 +1341,7 @@ class TextTexture(Texture):
         # This is becuase we might need to use the bbox size to resolve its spawn position
         self.current_outer_box, self.current_text_rect = self.get_dummy_bounding_boxes()
         self.opacity = 1
+        self.background_shape: BackgroundShape | None = None
 
     def get_background_color(self) -> Color | None:
         return None
@@ -849,20 +1353,31 @@ class TextTexture(Texture):
         """Converts our own opacity percentage into an alpha value that should be applied to drawn surfaces"""
         return int(self.opacity * 255)
 
+    def use_background_shape(self, shape: BackgroundShape | None):
+        """Tells the background cache which shape we're using, so that it knows which shapes are still needed"""
+        if shape == self.background_shape:
+            return
+        if self.background_shape:
+            self.game.background_cache.remove_user(self.background_shape)
+        if shape:
+            self.game.background_cache.add_user(shape)
+        self.background_shape = shape
+
+    def release(self):
+        self.use_background_shape(None)
+
     def draw_background(self, outer_box: Box):
         background_color = self.get_background_color()
         if not background_color:
             return
-        # We have to use a seperate surface becuase rectangles can't be transparent, https://stackoverflow.com/a/6350227/
-        surface = pygame.Surface((outer_box.width, outer_box.height), pygame.SRCALPHA)
-        surface.set_alpha(self.calculate_surface_alpha())
-        pygame.draw.rect(
-            surface,
-            background_color,
-            surface.get_rect(),
-            border_radius=int(self.border_radius),
+        shape = (int(outer_box.width), int(outer_box.height), int(self.border_radius))
+        self.use_background_shape(shape)
+        surface = self.game.background_cache.get(
+            shape, background_color, self.calculate_surface_alpha()
+        )
+        self.game.surface.blit(
+            surface, self.game.to_surface_coordinates(outer_box.top_left)
         )
-        self.game.surface.blit(surface, outer_box.top_left)
 
     def draw_at(self, position: PointSpecifier):
         top_left = position.calculate_top_left(
@@ -874,22 +1389,33 @@ class TextTexture(Texture):
         self.current_text_rect = text_rect
         self.draw_background(outer_box)
         text_surface.set_alpha(self.calculate_surface_alpha())
-        self.game.surface.blit(text_surface, text_rect)
+        self.game.surface.blit(text_surface, self.game.to_surface_rect(text_rect))
 
 
 class ImageTexture(Texture):
-    def __init__(self, game, image):
+    def __init__(self, game: Game, image: Surface):
         self.game = game
         self.image = image
 
+    def width(self) -> float:
+        return self.image.get_width()
+
+    def height(self) -> float:
+        return self.image.get_height()
+
     def draw_at(self, position: PointSpecifier):
         start_x, start_y = position.calculate_top_left(
             self.game, self.width(), self.height()
         )
-        self.game.surface.blit(self.image, (start_x, start_y))
+        self.game.surface.blit(
+            self.image, self.game.to_surface_coordinates((start_x, start_y))
+        )
 
 
 class GameObject(Generic[T]):
+    # Set by objects that clip their children to their own box when drawing them, e.g. scrolling lists
+    clips_children = False
+
     def height(self) -> float:
         return self.texture.height()
 
@@ -901,6 +1427,7 @@ class GameObject(Generic[T]):
 
     def set_position(self, position: PointSpecifier):
         self._position = position
+        self.invalidate_cache()
 
     def position(self) -> PointSpecifier:
         return self._position
@@ -928,6 +1455,7 @@ class GameObject(Generic[T]):
         self.exists = False
         self.parent: GameObject | None = None
         self.reset()
+        self.events.on(GameEvent.OBJECT_REMOVE, lambda: self.texture.release())
 
     def mark_as_spawned(self):
         self.exists = True
@@ -942,6 +1470,18 @@ class GameObject(Generic[T]):
         # print(self, self.position.resolve(self.game))
         self.texture.draw_at(self.position())
 
+    def list_children(self) -> list[GameObject]:
+        """Returns the objects that are drawn as part of this object (none, unless overridden)"""
+        return []
+
+    def invalidate_cache(self):
+        """Tells the object's ancestors that it will be drawn differently, so that any cached renders are redone
+
+        - Called when the object moves. Subclasses should also call it when their appearance changes.
+        """
+        if self.parent:
+            self.parent.invalidate_cache()
+
     def run_tick_tasks(self):
         for callback in self.tick_tasks:
             callback()
@@ -1023,43 +1563,30 @@ class GameObject(Generic[T]):
         closest_edge = min(distances, key=distances.get)  # type: ignore
         return closest_edge
 
+    def contains_point(self, point: Tuple[float, float]) -> bool:
+        """Returns True if the point is within the object's collision box (without creating a Box)"""
+        width = self.width()
+        height = self.height()
+        x1, y1 = self.position().calculate_top_left(self.game, width, height)
+        point_x, point_y = point
+        return x1 <= point_x <= x1 + width and y1 <= point_y <= y1 + height
+
+    def is_visible_at(self, point: Tuple[float, float]) -> bool:
+        """Returns True if the point is within the object's collision box, and hasn't been clipped away by a parent"""
+        if not self.contains_point(point):
+            return False
+        ancestor = self.parent
+        while ancestor:
+            if ancestor.clips_children and not ancestor.contains_point(point):
+                return False
+            ancestor = ancestor.parent
+        return True
+
     def is_hover(self) -> bool:
         """Returns True if the object's collision box is being hovered over by the mouse"""
-        mouse_position = pygame.mouse.get_pos()
-        return self.collision_box().intersects_with_point(mouse_position)
+        return self.is_visible_at(pygame.mouse.get_pos())
 
     def is_pressed(self) -> bool:
         """Returns True if the object's collision box is being clicked on"""
         left_mouse_is_down, _, _ = pygame.mouse.get_pressed()
-        mouse_position = pygame.mouse.get_pos()
-        mouse_is_within_object = self.collision_box().intersects_with_point(
-            mouse_position
-        )
-        return mouse_is_within_object and left_mouse_is_down
-
-
-# FIXME Maybe re-implement this if/when we need it
-# class Velocity:
-#     def on_tick(self):
-#         x_movement = self.x
-#         y_movement = self.y
-
-#         self.object.position.move_right(x_movement)
-#         self.object.position.move_down(y_movement)
-
-#     def __init__(self, game_object: GameObject, base_speed: float):
-#         # Magnitudes of velocity, measured in pixels/tick
-#         self.x = 0
-#         self.y = 0
-
-#         # The speed that the object will travel at by default (pixels/tick)
-#         self.base_speed = base_speed
-
-#         self.object = game_object
-#         self.object.tick_tasks.append(self.on_tick)
-
-#     def shove_x(self, multiplier=1.0):
-#         self.x = self.base_speed * multiplier
-
-#     def shove_y(self, multiplier=1.0):
-#         self.y = self.base_speed * multiplier
+        return left_mouse_is_down and self.is_visible_at(pygame.mouse.get_pos())
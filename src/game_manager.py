@@ -0,0 +1,338 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pygame
+from pydantic import ValidationError
+
+from actions import Action, AddPlayer, EndAuction, SetPlayerToken
+from auction import AuctionClock
+from data_storage import Auction, Player, SavedGameData, Token
+from events import EventEmitter, GameEvent
+from replay import GameRecording
+from rules import get_rules
+from state_sync import StateReplica, StateSyncError
+
+if TYPE_CHECKING:
+    from game_engine import Game
+    from task_scheduler import Task
+    from network_client import NetworkClient
+
+
+def read_state_message(replica: StateReplica, payload: bytes) -> SavedGameData | None:
+    """Applies a state message from the server, and returns the game that the replica now holds
+
+    - Returns None if the replica needs a resync, because a patch was missed or the message couldn't be read
+    - The replica is reset if the message couldn't be read, because it might only have been partly applied
+    """
+    try:
+        if not replica.apply(payload):
+            print("Missed a change from the server")
+            return None
+        return replica.to_game_data()
+    except (StateSyncError, ValidationError) as error:
+        print(f"Couldn't read a change from the server: {error}")
+        replica.reset()
+        return None
+
+
+class SavedGameManager:
+    """Owns the state of the current game, and notifies subscribers whenever it changes
+
+    - Emits PLAYER_ADDED, PLAYER_REMOVED, PLAYER_TOKEN_CHANGED, PROPERTY_CHANGED and AUCTION_CHANGED as soon as
+      the change is made
+    - GAME_STATE_CHANGED is queued and coalesced, and causes the game to be saved
+    - Every change is recorded as an action, and the recording is saved next to the game (see replay.py)
+    """
+
+    def __init__(self, session: Game, data: SavedGameData) -> None:
+        self.game = session
+        self.data = data
+        self.recording = GameRecording.for_game(data)
+        self.game_save_exception: BaseException | None = None
+        self.save_file_exists = False
+        self.save_in_progress = False
+        self.save_requested_again = False
+        self.save_task: Task | None = None
+        # Whether anything has changed since the last save was serialised
+        self.has_unsaved_changes = False
+        self.events = EventEmitter()
+        self.events.on(GameEvent.GAME_STATE_CHANGED, self.save_to_disk)
+        # Kept up to date as tokens change, so that UI checks don't have to scan every player
+        self.used_tokens = {player.token for player in data.players if player.token}
+        # Properties are changed by the rules engine, so pass on its events
+        rules = get_rules(data)
+        rules.events.on(GameEvent.PROPERTY_CHANGED, self.on_property_changed)
+        rules.events.on(GameEvent.AUCTION_CHANGED, self.on_auction_changed)
+        self.auction_clock = AuctionClock(pygame.time.get_ticks)
+
+    def on_state_changed(self):
+        self.has_unsaved_changes = True
+        # Queued and coalesced, so a burst of changes within a tick only results in one save
+        self.game.event_queue.post(self.events, GameEvent.GAME_STATE_CHANGED)
+
+    def add_player(self, player: Player):
+        if not self.data.get_free_player_slots():
+            raise RuntimeError("Can't add player to a full game")
+        self.data.players.append(player)
+        self.recording.record(AddPlayer(nickname=player.nickname))
+        if player.token:
+            self.used_tokens.add(player.token)
+            self.recording.record(
+                SetPlayerToken(
+                    player_index=self.player_index(player), token=player.token
+                )
+            )
+        self.events.emit(GameEvent.PLAYER_ADDED, player)
+        self.on_state_changed()
+
+    def set_player_token(self, player: Player, token: Token):
+        previous_token = player.token
+        if previous_token == token:
+            return
+        player.set_token(token)
+        self.recording.record(
+            SetPlayerToken(player_index=self.player_index(player), token=token)
+        )
+        self.used_tokens.discard(previous_token)  # type: ignore
+        self.used_tokens.add(token)
+        self.events.emit(GameEvent.PLAYER_TOKEN_CHANGED, player, previous_token)
+        self.on_state_changed()
+
+    def perform_action(self, action: Action):
+        """Applies a property action (e.g. buying, building or trading). Raises an ActionError if it isn't allowed."""
+        action.check(self.data)
+        action.apply(self.data)
+        self.recording.record(action)
+        self.on_state_changed()
+
+    def on_property_changed(self, space_index: int):
+        self.events.emit(GameEvent.PROPERTY_CHANGED, space_index)
+
+    def on_auction_changed(self, auction: Auction | None):
+        """Only called when the auction starts, ends, or gets a new bid, so UI doesn't need to check every frame"""
+        was_running = self.auction_clock.is_running()
+        self.auction_clock.update(auction)
+        if self.auction_clock.is_running() and not was_running:
+            self.game.tick_tasks.append(self.update_auction)
+        elif was_running and not self.auction_clock.is_running():
+            self.game.tick_tasks.remove(self.update_auction)
+        self.events.emit(GameEvent.AUCTION_CHANGED, auction)
+
+    def update_auction(self):
+        if self.auction_clock.has_run_out():
+            self.end_auction()
+
+    def end_auction(self):
+        self.perform_action(EndAuction())
+
+    def is_token_used(self, token: Token) -> bool:
+        return token in self.used_tokens
+
+    def player_index(self, player: Player) -> int:
+        # Compared by identity, because two players with the same details are equal
+        return next(
+            index for index, other in enumerate(self.data.players) if other is player
+        )
+
+    def save_to_disk(self):
+        """Serialises the game and writes it to disk on a worker thread"""
+        if self.save_in_progress:
+            # Only one write can run at a time, so save again once the current one finishes
+            self.save_requested_again = True
+            return
+        self.save_in_progress = True
+        self.save_task = self.game.tasks.submit(
+            self.write_save_file,
+            *self.serialize_save(),
+            on_done=self.on_save_finished,
+            on_error=self.on_save_failed,
+        )
+
+    def save_before_exit(self):
+        """Waits for the save that's running (if any), then writes any changes since then on the main thread
+
+        - The game's background tasks are about to be shut down, so nothing can be left for a worker to do
+        """
+        if self.save_task:
+            # Any changes are written below instead of by another background save
+            self.save_requested_again = False
+            self.game.tasks.wait_for(self.save_task)
+        if not self.has_unsaved_changes:
+            return
+        self.save_in_progress = True
+        try:
+            recording_error = self.write_save_file(*self.serialize_save())
+        except Exception as exception:
+            self.on_save_failed(exception)
+            return
+        self.on_save_finished(recording_error)
+
+    def serialize_save(self) -> tuple[Path, str, bool, Path, str]:
+        """Returns the arguments for `write_save_file()`. Runs on the main thread, so that the save is a consistent snapshot."""
+        serialized_game_data = self.data.model_dump_json(indent=2)
+        serialized_recording = self.recording.model_dump_json(exclude_none=True)
+        self.has_unsaved_changes = False
+        json_file_name_timestamp = self.data.started_at.strftime("%Y-%m-%d %H-%M-%S")
+        json_file_path = Path(
+            "data",
+            "saves",
+            f"{json_file_name_timestamp}.json",
+        )
+        return (
+            json_file_path,
+            serialized_game_data,
+            self.save_file_exists,
+            self.recording.get_file_path(),
+            serialized_recording,
+        )
+
+    @staticmethod
+    def write_save_file(
+        json_file_path: Path,
+        serialized_game_data: str,
+        file_exists,
+        recording_file_path: Path,
+        serialized_recording: str,
+    ):
+        """Runs on a worker thread, so it must not touch the game state
+
+        - Returns the error from writing the recording (or None), because the save itself has still been written
+        """
+        if not file_exists:
+            json_file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Ensures that if we aren't expecting the file to already exist, we don't overwrite it
+        mode = "w" if file_exists else "x"
+
+        try:
+            with open(json_file_path, mode) as json_file:
+                json_file.write(serialized_game_data)
+        except FileExistsError:
+            error_message = f"Attempted to write new save to {json_file_path}, but it already exists"
+            raise RuntimeError(error_message)
+
+        # The recording is rewritten with every action so far each time, so it can always be overwritten
+        try:
+            recording_file_path.parent.mkdir(parents=True, exist_ok=True)
+            recording_file_path.write_text(serialized_recording)
+        except OSError as error:
+            return error
+        return None
+
+    def on_save_finished(self, recording_error: OSError | None):
+        self.save_in_progress = False
+        self.save_file_exists = True
+        self.data.is_saved_to_disk = True
+        print("Successfuly saved game to disk")
+        if recording_error:
+            print(
+                f"Error: Failed to save the recording of this game: {recording_error}"
+            )
+        if self.save_requested_again:
+            self.save_requested_again = False
+            self.save_to_disk()
+
+    def on_save_failed(self, exception: BaseException):
+        self.save_in_progress = False
+        self.save_requested_again = False
+        # The changes in the failed save still need writing
+        self.has_unsaved_changes = True
+        if isinstance(exception, RuntimeError):
+            raise exception
+
+        print(f"Error: Failed to save this game session: {exception}")
+        self.game_save_exception = exception
+        self.data.is_saved_to_disk = False
+
+
+class RemoteGameManager(SavedGameManager):
+    """A game hosted by a game server, which holds the authoritative copy of it
+
+    - Changes are sent to the server as actions, and only show up once the server sends back a patch
+    - Nothing is saved locally, because the server owns the game
+    """
+
+    def __init__(
+        self,
+        session: Game,
+        data: SavedGameData,
+        client: NetworkClient,
+        replica: StateReplica,
+    ) -> None:
+        super().__init__(session, data)
+        self.client = client
+        # The state that the server has sent us, which patches are applied to
+        self.replica = replica
+
+    def send_action(self, action: Action):
+        self.client.send({"type": "action", "action": action.model_dump(mode="json")})
+
+    def add_player(self, player: Player):
+        # Other players may add players before this reaches the server, so let the server pick the default name
+        is_default_name = player.nickname == self.data.get_next_default_player_name()
+        self.send_action(
+            AddPlayer(nickname=None if is_default_name else player.nickname)
+        )
+
+    def set_player_token(self, player: Player, token: Token):
+        self.send_action(
+            SetPlayerToken(player_index=self.player_index(player), token=token)
+        )
+
+    def perform_action(self, action: Action):
+        self.send_action(action)
+
+    def end_auction(self):
+        # The server keeps time for networked auctions, and ends them itself
+        pass
+
+    def apply_state_message(self, payload: bytes):
+        new_data = read_state_message(self.replica, payload)
+        if not new_data:
+            print("RemoteGameManager: Resyncing with the server")
+            self.client.send({"type": "resync"})
+            return
+        self.update_from(new_data)
+
+    def update_from(self, new_data: SavedGameData):
+        """Brings our copy of the game in line with the server's, through the normal methods so that events are emitted
+
+        - The existing Player objects are kept, because the UI keeps track of players by their identity
+        """
+        players = self.data.players
+        # Players are only ever added to or removed from the end of the list
+        while len(players) > len(new_data.players):
+            removed_player = players.pop()
+            self.used_tokens.discard(removed_player.token)  # type: ignore
+            self.events.emit(GameEvent.PLAYER_REMOVED, removed_player)
+            self.on_state_changed()
+        for player, new_player in zip(players, new_data.players):
+            if new_player.token and new_player.token != player.token:
+                super().set_player_token(player, new_player.token)
+            player.position = new_player.position
+        for new_player in new_data.players[len(players) :]:
+            super().add_player(new_player)
+        for player, new_player in zip(players, new_data.players):
+            player.cash = new_player.cash
+        self.data.houses_in_bank = new_data.houses_in_bank
+        self.data.hotels_in_bank = new_data.hotels_in_bank
+        self.update_properties_from(new_data)
+        if self.data.auction != new_data.auction:
+            self.data.auction = new_data.auction
+            self.on_auction_changed(new_data.auction)
+            self.on_state_changed()
+
+    def update_properties_from(self, new_data: SavedGameData):
+        if self.data.properties == new_data.properties:
+            return
+        self.data.properties = new_data.properties
+        # Emits PROPERTY_CHANGED for every space that's owned (or was), which is passed on by on_property_changed
+        get_rules(self.data).rebuild()
+        self.on_state_changed()
+
+    def save_to_disk(self):
+        pass
+
+    def save_before_exit(self):
+        pass
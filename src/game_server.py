@@ -0,0 +1,320 @@
+"""An authoritative server for networked games
+
+Run it with `python src/game_server.py`, then start the game with `--server localhost`
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+from datetime import datetime
+
+from pydantic import ValidationError
+
+from actions import (
+    Action,
+    ActionError,
+    AddPlayer,
+    EndAuction,
+    TradeProperties,
+    parse_action,
+)
+from auction import AuctionClock
+from data_storage import SavedGameData
+from protocol import (
+    DEFAULT_PORT,
+    ProtocolError,
+    decode_message,
+    encode_frame,
+    encode_message,
+    read_frame,
+)
+from spectators import SpectatorFanout
+from state_sync import StateBroadcaster
+
+
+class ClientConnection:
+    def __init__(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.room: GameRoom | None = None
+        self.is_spectator = False
+        # The players that this client added to its room, which are the only ones it can take actions for
+        self.player_indexes: set[int] = set()
+
+    def send(self, message: dict):
+        self.send_frame(encode_message(message))
+
+    def send_frame(self, frame: bytes):
+        # Never waits: a slow client's data is buffered rather than holding up everyone else
+        if not self.writer.is_closing():
+            self.writer.write(frame)
+
+    def __str__(self) -> str:
+        host, port = self.writer.get_extra_info("peername")[:2]
+        return f"Client<{host}:{port}>"
+
+
+class GameRoom:
+    """One game, along with the clients that are playing or watching it
+
+    - The room's copy of the game is the authoritative one: clients only change it by sending actions
+    - After each accepted action, the clients are sent a binary patch of what changed (see state_sync.py)
+    - Spectators are sent the same patch afterwards, on a later pass of the event loop (see spectators.py)
+    - The room keeps time for auctions, so they end at the same moment for everyone
+    - Clients can only take actions for the players that they added. A trade is held until a client that
+      controls the recipient accepts it, unless the same client controls both players.
+    """
+
+    def __init__(self, game_id: str, data: SavedGameData) -> None:
+        self.game_id = game_id
+        self.data = data
+        self.broadcaster = StateBroadcaster(data)
+        self.clients: set[ClientConnection] = set()
+        self.spectators = SpectatorFanout(self.broadcaster)
+        self.auction_clock = AuctionClock(
+            lambda: asyncio.get_running_loop().time() * 1000
+        )
+        self.auction_timer: asyncio.TimerHandle | None = None
+        # Trades that are waiting for their recipient to accept or decline them, by trade ID
+        self.trade_proposals: dict[int, TradeProperties] = {}
+        self.next_trade_id = 0
+
+    def close(self):
+        if self.auction_timer:
+            self.auction_timer.cancel()
+
+    def is_empty(self) -> bool:
+        return not self.clients and not self.spectators
+
+    def send_snapshot(self, client: ClientConnection):
+        client.send_frame(encode_frame(self.broadcaster.snapshot()))
+
+    def handle_action(self, client: ClientConnection, serialized_action: dict):
+        if client.is_spectator:
+            client.send({"type": "error", "message": "Spectators can't make changes"})
+            return
+        try:
+            action = parse_action(serialized_action)
+            if isinstance(action, EndAuction):
+                raise ActionError("Auctions end when their time runs out")
+            acting_player_index = action.get_acting_player_index()
+            if (
+                acting_player_index is not None
+                and acting_player_index not in client.player_indexes
+            ):
+                raise ActionError(
+                    f"You aren't in control of player {acting_player_index}"
+                )
+            action.check(self.data)
+        except (ActionError, ValidationError) as error:
+            client.send({"type": "error", "message": str(error)})
+            return
+        if (
+            isinstance(action, TradeProperties)
+            and action.recipient_index not in client.player_indexes
+        ):
+            self.propose_trade(action)
+            return
+        if isinstance(action, AddPlayer):
+            # The new player is added to the end of the list
+            client.player_indexes.add(len(self.data.players))
+        self.apply_action(action)
+
+    def propose_trade(self, trade: TradeProperties):
+        """Holds on to a trade, and tells the clients that control either player about it"""
+        players = (trade.proposer_index, trade.recipient_index)
+        # A new offer between the same players replaces the one that they were waiting on
+        for trade_id, other_trade in list(self.trade_proposals.items()):
+            if (other_trade.proposer_index, other_trade.recipient_index) == players:
+                del self.trade_proposals[trade_id]
+        trade_id = self.next_trade_id
+        self.next_trade_id += 1
+        self.trade_proposals[trade_id] = trade
+        frame = encode_message(
+            {
+                "type": "trade_proposed",
+                "trade_id": trade_id,
+                "action": trade.model_dump(mode="json"),
+            }
+        )
+        for client in self.clients:
+            if not client.player_indexes.isdisjoint(players):
+                client.send_frame(frame)
+
+    def answer_trade(self, client: ClientConnection, trade_id: int, is_accepted: bool):
+        """Applies or throws away a proposed trade, if the client controls its recipient"""
+        trade = self.trade_proposals.get(trade_id)
+        if not trade or trade.recipient_index not in client.player_indexes:
+            client.send(
+                {
+                    "type": "error",
+                    "message": f"There's no trade {trade_id} for you to answer",
+                }
+            )
+            return
+        del self.trade_proposals[trade_id]
+        if not is_accepted:
+            return
+        # The game may have changed since the trade was proposed
+        try:
+            trade.check(self.data)
+        except ActionError as error:
+            client.send({"type": "error", "message": str(error)})
+            return
+        self.apply_action(trade)
+
+    def apply_action(self, action: Action):
+        action.apply(self.data)
+        self.update_auction_timer()
+        state_patch = self.broadcaster.make_patch(self.data)
+        if not state_patch:
+            return
+        frame = encode_frame(state_patch)
+        self.broadcast(frame)
+        # Players get the patch first, and the spectators don't get it until this action has been dealt with
+        asyncio.get_running_loop().call_soon(
+            self.spectators.publish, frame, self.broadcaster.sequence
+        )
+
+    def update_auction_timer(self):
+        bid_key = self.auction_clock.bid_key
+        self.auction_clock.update(self.data.auction)
+        if self.auction_clock.bid_key == bid_key:
+            return
+        if self.auction_timer:
+            self.auction_timer.cancel()
+            self.auction_timer = None
+        if self.auction_clock.is_running():
+            self.auction_timer = asyncio.get_running_loop().call_later(
+                self.auction_clock.remaining_ms() / 1000, self.end_auction
+            )
+
+    def end_auction(self):
+        self.auction_timer = None
+        self.apply_action(EndAuction())
+
+    def broadcast(self, frame: bytes):
+        # Encoded once, then the same bytes are written to every client
+        for client in self.clients:
+            client.send_frame(frame)
+
+
+class GameServer:
+    """Hosts any number of games at once, all on one asyncio event loop"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> None:
+        self.host = host
+        self.port = port
+        self.rooms: dict[str, GameRoom] = {}
+        self.server: asyncio.Server | None = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port
+        )
+        # Find out which port was picked, in case port 0 was requested
+        self.port = self.server.sockets[0].getsockname()[1]
+        print(f"GameServer: Listening on {self.host}:{self.port}")
+
+    async def serve_forever(self):
+        if not self.server:
+            await self.start()
+        assert self.server
+        async with self.server:
+            await self.server.serve_forever()
+
+    def get_room(self, game_id: str) -> GameRoom:
+        """Finds the game with the provided ID, creating it if it doesn't exist yet"""
+        room = self.rooms.get(game_id)
+        if room:
+            return room
+        # Games are identified by when they were started
+        started_at = datetime.fromisoformat(game_id)
+        data = SavedGameData(started_at=started_at, players=[], is_saved_to_disk=False)
+        room = GameRoom(game_id, data)
+        self.rooms[game_id] = room
+        print(f"GameServer: Created room for {data}")
+        return room
+
+    def leave_room(self, client: ClientConnection):
+        room = client.room
+        if not room:
+            return
+        room.clients.discard(client)
+        room.spectators.remove(client.writer)
+        client.room = None
+        client.is_spectator = False
+        client.player_indexes.clear()
+        if room.is_empty():
+            print(f"GameServer: Closing room for {room.data}")
+            room.close()
+            del self.rooms[room.game_id]
+
+    def handle_message(self, client: ClientConnection, message: dict):
+        message_type = message["type"]
+        if message_type in ("join", "spectate"):
+            self.leave_room(client)
+            try:
+                room = self.get_room(str(message.get("game_id")))
+            except ValueError:
+                client.send({"type": "error", "message": "Invalid game ID"})
+                return
+            client.room = room
+            if message_type == "spectate":
+                client.is_spectator = True
+                room.spectators.add(client.writer)
+            else:
+                room.clients.add(client)
+                room.send_snapshot(client)
+        elif not client.room:
+            client.send({"type": "error", "message": "Join a game first"})
+        elif message_type == "action":
+            client.room.handle_action(client, message.get("action") or {})
+        elif message_type in ("accept_trade", "decline_trade"):
+            trade_id = message.get("trade_id")
+            if not isinstance(trade_id, int):
+                raise ProtocolError(f"Invalid trade ID {trade_id!r}")
+            client.room.answer_trade(
+                client, trade_id, is_accepted=message_type == "accept_trade"
+            )
+        elif message_type == "resync" and client.is_spectator:
+            client.room.spectators.resync(client.writer)
+        elif message_type == "resync":
+            client.room.send_snapshot(client)
+        else:
+            raise ProtocolError(f"Unknown message type {message_type!r}")
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        client = ClientConnection(reader, writer)
+        print(f"GameServer: {client} connected")
+        try:
+            while True:
+                self.handle_message(client, decode_message(await read_frame(reader)))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except ProtocolError as error:
+            print(f"GameServer: Disconnecting {client}: {error}")
+        finally:
+            self.leave_room(client)
+            writer.close()
+            print(f"GameServer: {client} disconnected")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hosts networked Monopoly games")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    arguments = parser.parse_args()
+    server = GameServer(arguments.host, arguments.port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
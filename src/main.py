@@ -1,15 +1,27 @@
+from __future__ import annotations
+import time
+
+# Taken before anything else is imported, so that --startup-profile includes the time spent importing
+process_started_at = time.perf_counter()
+
+import argparse
 from datetime import datetime
+from importlib import import_module
 from pathlib import Path
-import pygame
-from data_storage import Player, SavedGameData, Token
-from game_engine import Fonts, Game, Page, Theme
-from pages.title_screen import TitleScreen
-from pages.token_selection import TokenSelection
+from typing import TYPE_CHECKING
+from events import GameEvent
+from game_engine import Fonts, Game, Theme
 
 from pygame import Color
 from pygame.font import Font
 
-pygame.init()
+# Anything that isn't needed for the first frame (e.g. pydantic, which the game data is stored with) is imported
+# the first time that it's used, so that the window opens sooner
+if TYPE_CHECKING:
+    from game_manager import SavedGameManager
+    from network_client import NetworkClient
+    from pages.title_screen import TitleScreen
+    from pages.token_selection import TokenSelection
 
 
 class MonopolyTheme(Theme):
@@ -29,7 +41,7 @@ class MonopolyFonts(Fonts):
         return int(self.base_font_size() * multiplier)
 
     def system_font(self, size_multiplier: float):
-        return Font(None, self.size_miltiplier(size_multiplier))
+        return self.load(None, self.size_miltiplier(size_multiplier))
 
     def title(self) -> Font:
         return self.system_font(4)
@@ -44,76 +56,187 @@ class MonopolyFonts(Fonts):
         return self.system_font(2)
 
 
-class SavedGameManager:
-    def __init__(self, session: Game, data: SavedGameData) -> None:
-        self.game = session
-        self.data = data
-        self.game_save_exception: Exception | None = None
-        self.save_file_exists = False
-
-    def add_player(self, player: Player):
-        if not self.data.get_free_player_slots():
-            raise RuntimeError("Can't add player to a full game")
-        self.data.players.append(player)
-        self.save_to_disk()
-
-    def set_player_token(self, player: Player, token: Token):
-        player.set_token(token)
-        self.save_to_disk()
-
-    def save_to_disk(self):
-        serialized_game_data = self.data.model_dump_json(indent=2)
-        json_file_name_timestamp = self.data.started_at.strftime("%Y-%m-%d %H-%M-%S")
-        json_file_path = Path(
-            "data",
-            "saves",
-            f"{json_file_name_timestamp}.json",
-        )
-
-        if not self.save_file_exists:
-            json_file_path.parent.mkdir(parents=True, exist_ok=True)
+class StartupProfile:
+    """Measures how long each stage of starting up takes, and prints them once the first frame is shown"""
 
-        # Ensures that if we aren't expecting the file to already exist, we don't overwrite it
-        mode = "w" if self.save_file_exists else "x"
+    def __init__(self, started_at: float) -> None:
+        self.started_at = started_at
+        self.last_mark_at = started_at
+        self.stages: list[tuple[str, float]] = []
 
-        try:
-            with open(json_file_path, mode) as json_file:
-                json_file.write(serialized_game_data)
-            self.save_file_exists = True
-            self.data.is_saved_to_disk = True
-            print("Successfuly saved game to disk")
-        except OSError as exception:
-            if isinstance(exception, FileExistsError):
-                error_message = f"Attempted to write new save to {json_file_path}, but it already exists"
-                raise RuntimeError(error_message)
+    def mark(self, stage: str):
+        """Records that a stage has just finished"""
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.last_mark_at))
+        self.last_mark_at = now
 
-            print(f"Error: Failed to save this game session: {exception}")
-            self.game_save_exception = exception
-            self.data.is_saved_to_disk = False
+    def report(self):
+        print("Startup profile:")
+        for stage, duration in self.stages:
+            print(f"  {stage}: {duration * 1000:.1f} ms")
+        print(f"  Total: {(self.last_mark_at - self.started_at) * 1000:.1f} ms")
 
 
 class Monopoly(Game):
     theme: MonopolyTheme
     fonts: MonopolyFonts
 
-    def __init__(self):
-        self.current_game = None
+    def __init__(
+        self,
+        server_address: tuple[str, int] | None = None,
+        startup_profile: StartupProfile | None = None,
+    ):
+        self.current_game: SavedGameManager | None = None
+        # If a server is provided, games are played on it instead of locally
+        self.server_address = server_address
+        self.network_client: NetworkClient | None = None
+        # Only set until the first frame has been shown
+        self.startup_profile = startup_profile
         super().__init__(60, MonopolyTheme(), MonopolyFonts(), "Monopoly", (800, 600))
-        self.title_screen = TitleScreen(self)
-        self.token_selection = TokenSelection(self)
+        if self.startup_profile:
+            self.startup_profile.mark("Initialising pygame and opening the window")
+        # Lets the pages be laid out without measuring their text again
+        self.text_metrics.load(Path("data", "cache", "text_metrics.json"))
+        if self.startup_profile:
+            self.startup_profile.mark("Loading the text metrics cache")
+        # Pages are constructed the first time that they're needed
+        self._title_screen: TitleScreen | None = None
+        self._token_selection: TokenSelection | None = None
+
+    @property
+    def title_screen(self) -> TitleScreen:
+        if not self._title_screen:
+            from pages.title_screen import TitleScreen
+
+            self._title_screen = TitleScreen(self)
+        return self._title_screen
+
+    @property
+    def token_selection(self) -> TokenSelection:
+        if not self._token_selection:
+            from pages.token_selection import TokenSelection
+
+            self._token_selection = TokenSelection(self)
+        return self._token_selection
 
     def get_initial_page(self):
-        return self.title_screen
+        title_screen = self.title_screen
+        if self.startup_profile:
+            self.startup_profile.mark("Building the title screen")
+        return title_screen
+
+    def initialise_game_session(self):
+        # Token selection always comes after the title screen, so build it while the player is reading the title screen
+        self.run_when_idle(lambda: self.token_selection)
+        # Starting a game needs the game data models, which take a while to import
+        self.run_when_idle(lambda: import_module("game_manager"))
+
+    def finalise_game_session(self):
+        if self.current_game:
+            self.current_game.save_before_exit()
+
+    def update_display(self):
+        super().update_display()
+        if self.startup_profile:
+            self.startup_profile.mark("Drawing the first frame")
+            self.startup_profile.report()
+            self.startup_profile = None
+
+    def set_current_game(self, current_game: SavedGameManager):
+        previous_game = self.current_game
+        self.current_game = current_game
+        self.events.emit(
+            GameEvent.CURRENT_GAME_CHANGED, previous_game, self.current_game
+        )
 
     def start_new_game(self):
+        if self.server_address:
+            self.join_network_game(datetime.now().isoformat(timespec="seconds"))
+            return
+        from data_storage import SavedGameData
+        from game_manager import SavedGameManager
+
         new_game = SavedGameData(
             started_at=datetime.now(), players=[], is_saved_to_disk=False
         )
-        self.current_game = SavedGameManager(self, new_game)
+        self.set_current_game(SavedGameManager(self, new_game))
         print(f"Started new game: {self.current_game}")
         self.token_selection.activate()
 
+    def join_network_game(self, game_id: str):
+        """Joins (or creates) a game on the server. The game is shown once the server sends it to us."""
+        if not self.network_client:
+            from network_client import NetworkClient
+
+            assert self.server_address
+            host, port = self.server_address
+            self.network_client = NetworkClient(
+                host, port, self.on_server_message, self.on_server_disconnect
+            )
+            self.network_client.connect()
+            self.tick_tasks.append(self.network_client.process_messages)
+        self.network_client.send({"type": "join", "game_id": game_id})
+
+    def on_server_message(self, message: dict):
+        assert self.network_client
+        message_type = message["type"]
+        if message_type == "state":
+            from game_manager import RemoteGameManager, read_state_message
+            from state_sync import StateReplica
+
+            current_game = self.current_game
+            if isinstance(current_game, RemoteGameManager):
+                current_game.apply_state_message(message["payload"])
+                return
+            # This must be the snapshot of a game that we've just joined
+            replica = StateReplica()
+            game_data = read_state_message(replica, message["payload"])
+            if not game_data:
+                self.network_client.send({"type": "resync"})
+                return
+            remote_game = RemoteGameManager(
+                self, game_data, self.network_client, replica
+            )
+            self.set_current_game(remote_game)
+            print(f"Joined networked game: {remote_game}")
+            self.token_selection.activate()
+        elif message_type == "error":
+            print(f"Server: {message['message']}")
+
+    def on_server_disconnect(self, error: BaseException | None):
+        print(f"Disconnected from the server: {error or 'connection closed'}")
+        if self.network_client:
+            self.tick_tasks.remove(self.network_client.process_messages)
+            self.network_client = None
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="A clone of Monopoly, made with Pygame"
+    )
+    parser.add_argument(
+        "--server",
+        metavar="HOST[:PORT]",
+        help="play games on a game server (see game_server.py) instead of locally",
+    )
+    parser.add_argument(
+        "--startup-profile",
+        action="store_true",
+        help="print how long each stage of starting up took, once the window is shown",
+    )
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    game = Monopoly()
+    arguments = parse_arguments()
+    startup_profile = None
+    if arguments.startup_profile:
+        startup_profile = StartupProfile(process_started_at)
+        startup_profile.mark("Importing modules")
+    server_address = None
+    if arguments.server:
+        from protocol import parse_address
+
+        server_address = parse_address(arguments.server)
+    game = Monopoly(server_address, startup_profile)
     game.game_session()
@@ -0,0 +1,114 @@
+from __future__ import annotations
+import asyncio
+import queue
+import threading
+from typing import Callable
+
+from protocol import ProtocolError, decode_message, encode_message, read_frame
+
+
+class NetworkClient:
+    """A connection to a game server, run on its own thread so that the game loop never waits for the network
+
+    - Messages from the server are queued up by the network thread, then handled on the main thread by
+      `process_messages()`, which should be called once per tick
+    - `send()` can be called from the main thread at any time, and the network thread does the actual writing
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        on_message: Callable[[dict], None],
+        on_disconnect: Callable[[BaseException | None], None] | None = None,
+        max_messages_per_tick: int = 32,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.on_message = on_message
+        self.on_disconnect = on_disconnect
+        self.max_messages_per_tick = max_messages_per_tick
+        # Filled by the network thread, drained by the main thread
+        self._received: queue.SimpleQueue[dict | ConnectionClosed] = queue.SimpleQueue()
+        self._loop = asyncio.new_event_loop()
+        self._outgoing: asyncio.Queue[bytes | None] = asyncio.Queue()
+        self._thread = threading.Thread(
+            target=self._loop.run_until_complete,
+            args=(self.run(),),
+            name="network-client",
+            daemon=True,
+        )
+        self.connected = False
+
+    def connect(self):
+        self._thread.start()
+
+    def send(self, message: dict):
+        self._loop.call_soon_threadsafe(
+            self._outgoing.put_nowait, encode_message(message)
+        )
+
+    def close(self):
+        if self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._outgoing.put_nowait, None)
+
+    def process_messages(self):
+        """Handles the messages that have arrived since the last tick. Must be called on the main thread."""
+        for _ in range(self.max_messages_per_tick):
+            try:
+                message = self._received.get_nowait()
+            except queue.Empty:
+                return
+            if isinstance(message, ConnectionClosed):
+                self.connected = False
+                if self.on_disconnect:
+                    self.on_disconnect(message.error)
+                continue
+            self.on_message(message)
+
+    async def run(self):
+        """Runs on the network thread for as long as the connection is open"""
+        error = None
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        except OSError as connection_error:
+            self._received.put(ConnectionClosed(connection_error))
+            return
+        self.connected = True
+        read_task = asyncio.create_task(self.read_messages(reader))
+        try:
+            while True:
+                get_frame = asyncio.create_task(self._outgoing.get())
+                done, _ = await asyncio.wait(
+                    {get_frame, read_task}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if read_task in done:
+                    get_frame.cancel()
+                    read_task.result()
+                    break
+                frame = get_frame.result()
+                if frame is None:
+                    break
+                writer.write(frame)
+                await writer.drain()
+        except (
+            asyncio.IncompleteReadError,
+            ConnectionError,
+            ProtocolError,
+        ) as exception:
+            error = exception
+        finally:
+            read_task.cancel()
+            writer.close()
+            self._received.put(ConnectionClosed(error))
+
+    async def read_messages(self, reader: asyncio.StreamReader):
+        while True:
+            self._received.put(decode_message(await read_frame(reader)))
+
+
+class ConnectionClosed:
+    """Queued up by the network thread once the connection has ended"""
+
+    def __init__(self, error: BaseException | None) -> None:
+        self.error = error
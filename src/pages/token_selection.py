@@ -2,9 +2,10 @@ from __future__ import annotations
 from copy import copy
 from typing import TYPE_CHECKING, Callable
 
-from components import Button, Container, Header, TextObject
+from components import Button, Container, GridContainer, Header, TextObject
 from data_storage import Player, Token
-from events import GameEvent
+from event_bus import PropagatingEvent
+from events import GameEvent, Subscriptions
 from game_engine import (
     END,
     BelowObject,
@@ -13,27 +14,24 @@ from game_engine import (
     Page,
     Percent,
     Pixels,
+    PixelsPoint,
     PointSpecifier,
     RightOfObject,
 )
 
 if TYPE_CHECKING:
-    from main import Monopoly, SavedGameManager
+    from game_manager import SavedGameManager
+    from main import Monopoly
 
 
 class PlayerListItem(Button):
-    """A clickable entry in the player list"""
+    """A clickable entry in the player list (clicks are handled by the PlayerList)"""
 
     def __init__(self, game: Monopoly, page: TokenSelection, player: Player):
-        super().__init__(
-            game, player.nickname, self.on_click, Container.AutoPlacement(5)
-        )
+        super().__init__(game, player.nickname, None, Container.AutoPlacement(5))
         self.page = page
         self.player = player
 
-    def on_click(self):
-        self.page.show_token_selection_pane(self.player)
-
 
 class PlayerList(Container):
     """A sidebar showing a list of any players that have been added to the game"""
@@ -52,39 +50,63 @@ class PlayerList(Container):
         initial_name = current_game.data.get_next_default_player_name()
         current_game.add_player(Player(nickname=initial_name))
 
-    def update_children(self):
-        current_game = self.game.current_game
-        assert current_game
-        existing_player_items = [
-            child for child in self.list_children() if isinstance(child, PlayerListItem)
-        ]
+    def on_player_item_click(self, item: PlayerListItem, _: PropagatingEvent):
+        self.page.show_token_selection_pane(item.player)
+
+    def on_current_game_changed(
+        self, _: SavedGameManager | None, current_game: SavedGameManager | None
+    ):
+        self.game_subscriptions.remove_all()
+        for item in self.player_items.values():
+            self.remove_child(item)
+        self.player_items.clear()
+        if not current_game:
+            return
         for player in current_game.data.players:
-            if player not in [child.player for child in existing_player_items]:
-                # Add a child for this player, as it aren't in the UI yet
-                print(f"PlayerList: Adding list item for {player}")
-                self.add_children(PlayerListItem(self.game, self.page, player))
-        for child in existing_player_items:
-            if child.player not in current_game.data.players:
-                # Remove this child from the UI, as the corrresponding player doesn't exist anymore
-                print(
-                    f"PlayerList: Removing list item for {child.player} (hint: this shouldn't happen yet)"
-                )
-                self.remove_child(child)
+            self.on_player_added(player)
+        self.game_subscriptions.on(
+            current_game.events, GameEvent.PLAYER_ADDED, self.on_player_added
+        )
+        self.game_subscriptions.on(
+            current_game.events, GameEvent.PLAYER_REMOVED, self.on_player_removed
+        )
+
+    def on_player_added(self, player: Player):
+        print(f"PlayerList: Adding list item for {player}")
+        item = PlayerListItem(self.game, self.page, player)
+        self.player_items[id(player)] = item
+        self.add_children(item)
+
+    def on_player_removed(self, player: Player):
+        print(f"PlayerList: Removing list item for {player}")
+        item = self.player_items.pop(id(player), None)
+        if item:
+            self.remove_child(item)
 
     def __init__(self, game: Monopoly, page: TokenSelection):
         spawn_at = page.get_content_start_point()
         self.page = page
+        # List items for each player, keyed by the ID of the Player object
+        self.player_items: dict[int, PlayerListItem] = {}
+        self.game_subscriptions = Subscriptions()
         super().__init__(
-            game, spawn_at, self.get_size, game.theme.BACKGROUND_ACCENT, padding_top=10
+            game,
+            spawn_at,
+            self.get_size,
+            game.theme.BACKGROUND_ACCENT,
+            padding_top=10,
+            cache_as_bitmap=True,
         )
         self.add_player_button = Button(
             self.game,
             "+ Add player",
             self.add_new_player,
             Container.AutoPlacement(),
-            is_enabled=lambda: self.game.current_game.data.get_free_player_slots() > 0
-            if self.game.current_game
-            else True,
+            is_enabled=lambda: (
+                self.game.current_game.data.get_free_player_slots() > 0
+                if self.game.current_game
+                else True
+            ),
         )
         self.start_game_button = Button(
             self.game,
@@ -94,12 +116,18 @@ class PlayerList(Container):
                 CenterAlignedToObject(self, self.width),
                 Pixels(10, outer_edge=END, position=END),
             ),
-            is_enabled=lambda: self.game.current_game.data.ready_to_start()
-            if self.game.current_game
-            else True,
+            is_enabled=lambda: (
+                self.game.current_game.data.ready_to_start()
+                if self.game.current_game
+                else True
+            ),
         )
         self.add_children(self.add_player_button, self.start_game_button)
-        self.tick_tasks.append(self.update_children)
+        game.event_bus.delegate(
+            self, GameEvent.CLICK, PlayerListItem, self.on_player_item_click
+        )
+        game.events.on(GameEvent.CURRENT_GAME_CHANGED, self.on_current_game_changed)
+        self.on_current_game_changed(None, game.current_game)
 
 
 class TokenSelectionButton(Button):
@@ -112,8 +140,9 @@ class TokenSelectionButton(Button):
         super().__init__(
             token_selection_pane.game,
             token.value.capitalize(),
-            self.on_selection,
-            Container.AutoPlacement(5),
+            None,
+            # The real position is set by the grid that the button is in
+            PixelsPoint(0, 0),
             is_enabled=self.is_enabled,
         )
         self.current_game = current_game
@@ -121,22 +150,10 @@ class TokenSelectionButton(Button):
         self.token = copy(token)
 
     def is_enabled(self):
-        return self.token not in [
-            player.token for player in self.current_game.data.players
-        ]
-
-    def on_selection(self):
-        print(f"Emitting selected {self.token}")
-        self.token_selection_pane.events.emit(GameEvent.TOKEN_SELECTED, self.token)
+        return not self.current_game.is_token_used(self.token)
 
 
-class TokenSelectionButtons(Container):
-    def get_size(self) -> tuple[float, float]:
-        total_height = sum(child.height() for child in self.list_children())
-        widest_child = self.get_widest_child()
-        total_width = widest_child.width() if widest_child else 0
-        return total_width, total_height
-
+class TokenSelectionButtons(GridContainer):
     def __init__(
         self,
         game: Monopoly,
@@ -147,9 +164,22 @@ class TokenSelectionButtons(Container):
     ):
         self.page = page
         self.parent_pane = parent_pane
-        super().__init__(game, spawn_at, self.get_size)
+        super().__init__(
+            game, spawn_at, column_count=1, gap_pixels=(0, 5), padding_top=5
+        )
         self.on_token_selection = on_token_selection
         self.events.on(GameEvent.BEFORE_SPAWN, self.on_spawn)
+        game.event_bus.delegate(
+            self, GameEvent.CLICK, TokenSelectionButton, self.on_token_button_click
+        )
+
+    def on_token_button_click(self, button: TokenSelectionButton, _: PropagatingEvent):
+        if not button.is_enabled():
+            return
+        print(f"Queueing selected {button.token}")
+        self.game.event_queue.post(
+            self.parent_pane.events, GameEvent.TOKEN_SELECTED, button.token
+        )
 
     def on_spawn(self):
         current_game = self.game.current_game
@@ -177,7 +207,12 @@ class TokenSelectionPane(Container):
         self.player = player
         print(player)
         self.page = page
-        super().__init__(game, page.get_main_pane_start_point(), self.get_size)
+        super().__init__(
+            game,
+            page.get_main_pane_start_point(),
+            self.get_size,
+            cache_as_bitmap=True,
+        )
 
         self.heading = TextObject(
             self.game,
@@ -214,6 +249,12 @@ class HintText(TextObject):
     """Displays a hint to the right of the sidebar prompting the user to select a player"""
 
     def __init__(self, game: Monopoly, page: TokenSelection):
+        self.game = game
+        self.content = ""
+        self.game_subscriptions = Subscriptions()
+        # The text is only worked out again when the game state changes
+        game.events.on(GameEvent.CURRENT_GAME_CHANGED, self.on_current_game_changed)
+        self.on_current_game_changed(None, game.current_game)
         super().__init__(
             game,
             self.get_content,
@@ -221,8 +262,28 @@ class HintText(TextObject):
             break_line_at=Percent(1.0),
         )
 
+    def on_current_game_changed(
+        self, _: SavedGameManager | None, current_game: SavedGameManager | None
+    ):
+        self.game_subscriptions.remove_all()
+        if current_game:
+            for event_type in (
+                GameEvent.PLAYER_ADDED,
+                GameEvent.PLAYER_REMOVED,
+                GameEvent.PLAYER_TOKEN_CHANGED,
+            ):
+                self.game_subscriptions.on(
+                    current_game.events, event_type, self.update_content
+                )
+        self.update_content()
+
+    def update_content(self, *_):
+        self.content = self.calculate_content(self.game.current_game)
+
     def get_content(self) -> str:
-        current_game = self.game.current_game
+        return self.content
+
+    def calculate_content(self, current_game: SavedGameManager | None) -> str:
         if not current_game:
             return "Load a saved game or start a new one first!"  # This should never end up being shown in-game
         if not current_game.data.players:
@@ -239,8 +300,14 @@ class TokenSelection(Page["Monopoly"]):
         self.page_header = Header(game)
         self.player_list = PlayerList(game, self)
         self.hint_text = HintText(game, self)
+        self.is_hint_text_shown = True
         self.token_selection_pane: TokenSelectionPane | None = None
+        # Panes that have already been built, keyed by the ID of the Player object, so that they can be shown again
+        self.token_selection_panes: dict[int, TokenSelectionPane] = {}
+        self.game_subscriptions = Subscriptions()
         self.add_objects(self.page_header, self.player_list, self.hint_text)
+        game.events.on(GameEvent.CURRENT_GAME_CHANGED, self.on_current_game_changed)
+        self.on_current_game_changed(None, game.current_game)
 
     def get_main_pane_start_point(self) -> PointSpecifier:
         x = RightOfObject(self.player_list, 10)
@@ -249,13 +316,53 @@ class TokenSelection(Page["Monopoly"]):
 
         return PointSpecifier(x, y)
 
+    def on_current_game_changed(
+        self, _: SavedGameManager | None, current_game: SavedGameManager | None
+    ):
+        # The panes belong to the players of the previous game
+        self.game_subscriptions.remove_all()
+        for pane in list(self.token_selection_panes.values()):
+            self.discard_token_selection_pane(pane)
+        if current_game:
+            self.game_subscriptions.on(
+                current_game.events, GameEvent.PLAYER_REMOVED, self.on_player_removed
+            )
+
+    def on_player_removed(self, player: Player):
+        pane = self.token_selection_panes.get(id(player))
+        if pane:
+            self.discard_token_selection_pane(pane)
+
+    def discard_token_selection_pane(self, pane: TokenSelectionPane):
+        print(f"Discarding {pane}")
+        del self.token_selection_panes[id(pane.player)]
+        if pane is self.token_selection_pane:
+            self.token_selection_pane = None
+            self.remove_object(pane)
+            self.show_hint_text()
+        else:
+            # It isn't on the page, so it just needs to be cleaned up
+            pane.exists = False
+            pane.events.emit(GameEvent.OBJECT_REMOVE)
+
+    def show_hint_text(self):
+        if not self.is_hint_text_shown:
+            self.add_objects(self.hint_text)
+            self.is_hint_text_shown = True
+
     def show_token_selection_pane(self, player: Player):
+        pane = self.token_selection_panes.get(id(player))
+        if pane and pane is self.token_selection_pane:
+            return
         if self.token_selection_pane:
-            print(f"Removing {self.token_selection_pane}")
-            self.remove_object(self.token_selection_pane)
+            print(f"Detaching {self.token_selection_pane}")
+            self.detach_object(self.token_selection_pane)
             self.token_selection_pane = None
-        if self.hint_text:
-            self.remove_object(self.hint_text)
-            self.hint_text = None
-        self.token_selection_pane = TokenSelectionPane(self.game, self, player)
-        self.add_objects(self.token_selection_pane)
+        if self.is_hint_text_shown:
+            self.detach_object(self.hint_text)
+            self.is_hint_text_shown = False
+        if not pane:
+            pane = TokenSelectionPane(self.game, self, player)
+            self.token_selection_panes[id(player)] = pane
+        self.token_selection_pane = pane
+        self.add_objects(pane)
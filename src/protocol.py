@@ -0,0 +1,52 @@
+from __future__ import annotations
+import asyncio
+import json
+import struct
+
+# Every message is sent as a frame: a 4-byte big-endian length, followed by that many bytes of payload
+FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = 1024 * 1024
+DEFAULT_PORT = 8765
+
+
+class ProtocolError(Exception):
+    """Raised when the other end of a connection sends something that doesn't follow the protocol"""
+
+
+def encode_frame(payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    """Reads the next frame's payload. Raises asyncio.IncompleteReadError if the connection closes."""
+    header = await reader.readexactly(FRAME_HEADER.size)
+    (payload_size,) = FRAME_HEADER.unpack(header)
+    if payload_size > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame of {payload_size} bytes is too big")
+    return await reader.readexactly(payload_size)
+
+
+def encode_message(message: dict) -> bytes:
+    """Turns a message into a ready-to-send frame"""
+    return encode_frame(json.dumps(message, separators=(",", ":")).encode())
+
+
+def decode_message(payload: bytes) -> dict:
+    if not payload.startswith(b"{"):
+        # Anything that isn't a JSON object is a binary state message (see state_sync.py)
+        return {"type": "state", "payload": payload}
+    try:
+        message = json.loads(payload)
+    except ValueError as error:
+        raise ProtocolError(f"Message isn't valid JSON: {error}")
+    if not isinstance(message, dict) or "type" not in message:
+        raise ProtocolError("Message must be an object with a type")
+    return message
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    """Splits a "host:port" string, using the default port if there isn't one"""
+    host, _, port = address.rpartition(":")
+    if not host:
+        return address, DEFAULT_PORT
+    return host, int(port)
@@ -0,0 +1,111 @@
+"""Records games as the actions that were applied to them, so that they can be replayed
+
+Replay a recording without opening a window with `python src/replay.py data/replays/<recording>.json`
+"""
+
+from __future__ import annotations
+import argparse
+from bisect import bisect_right
+from datetime import datetime
+from pathlib import Path
+import time
+
+from pydantic import BaseModel
+
+from actions import Action, AnyAction
+from data_storage import SavedGameData
+
+
+class GameRecording(BaseModel):
+    """Everything needed to rebuild a game: when it started (which identifies it), its seed, and its actions"""
+
+    started_at: datetime
+    seed: int
+    actions: list[AnyAction] = []
+
+    @classmethod
+    def for_game(cls, data: SavedGameData) -> GameRecording:
+        """Starts a recording of a game that hasn't had any actions applied to it yet"""
+        return cls(started_at=data.started_at, seed=data.seed)
+
+    def record(self, action: Action):
+        self.actions.append(action)  # type: ignore
+
+    def initial_state(self) -> SavedGameData:
+        return SavedGameData(
+            started_at=self.started_at,
+            seed=self.seed,
+            players=[],
+            is_saved_to_disk=False,
+        )
+
+    def get_file_path(self) -> Path:
+        file_name_timestamp = self.started_at.strftime("%Y-%m-%d %H-%M-%S")
+        return Path("data", "replays", f"{file_name_timestamp}.json")
+
+
+class ReplayPlayer:
+    """Rebuilds a recorded game as it was after any number of actions
+
+    - A copy of the game is kept every `checkpoint_interval` actions, so seeking only replays the actions
+      since the nearest checkpoint before it
+    - Checkpoints are made the first time that the replay gets to them, so seeking forwards also fills them in
+    """
+
+    def __init__(self, recording: GameRecording, checkpoint_interval: int = 50):
+        self.recording = recording
+        self.checkpoint_interval = checkpoint_interval
+        # The action counts that have checkpoints, and the game state at each of them
+        self.checkpoint_positions = [0]
+        self.checkpoints = [recording.initial_state()]
+
+    def get_action_count(self) -> int:
+        return len(self.recording.actions)
+
+    def state_at(self, action_count: int) -> SavedGameData:
+        """Returns a new copy of the game, as it was after the first `action_count` actions"""
+        if not 0 <= action_count <= self.get_action_count():
+            raise IndexError(f"Recording doesn't have {action_count} actions")
+        checkpoint_index = bisect_right(self.checkpoint_positions, action_count) - 1
+        position = self.checkpoint_positions[checkpoint_index]
+        data = self.checkpoints[checkpoint_index].model_copy(deep=True)
+        for action in self.recording.actions[position:action_count]:
+            action.apply(data)
+            position += 1
+            if position % self.checkpoint_interval == 0:
+                self.add_checkpoint(position, data)
+        return data
+
+    def add_checkpoint(self, position: int, data: SavedGameData):
+        if position <= self.checkpoint_positions[-1]:
+            return
+        self.checkpoint_positions.append(position)
+        self.checkpoints.append(data.model_copy(deep=True))
+
+
+def replay_headless(recording: GameRecording) -> SavedGameData:
+    """Replays every action as fast as possible, checking that each one is still allowed
+
+    - Raises an ActionError if an action isn't allowed any more, i.e. if the rules have changed since recording
+    """
+    data = recording.initial_state()
+    for action in recording.actions:
+        action.check(data)
+        action.apply(data)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replays a recorded Monopoly game")
+    parser.add_argument("recording", type=Path)
+    arguments = parser.parse_args()
+    recording = GameRecording.model_validate_json(arguments.recording.read_text())
+    start_time = time.perf_counter()
+    data = replay_headless(recording)
+    elapsed_time = time.perf_counter() - start_time
+    print(f"Replayed {len(recording.actions)} actions in {elapsed_time * 1000:.1f}ms")
+    print(data.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    main()
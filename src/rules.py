@@ -0,0 +1,437 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+import weakref
+
+from board import BOARD_SPACES, SPACE_COUNT, ColorGroup, SpaceType
+from data_storage import Auction, OwnedProperty, Player, SavedGameData
+from events import EventEmitter, GameEvent
+
+if TYPE_CHECKING:
+    from valuation import ValuationService
+
+HOTEL = 5
+# The spaces in each colour group, as a list of indexes and as a bitmask with one bit per space index
+COLOR_GROUP_SPACES: dict[ColorGroup, tuple[int, ...]] = {
+    color_group: tuple(
+        index
+        for index, space in enumerate(BOARD_SPACES)
+        if space.color_group == color_group
+    )
+    for color_group in ColorGroup
+}
+COLOR_GROUP_MASKS = {
+    color_group: sum(1 << index for index in space_indexes)
+    for color_group, space_indexes in COLOR_GROUP_SPACES.items()
+}
+
+
+def unmortgage_cost(space_index: int) -> int:
+    """The mortgage value plus 10% interest, rounded up"""
+    mortgage_value = BOARD_SPACES[space_index].mortgage_value()
+    return mortgage_value + -(-mortgage_value // 10)
+
+
+class RulesEngine:
+    """Answers "is this allowed?" for property actions, without scanning the board
+
+    - Ownership is kept as a bitmask of space indexes for each player, so checking for a monopoly is one AND
+    - Building counts are kept in a list indexed by space, so the even-building rule only looks at one group
+    - Every change to properties has to go through the engine (see the property actions in actions.py), so that
+      its tables stay in step with the game data. Use `get_rules()` to find a game's engine.
+    - The `*_problem()` methods return why an action isn't allowed, or None if it is
+    - Emits PROPERTY_CHANGED with the space index whenever a space's owner, buildings or mortgage change
+    - Emits AUCTION_CHANGED when an auction starts, gets a new highest bid, or ends
+    """
+
+    def __init__(self, data: SavedGameData) -> None:
+        # A weak reference, so that the engine doesn't keep old games alive (see get_rules)
+        self.get_data = weakref.ref(data)
+        self.events = EventEmitter()
+        # Created by get_valuation() the first time that it's needed
+        self.valuation: ValuationService | None = None
+        self.owners: dict[int, int] = {}
+        self.rebuild()
+
+    @property
+    def data(self) -> SavedGameData:
+        data = self.get_data()
+        assert data, "The game has been deleted"
+        return data
+
+    def rebuild(self):
+        """Recalculates every table from the game data, e.g. after it's been replaced by a copy from the server"""
+        previously_owned_spaces = self.owners.keys() - self.data.properties.keys()
+        self.owned_masks: dict[int, int] = {}
+        self.mortgaged_mask = 0
+        self.building_counts = [0] * SPACE_COUNT
+        # Kept in the form that OwnershipLayer and BuildingsLayer want them
+        self.owners: dict[int, int] = {}
+        self.buildings: dict[int, int] = {}
+        for space_index, owned_property in self.data.properties.items():
+            self.index_property(space_index, owned_property)
+        for space_index in previously_owned_spaces:
+            self.events.emit(GameEvent.PROPERTY_CHANGED, space_index)
+
+    def index_property(self, space_index: int, owned_property: OwnedProperty):
+        bit = 1 << space_index
+        owner_index = owned_property.owner_index
+        previous_owner_index = self.owners.get(space_index)
+        if previous_owner_index is not None and previous_owner_index != owner_index:
+            self.owned_masks[previous_owner_index] &= ~bit
+        self.owned_masks[owner_index] = self.owned_masks.get(owner_index, 0) | bit
+        self.owners[space_index] = owner_index
+        if owned_property.is_mortgaged:
+            self.mortgaged_mask |= bit
+        else:
+            self.mortgaged_mask &= ~bit
+        self.building_counts[space_index] = owned_property.building_count
+        if owned_property.building_count:
+            self.buildings[space_index] = owned_property.building_count
+        else:
+            self.buildings.pop(space_index, None)
+        self.events.emit(GameEvent.PROPERTY_CHANGED, space_index)
+
+    def get_owners(self) -> dict[int, int]:
+        return self.owners
+
+    def get_buildings(self) -> dict[int, int]:
+        return self.buildings
+
+    def owner_of(self, space_index: int) -> int | None:
+        return self.owners.get(space_index)
+
+    def owned_spaces(self, player_index: int) -> list[int]:
+        mask = self.owned_masks.get(player_index, 0)
+        space_indexes = []
+        while mask:
+            lowest_bit = mask & -mask
+            space_indexes.append(lowest_bit.bit_length() - 1)
+            mask ^= lowest_bit
+        return space_indexes
+
+    def owns_color_group(self, player_index: int, color_group: ColorGroup) -> bool:
+        group_mask = COLOR_GROUP_MASKS[color_group]
+        return self.owned_masks.get(player_index, 0) & group_mask == group_mask
+
+    def is_mortgaged(self, space_index: int) -> bool:
+        return bool(self.mortgaged_mask >> space_index & 1)
+
+    def group_building_counts(self, color_group: ColorGroup) -> list[int]:
+        return [
+            self.building_counts[index] for index in COLOR_GROUP_SPACES[color_group]
+        ]
+
+    def get_player(self, player_index: int) -> Player | None:
+        players = self.data.players
+        return players[player_index] if 0 <= player_index < len(players) else None
+
+    def is_being_auctioned(self, space_index: int) -> bool:
+        return bool(self.data.auction) and self.data.auction.space_index == space_index  # type: ignore
+
+    def ownership_problem(self, player_index: int, space_index: int) -> str | None:
+        if not self.get_player(player_index):
+            return f"There is no player {player_index}"
+        if not 0 <= space_index < SPACE_COUNT:
+            return f"There is no space {space_index}"
+        if self.is_being_auctioned(space_index):
+            return f"{BOARD_SPACES[space_index]} is being auctioned"
+        if self.owner_of(space_index) != player_index:
+            return f"{BOARD_SPACES[space_index]} doesn't belong to you"
+        return None
+
+    def buy_problem(self, player_index: int, space_index: int) -> str | None:
+        player = self.get_player(player_index)
+        if not player:
+            return f"There is no player {player_index}"
+        if not 0 <= space_index < SPACE_COUNT:
+            return f"There is no space {space_index}"
+        space = BOARD_SPACES[space_index]
+        if not space.is_purchasable():
+            return f"{space} can't be bought"
+        if space_index in self.owners:
+            return f"{space} has already been bought"
+        if self.is_being_auctioned(space_index):
+            return f"{space} is being auctioned"
+        if player.position != space_index:
+            return f"You have to be on {space} to buy it"
+        if player.cash < space.price:  # type: ignore
+            return f"You can't afford {space}"
+        return None
+
+    def build_problem(self, player_index: int, space_index: int) -> str | None:
+        problem = self.ownership_problem(player_index, space_index)
+        if problem:
+            return problem
+        space = BOARD_SPACES[space_index]
+        color_group = space.color_group
+        if space.space_type != SpaceType.PROPERTY or not color_group:
+            return f"You can't build on {space}"
+        if not self.owns_color_group(player_index, color_group):
+            return f"You need every {color_group.value} property to build on {space}"
+        if self.mortgaged_mask & COLOR_GROUP_MASKS[color_group]:
+            return (
+                f"You can't build while any {color_group.value} property is mortgaged"
+            )
+        building_count = self.building_counts[space_index]
+        if building_count == HOTEL:
+            return f"{space} already has a hotel"
+        if building_count > min(self.group_building_counts(color_group)):
+            return f"Build on the other {color_group.value} properties first"
+        if building_count == HOTEL - 1 and not self.data.hotels_in_bank:
+            return "The bank has run out of hotels"
+        if building_count < HOTEL - 1 and not self.data.houses_in_bank:
+            return "The bank has run out of houses"
+        if self.data.players[player_index].cash < space.house_cost:  # type: ignore
+            return f"You can't afford to build on {space}"
+        return None
+
+    def sell_building_problem(self, player_index: int, space_index: int) -> str | None:
+        problem = self.ownership_problem(player_index, space_index)
+        if problem:
+            return problem
+        space = BOARD_SPACES[space_index]
+        building_count = self.building_counts[space_index]
+        if not building_count:
+            return f"There aren't any buildings on {space}"
+        assert space.color_group
+        if building_count < max(self.group_building_counts(space.color_group)):
+            return f"Sell from the other {space.color_group.value} properties first"
+        if building_count == HOTEL and self.data.houses_in_bank < HOTEL - 1:
+            return "The bank doesn't have enough houses to swap for the hotel"
+        return None
+
+    def mortgage_problem(self, player_index: int, space_index: int) -> str | None:
+        problem = self.ownership_problem(player_index, space_index)
+        if problem:
+            return problem
+        space = BOARD_SPACES[space_index]
+        if self.is_mortgaged(space_index):
+            return f"{space} is already mortgaged"
+        if space.color_group and any(self.group_building_counts(space.color_group)):
+            return (
+                f"Sell the buildings on the {space.color_group.value} properties first"
+            )
+        return None
+
+    def unmortgage_problem(self, player_index: int, space_index: int) -> str | None:
+        problem = self.ownership_problem(player_index, space_index)
+        if problem:
+            return problem
+        space = BOARD_SPACES[space_index]
+        if not self.is_mortgaged(space_index):
+            return f"{space} isn't mortgaged"
+        if self.data.players[player_index].cash < unmortgage_cost(space_index):
+            return f"You can't afford to pay off the mortgage on {space}"
+        return None
+
+    def is_tradable(self, space_index: int) -> bool:
+        """Properties can only change hands once every building in their colour group has been sold"""
+        color_group = BOARD_SPACES[space_index].color_group
+        return not color_group or not any(self.group_building_counts(color_group))
+
+    def tradable_spaces(self, player_index: int) -> list[int]:
+        return [
+            space_index
+            for space_index in self.owned_spaces(player_index)
+            if self.is_tradable(space_index)
+        ]
+
+    def trade_problem(
+        self,
+        proposer_index: int,
+        recipient_index: int,
+        offered_spaces: list[int],
+        requested_spaces: list[int],
+        cash: int,
+    ) -> str | None:
+        """Checks a trade, where `cash` is paid by the proposer to the recipient (or the other way if it's negative)"""
+        proposer = self.get_player(proposer_index)
+        recipient = self.get_player(recipient_index)
+        if not proposer or not recipient or proposer is recipient:
+            return "Trades have to be between two different players"
+        if not offered_spaces and not requested_spaces and not cash:
+            return "The trade is empty"
+        if len(set(offered_spaces)) != len(offered_spaces) or len(
+            set(requested_spaces)
+        ) != len(requested_spaces):
+            return "The same space can't be traded twice"
+        for owner_index, space_indexes in (
+            (proposer_index, offered_spaces),
+            (recipient_index, requested_spaces),
+        ):
+            for space_index in space_indexes:
+                if not 0 <= space_index < SPACE_COUNT:
+                    return f"There is no space {space_index}"
+                space = BOARD_SPACES[space_index]
+                if self.is_being_auctioned(space_index):
+                    return f"{space} is being auctioned"
+                if self.owner_of(space_index) != owner_index:
+                    return f"{space} doesn't belong to {self.data.players[owner_index]}"
+                if not self.is_tradable(space_index):
+                    return f"Sell the buildings on the {space.color_group.value} properties first"  # type: ignore
+        if cash > proposer.cash or -cash > recipient.cash:
+            return "There isn't enough cash for the trade"
+        return None
+
+    def start_auction_problem(self, space_index: int) -> str | None:
+        if self.data.auction:
+            return f"{BOARD_SPACES[self.data.auction.space_index]} is already being auctioned"
+        if not 0 <= space_index < SPACE_COUNT:
+            return f"There is no space {space_index}"
+        space = BOARD_SPACES[space_index]
+        if not space.is_purchasable():
+            return f"{space} can't be bought"
+        if space_index in self.owners:
+            return f"{space} has already been bought"
+        return None
+
+    def bid_problem(self, player_index: int, amount: int) -> str | None:
+        auction = self.data.auction
+        if not auction:
+            return "There isn't an auction to bid in"
+        player = self.get_player(player_index)
+        if not player:
+            return f"There is no player {player_index}"
+        if amount <= auction.highest_bid:
+            return f"Bids have to be more than £{auction.highest_bid}"
+        if amount > player.cash:
+            return f"You can't afford to bid £{amount}"
+        return None
+
+    def legal_actions(self, player_index: int) -> list[tuple[str, int]]:
+        """Lists everything that the player can do, as (action type, space index) pairs
+
+        - Only looks at the space the player is on and the spaces that they own
+        """
+        player = self.get_player(player_index)
+        if not player:
+            return []
+        legal_actions = []
+        if not self.buy_problem(player_index, player.position):
+            legal_actions.append(("buy_property", player.position))
+        for space_index in self.owned_spaces(player_index):
+            for action_type, get_problem in (
+                ("build_house", self.build_problem),
+                ("sell_building", self.sell_building_problem),
+                ("mortgage_property", self.mortgage_problem),
+                ("unmortgage_property", self.unmortgage_problem),
+            ):
+                if not get_problem(player_index, space_index):
+                    legal_actions.append((action_type, space_index))
+        return legal_actions
+
+    def buy(self, player_index: int, space_index: int, price: int | None = None):
+        """Gives the space to the player, who pays its printed price unless another price is provided"""
+        if price is None:
+            price = BOARD_SPACES[space_index].price
+        owned_property = OwnedProperty(owner_index=player_index)
+        self.data.properties[space_index] = owned_property
+        self.data.players[player_index].cash -= price  # type: ignore
+        self.index_property(space_index, owned_property)
+
+    def start_auction(self, space_index: int, countdown_ms: int):
+        self.data.auction = Auction(space_index=space_index, countdown_ms=countdown_ms)
+        self.events.emit(GameEvent.AUCTION_CHANGED, self.data.auction)
+
+    def place_bid(self, player_index: int, amount: int):
+        auction = self.data.auction
+        assert auction
+        auction.highest_bid = amount
+        auction.highest_bidder_index = player_index
+        auction.bid_number += 1
+        self.events.emit(GameEvent.AUCTION_CHANGED, auction)
+
+    def end_auction(self):
+        """Sells the property to the highest bidder. If nobody bid, it stays with the bank.
+
+        - The winning bid is dropped if the space has been bought since, or the bidder can't pay any more
+        """
+        auction = self.data.auction
+        assert auction
+        self.data.auction = None
+        bidder = (
+            self.get_player(auction.highest_bidder_index)
+            if auction.highest_bidder_index is not None
+            else None
+        )
+        if (
+            bidder
+            and auction.space_index not in self.owners
+            and bidder.cash >= auction.highest_bid
+        ):
+            self.buy(
+                auction.highest_bidder_index, auction.space_index, auction.highest_bid
+            )
+        self.events.emit(GameEvent.AUCTION_CHANGED, None)
+
+    def build(self, player_index: int, space_index: int):
+        owned_property = self.data.properties[space_index]
+        owned_property.building_count += 1
+        if owned_property.building_count == HOTEL:
+            # The hotel replaces the four houses, which go back to the bank
+            self.data.hotels_in_bank -= 1
+            self.data.houses_in_bank += HOTEL - 1
+        else:
+            self.data.houses_in_bank -= 1
+        self.data.players[player_index].cash -= BOARD_SPACES[space_index].house_cost  # type: ignore
+        self.index_property(space_index, owned_property)
+
+    def sell_building(self, player_index: int, space_index: int):
+        owned_property = self.data.properties[space_index]
+        if owned_property.building_count == HOTEL:
+            self.data.hotels_in_bank += 1
+            self.data.houses_in_bank -= HOTEL - 1
+        else:
+            self.data.houses_in_bank += 1
+        owned_property.building_count -= 1
+        # Buildings are sold back to the bank for half of what they cost
+        self.data.players[player_index].cash += BOARD_SPACES[space_index].house_cost // 2  # type: ignore
+        self.index_property(space_index, owned_property)
+
+    def mortgage(self, player_index: int, space_index: int):
+        owned_property = self.data.properties[space_index]
+        owned_property.is_mortgaged = True
+        self.data.players[player_index].cash += BOARD_SPACES[
+            space_index
+        ].mortgage_value()
+        self.index_property(space_index, owned_property)
+
+    def unmortgage(self, player_index: int, space_index: int):
+        owned_property = self.data.properties[space_index]
+        owned_property.is_mortgaged = False
+        self.data.players[player_index].cash -= unmortgage_cost(space_index)
+        self.index_property(space_index, owned_property)
+
+    def trade(
+        self,
+        proposer_index: int,
+        recipient_index: int,
+        offered_spaces: list[int],
+        requested_spaces: list[int],
+        cash: int,
+    ):
+        for new_owner_index, space_indexes in (
+            (recipient_index, offered_spaces),
+            (proposer_index, requested_spaces),
+        ):
+            for space_index in space_indexes:
+                owned_property = self.data.properties[space_index]
+                owned_property.owner_index = new_owner_index
+                self.index_property(space_index, owned_property)
+        self.data.players[proposer_index].cash -= cash
+        self.data.players[recipient_index].cash += cash
+
+
+# Engines are looked up by the id of their game, and forgotten when the game is garbage collected
+rules_engines: dict[int, RulesEngine] = {}
+
+
+def get_rules(data: SavedGameData) -> RulesEngine:
+    """Returns the rules engine for a game, creating it the first time that it's needed"""
+    engine = rules_engines.get(id(data))
+    if engine and engine.get_data() is data:
+        return engine
+    engine = RulesEngine(data)
+    rules_engines[id(data)] = engine
+    weakref.finalize(data, rules_engines.pop, id(data), None)
+    return engine
@@ -0,0 +1,120 @@
+from __future__ import annotations
+import asyncio
+
+from protocol import encode_frame
+from state_sync import StateBroadcaster
+
+
+class Spectator:
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        # The sequence number of the state that the spectator has been sent up to
+        self.sent_sequence = -1
+        # Set when patches have been skipped, so the spectator needs a snapshot before it can have any more
+        self.needs_snapshot = True
+        # The event loop time that the spectator was last sent a snapshot at
+        self.snapshot_sent_at = float("-inf")
+
+    def buffered_bytes(self) -> int:
+        return self.writer.transport.get_write_buffer_size()
+
+
+class SpectatorFanout:
+    """Sends a game's state to any number of spectators, without getting in the way of the players
+
+    - Each patch is framed once, and the same buffer is handed to every spectator's connection
+    - Writes never wait. If a spectator has more than `max_buffered_bytes` waiting to be sent, it's skipped,
+      and once it has caught up it's sent a fresh snapshot instead of the patches that it missed.
+    - Snapshots are only encoded when a spectator needs one, and are shared by every spectator that does
+    - Snapshots wait until the spectator's buffer is below the limit too, and each spectator gets at most one
+      every `min_snapshot_interval` seconds, so asking for resyncs over and over can't fill up the server's
+      memory. Spectators that are waiting are checked again after that interval.
+    """
+
+    def __init__(
+        self,
+        broadcaster: StateBroadcaster,
+        max_buffered_bytes: int = 256 * 1024,
+        min_snapshot_interval: float = 1.0,
+    ) -> None:
+        self.broadcaster = broadcaster
+        self.max_buffered_bytes = max_buffered_bytes
+        self.min_snapshot_interval = min_snapshot_interval
+        self.spectators: dict[asyncio.StreamWriter, Spectator] = {}
+        # Set while there are spectators waiting for a snapshot that they can't be sent yet
+        self.retry_handle: asyncio.TimerHandle | None = None
+
+    def __len__(self) -> int:
+        return len(self.spectators)
+
+    def add(self, writer: asyncio.StreamWriter):
+        spectator = Spectator(writer)
+        self.spectators[writer] = spectator
+        self.resync(writer)
+
+    def remove(self, writer: asyncio.StreamWriter):
+        self.spectators.pop(writer, None)
+
+    def resync(self, writer: asyncio.StreamWriter):
+        """Sends a snapshot to a spectator that has asked for one, as soon as it can take one"""
+        spectator = self.spectators.get(writer)
+        if spectator:
+            spectator.needs_snapshot = True
+            self.send_pending_snapshots()
+
+    def can_send_snapshot(self, spectator: Spectator) -> bool:
+        if spectator.buffered_bytes() > self.max_buffered_bytes:
+            return False
+        time_since_snapshot = (
+            asyncio.get_running_loop().time() - spectator.snapshot_sent_at
+        )
+        return time_since_snapshot >= self.min_snapshot_interval
+
+    def snapshot_frame(self) -> bytes:
+        return encode_frame(self.broadcaster.snapshot())
+
+    def send_snapshot(self, spectator: Spectator, snapshot: memoryview):
+        spectator.writer.write(snapshot)
+        spectator.sent_sequence = self.broadcaster.sequence
+        spectator.needs_snapshot = False
+        spectator.snapshot_sent_at = asyncio.get_running_loop().time()
+
+    def send_pending_snapshots(self):
+        """Sends a snapshot to every spectator that needs one and can take one, and tries again later for the rest"""
+        snapshot: memoryview | None = None
+        is_anyone_waiting = False
+        for writer, spectator in list(self.spectators.items()):
+            if not spectator.needs_snapshot:
+                continue
+            if writer.is_closing():
+                self.remove(writer)
+                continue
+            if not self.can_send_snapshot(spectator):
+                is_anyone_waiting = True
+                continue
+            if snapshot is None:
+                snapshot = memoryview(self.snapshot_frame())
+            self.send_snapshot(spectator, snapshot)
+        if is_anyone_waiting and not self.retry_handle:
+            self.retry_handle = asyncio.get_running_loop().call_later(
+                self.min_snapshot_interval, self.retry_pending_snapshots
+            )
+
+    def retry_pending_snapshots(self):
+        self.retry_handle = None
+        self.send_pending_snapshots()
+
+    def publish(self, patch_frame: bytes, sequence: int):
+        """Sends a framed patch (with the provided sequence number) to every spectator that can keep up"""
+        patch = memoryview(patch_frame)
+        for writer, spectator in list(self.spectators.items()):
+            if writer.is_closing():
+                self.remove(writer)
+                continue
+            if spectator.buffered_bytes() > self.max_buffered_bytes:
+                spectator.needs_snapshot = True
+            elif not spectator.needs_snapshot and sequence > spectator.sent_sequence:
+                # Snapshots already include any patches that were made before they were sent
+                writer.write(patch)
+                spectator.sent_sequence = sequence
+        self.send_pending_snapshots()
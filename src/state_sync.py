@@ -0,0 +1,283 @@
+from __future__ import annotations
+import struct
+from typing import Any
+
+from data_storage import SavedGameData
+
+# A game state flattened into scalar values keyed by their path, e.g. "players.0.token".
+# Lists also have a "<path>.#" entry holding their length, so that empty lists survive the round trip.
+FlatState = dict[str, Any]
+
+# Every state message starts with its kind, its sequence number and how many entries follow
+STATE_SNAPSHOT = 1
+STATE_PATCH = 2
+STATE_HEADER = struct.Struct(">BIH")
+
+# Each entry is an operation followed by its data:
+# - DEFINE_KEY gives the next key ID to a key (sent as a string), so that later entries can refer to it by number
+# - SET is a key ID followed by a tagged value
+# - DELETE is a key ID
+DEFINE_KEY = 0
+SET = 1
+DELETE = 2
+NONE_TAG = 0
+FALSE_TAG = 1
+TRUE_TAG = 2
+INT_TAG = 3
+FLOAT_TAG = 4
+STRING_TAG = 5
+FLOAT = struct.Struct(">d")
+
+
+class StateSyncError(Exception):
+    """Raised when a state message can't be decoded"""
+
+
+def flatten_state(value: Any, path: str = "", flat_state: FlatState | None = None):
+    """Flattens JSON-compatible data (e.g. the output of `model_dump(mode="json")`) into a FlatState"""
+    if flat_state is None:
+        flat_state = {}
+    prefix = f"{path}." if path else ""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flatten_state(item, prefix + key, flat_state)
+    elif isinstance(value, list):
+        flat_state[prefix + "#"] = len(value)
+        for index, item in enumerate(value):
+            flatten_state(item, prefix + str(index), flat_state)
+    else:
+        flat_state[path] = value
+    return flat_state
+
+
+def unflatten_state(flat_state: FlatState) -> Any:
+    """Turns a FlatState back into nested dicts and lists"""
+    root: dict = {}
+    for path, value in flat_state.items():
+        parts = path.split(".")
+        container = root
+        for part in parts[:-1]:
+            container = container.setdefault(part, {})
+        container[parts[-1]] = value
+    return _convert_lists(root)
+
+
+def _convert_lists(value: Any) -> Any:
+    # Lists are built up as dicts keyed by index (plus their length), so turn them back into lists
+    if not isinstance(value, dict):
+        return value
+    if "#" in value:
+        return [_convert_lists(value.get(str(index))) for index in range(value["#"])]
+    return {key: _convert_lists(item) for key, item in value.items()}
+
+
+def flatten_game(data: SavedGameData) -> FlatState:
+    return flatten_state(data.model_dump(mode="json"))
+
+
+def diff_states(
+    old_state: FlatState, new_state: FlatState
+) -> tuple[FlatState, list[str]]:
+    """Returns the entries that were added or changed, and the keys that were removed"""
+    changed = {
+        key: value
+        for key, value in new_state.items()
+        if key not in old_state or old_state[key] != value
+        # True == 1 in Python, but they're different values in the game state
+        or type(old_state[key]) is not type(value)
+    }
+    removed = [key for key in old_state if key not in new_state]
+    return changed, removed
+
+
+def write_varint(buffer: bytearray, number: int):
+    """Writes a non-negative integer using 7 bits per byte"""
+    while number >= 0x80:
+        buffer.append((number & 0x7F) | 0x80)
+        number >>= 7
+    buffer.append(number)
+
+
+def read_varint(payload: memoryview, offset: int) -> tuple[int, int]:
+    number = 0
+    shift = 0
+    while True:
+        if offset >= len(payload):
+            raise StateSyncError("Truncated number")
+        byte = payload[offset]
+        offset += 1
+        number |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return number, offset
+        shift += 7
+
+
+def write_string(buffer: bytearray, text: str):
+    encoded_text = text.encode()
+    write_varint(buffer, len(encoded_text))
+    buffer += encoded_text
+
+
+def read_string(payload: memoryview, offset: int) -> tuple[str, int]:
+    length, offset = read_varint(payload, offset)
+    if offset + length > len(payload):
+        raise StateSyncError("Truncated string")
+    return bytes(payload[offset : offset + length]).decode(), offset + length
+
+
+def write_value(buffer: bytearray, value: Any):
+    if value is None:
+        buffer.append(NONE_TAG)
+    elif value is True:
+        buffer.append(TRUE_TAG)
+    elif value is False:
+        buffer.append(FALSE_TAG)
+    elif isinstance(value, int):
+        buffer.append(INT_TAG)
+        # Zigzag encoding, so that small negative numbers stay small
+        write_varint(buffer, value * 2 if value >= 0 else -value * 2 - 1)
+    elif isinstance(value, float):
+        buffer.append(FLOAT_TAG)
+        buffer += FLOAT.pack(value)
+    elif isinstance(value, str):
+        buffer.append(STRING_TAG)
+        write_string(buffer, value)
+    else:
+        raise TypeError(f"Can't encode {value!r} in a state message")
+
+
+def read_value(payload: memoryview, offset: int) -> tuple[Any, int]:
+    if offset >= len(payload):
+        raise StateSyncError("Truncated value")
+    tag = payload[offset]
+    offset += 1
+    if tag == NONE_TAG:
+        return None, offset
+    if tag == TRUE_TAG:
+        return True, offset
+    if tag == FALSE_TAG:
+        return False, offset
+    if tag == INT_TAG:
+        zigzag, offset = read_varint(payload, offset)
+        return (zigzag >> 1) ^ -(zigzag & 1), offset
+    if tag == FLOAT_TAG:
+        (value,) = FLOAT.unpack_from(payload, offset)
+        return value, offset + FLOAT.size
+    if tag == STRING_TAG:
+        return read_string(payload, offset)
+    raise StateSyncError(f"Unknown value tag {tag}")
+
+
+class StateBroadcaster:
+    """Remembers the state that clients were last sent, and encodes each change as a patch against it
+
+    - Used on the server, with one broadcaster per game, so each message is encoded once for every client
+    - Each patch has the next sequence number, so clients can tell if they've missed one
+    - Keys are only sent as text the first time they're used; snapshots define every key again, so that
+      clients who join later can understand the patches that follow
+    """
+
+    def __init__(self, data: SavedGameData) -> None:
+        self.sent_state = flatten_game(data)
+        self.sequence = 0
+        self.key_ids: dict[str, int] = {}
+        for key in self.sent_state:
+            self.key_ids[key] = len(self.key_ids)
+
+    def snapshot(self) -> bytes:
+        buffer = bytearray(
+            STATE_HEADER.pack(
+                STATE_SNAPSHOT,
+                self.sequence,
+                len(self.key_ids) + len(self.sent_state),
+            )
+        )
+        for key in self.key_ids:
+            buffer.append(DEFINE_KEY)
+            write_string(buffer, key)
+        self.write_entries(buffer, self.sent_state, [])
+        return bytes(buffer)
+
+    def make_patch(self, data: SavedGameData) -> bytes | None:
+        """Returns a patch from the last state to the current one, or None if nothing has changed"""
+        new_state = flatten_game(data)
+        changed, removed = diff_states(self.sent_state, new_state)
+        if not changed and not removed:
+            return None
+        self.sent_state = new_state
+        self.sequence += 1
+        new_keys = [key for key in changed if key not in self.key_ids]
+        entry_count = len(new_keys) + len(changed) + len(removed)
+        buffer = bytearray(STATE_HEADER.pack(STATE_PATCH, self.sequence, entry_count))
+        for key in new_keys:
+            self.key_ids[key] = len(self.key_ids)
+            buffer.append(DEFINE_KEY)
+            write_string(buffer, key)
+        self.write_entries(buffer, changed, removed)
+        return bytes(buffer)
+
+    def write_entries(self, buffer: bytearray, changed: FlatState, removed: list[str]):
+        for key, value in changed.items():
+            buffer.append(SET)
+            write_varint(buffer, self.key_ids[key])
+            write_value(buffer, value)
+        for key in removed:
+            buffer.append(DELETE)
+            write_varint(buffer, self.key_ids[key])
+
+
+class StateReplica:
+    """A client's copy of a game's state, kept up to date by applying snapshots and patches"""
+
+    def __init__(self) -> None:
+        self.state: FlatState = {}
+        self.keys: list[str] = []
+        # None until the first snapshot has arrived
+        self.sequence: int | None = None
+
+    def reset(self):
+        """Forgets the state, e.g. after a message that was only partly applied, so that only a snapshot is accepted"""
+        self.state = {}
+        self.keys = []
+        self.sequence = None
+
+    def apply(self, payload: bytes) -> bool:
+        """Applies a state message, returning False if a patch was missed and a resync is needed"""
+        view = memoryview(payload)
+        if len(view) < STATE_HEADER.size:
+            raise StateSyncError("Truncated header")
+        kind, sequence, entry_count = STATE_HEADER.unpack_from(view)
+        if kind == STATE_SNAPSHOT:
+            self.state = {}
+            self.keys = []
+        elif kind == STATE_PATCH:
+            if self.sequence is None or sequence != self.sequence + 1:
+                return False
+        else:
+            raise StateSyncError(f"Unknown state message kind {kind}")
+
+        offset = STATE_HEADER.size
+        for _ in range(entry_count):
+            if offset >= len(view):
+                raise StateSyncError("Truncated entry")
+            operation = view[offset]
+            offset += 1
+            if operation == DEFINE_KEY:
+                key, offset = read_string(view, offset)
+                self.keys.append(key)
+                continue
+            key_id, offset = read_varint(view, offset)
+            if key_id >= len(self.keys):
+                raise StateSyncError(f"Unknown key ID {key_id}")
+            key = self.keys[key_id]
+            if operation == SET:
+                self.state[key], offset = read_value(view, offset)
+            elif operation == DELETE:
+                self.state.pop(key, None)
+            else:
+                raise StateSyncError(f"Unknown operation {operation}")
+        self.sequence = sequence
+        return True
+
+    def to_game_data(self) -> SavedGameData:
+        return SavedGameData.model_validate(unflatten_state(self.state))
@@ -0,0 +1,157 @@
+from __future__ import annotations
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from enum import Enum
+import queue
+from typing import Any, Callable
+
+
+class WorkerKind(Enum):
+    """The kind of worker pool that a task should run in"""
+
+    # Best for I/O (saves, file scans) and anything that releases the GIL
+    THREAD = "thread"
+    # Best for pure-Python CPU work (e.g. AI moves). Functions and arguments must be picklable.
+    PROCESS = "process"
+
+
+class Task:
+    """A unit of work running in a worker pool, whose result is delivered back on the main thread"""
+
+    def __init__(
+        self,
+        owner: object | None,
+        on_done: Callable[[Any], None] | None,
+        on_error: Callable[[BaseException], None] | None,
+    ) -> None:
+        # The object (usually a Page) that the task belongs to, used for bulk cancellation
+        self.owner = owner
+        self.on_done = on_done
+        self.on_error = on_error
+        self.future: Future | None = None
+        self.cancelled = False
+
+    def cancel(self):
+        """Stops the task's callbacks from being run. The task itself is stopped too if it hasn't started yet."""
+        self.cancelled = True
+        if self.future:
+            self.future.cancel()
+
+    def is_finished(self) -> bool:
+        return self.future is not None and self.future.done()
+
+
+class TaskScheduler:
+    """Runs work off the main thread, and hands the results back to the game loop
+
+    - Worker pools are only created once they're first needed
+    - Results are queued up by the workers, then delivered by `process_completions()`, which runs on the main thread
+    - Tasks must never call pygame: anything involving the display or event queue has to happen in the callbacks
+    """
+
+    def __init__(
+        self,
+        max_thread_workers: int = 4,
+        max_process_workers: int | None = None,
+        max_completions_per_tick: int = 16,
+    ) -> None:
+        self.max_thread_workers = max_thread_workers
+        self.max_process_workers = max_process_workers
+        # Limits how long a single tick can spend running completion callbacks
+        self.max_completions_per_tick = max_completions_per_tick
+        self._thread_pool: ThreadPoolExecutor | None = None
+        self._process_pool: ProcessPoolExecutor | None = None
+        # Filled by worker threads, drained by the main thread
+        self._completed: queue.SimpleQueue[Task] = queue.SimpleQueue()
+        self._pending: set[Task] = set()
+
+    def get_pool(self, kind: WorkerKind) -> Executor:
+        if kind == WorkerKind.PROCESS:
+            if not self._process_pool:
+                self._process_pool = ProcessPoolExecutor(self.max_process_workers)
+            return self._process_pool
+        if not self._thread_pool:
+            self._thread_pool = ThreadPoolExecutor(
+                self.max_thread_workers, thread_name_prefix="game-worker"
+            )
+        return self._thread_pool
+
+    def submit(
+        self,
+        function: Callable[..., Any],
+        *args,
+        kind: WorkerKind = WorkerKind.THREAD,
+        owner: object | None = None,
+        on_done: Callable[[Any], None] | None = None,
+        on_error: Callable[[BaseException], None] | None = None,
+    ) -> Task:
+        """Runs the function in a worker pool. The callbacks will be called on the main thread once it finishes."""
+        task = Task(owner, on_done, on_error)
+        self._pending.add(task)
+        task.future = self.get_pool(kind).submit(function, *args)
+        # This runs on whichever thread completes the future, so it must only touch the queue
+        task.future.add_done_callback(lambda _: self._completed.put(task))
+        return task
+
+    def process_completions(self):
+        """Runs the callbacks for tasks that have finished since the last tick. Must be called on the main thread."""
+        for _ in range(self.max_completions_per_tick):
+            try:
+                task = self._completed.get_nowait()
+            except queue.Empty:
+                return
+            self._pending.discard(task)
+            self.deliver_result(task)
+
+    def wait_for(self, task: Task):
+        """Blocks until the task has finished, then runs its callbacks straight away. Must be called on the main thread.
+
+        - Does nothing if the task's callbacks have already been run, or it has been cancelled
+        """
+        if task not in self._pending:
+            return
+        assert task.future
+        wait([task.future])
+        self._pending.discard(task)
+        self.deliver_result(task)
+        # Its completion is still queued up, so stop it from being delivered again
+        task.cancelled = True
+
+    def deliver_result(self, task: Task):
+        assert task.future
+        if task.cancelled or task.future.cancelled():
+            return
+        exception = task.future.exception()
+        if exception is None:
+            if task.on_done:
+                task.on_done(task.future.result())
+            return
+        if task.on_error:
+            task.on_error(exception)
+        else:
+            print(f"TaskScheduler: Background task failed: {exception!r}")
+
+    def cancel_owned_by(self, owner: object):
+        """Cancels every unfinished task that belongs to the provided owner"""
+        for task in list(self._pending):
+            if task.owner is owner:
+                task.cancel()
+                self._pending.discard(task)
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def shutdown(self):
+        for task in self._pending:
+            task.cancel()
+        self._pending.clear()
+        for pool in (self._thread_pool, self._process_pool):
+            if pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._thread_pool = None
+        self._process_pool = None
@@ -0,0 +1,349 @@
+"""Finds trades between two players that are worth making, without holding up the game loop"""
+
+from __future__ import annotations
+from functools import partial
+import heapq
+import time
+from typing import Callable
+
+from actions import TradeProperties
+from board import BOARD_SPACES, ColorGroup
+from data_storage import SavedGameData
+from rules import COLOR_GROUP_MASKS, COLOR_GROUP_SPACES, get_rules
+from task_scheduler import Task, TaskScheduler, WorkerKind
+from valuation import STATION_SPACES, UTILITY_SPACES, get_valuation
+
+STATION_MASK = sum(1 << index for index in STATION_SPACES)
+UTILITY_MASK = sum(1 << index for index in UTILITY_SPACES)
+# How much more a whole colour group is worth than its properties on their own, judged by the rent that it
+# earns once it has three houses on each property (which is when building starts to pay off)
+COLOR_GROUP_BONUSES = {
+    color_group: sum(BOARD_SPACES[index].rents[3] for index in space_indexes)
+    for color_group, space_indexes in COLOR_GROUP_SPACES.items()
+}
+# The same for owning several stations or utilities, indexed by how many are owned
+STATION_BONUSES = [
+    count * BOARD_SPACES[STATION_SPACES[0]].rents[max(count - 1, 0)] - count * 25
+    for count in range(len(STATION_SPACES) + 1)
+]
+# 7 is the most likely total of two dice
+UTILITY_BONUSES = [0, 0, (10 - 4) * 7 * 2]
+# Cash amounts are rounded to this, so that offers look like something a person would make
+CASH_STEP = 10
+
+
+class OutOfTime(Exception):
+    """Raised inside a TradeSearch to unwind it once the time budget has run out"""
+
+
+def set_bonus(owned_mask: int) -> int:
+    """How much the sets within the owned spaces are worth, on top of the spaces themselves"""
+    bonus = 0
+    for color_group, group_mask in COLOR_GROUP_MASKS.items():
+        if owned_mask & group_mask == group_mask:
+            bonus += COLOR_GROUP_BONUSES[color_group]
+    bonus += STATION_BONUSES[(owned_mask & STATION_MASK).bit_count()]
+    bonus += UTILITY_BONUSES[(owned_mask & UTILITY_MASK).bit_count()]
+    return bonus
+
+
+def get_set_of(space_index: int) -> ColorGroup | str:
+    space = BOARD_SPACES[space_index]
+    return space.color_group or space.space_type.value
+
+
+class TradeSuggestion:
+    """A trade that the search found, along with how much each player would gain from it"""
+
+    def __init__(
+        self, action: TradeProperties, proposer_gain: int, recipient_gain: int
+    ) -> None:
+        self.action = action
+        self.proposer_gain = proposer_gain
+        self.recipient_gain = recipient_gain
+
+    def __repr__(self) -> str:
+        return f"TradeSuggestion<{self.action!r}, gains {self.proposer_gain}/{self.recipient_gain}>"
+
+
+class TradeSnapshot:
+    """Everything that the search needs to know about the two players, copied so that it can run on a worker
+
+    - Only contains plain numbers and lists, so it can also be sent to a worker process
+    """
+
+    def __init__(
+        self, data: SavedGameData, proposer_index: int, recipient_index: int
+    ) -> None:
+        rules = get_rules(data)
+        valuation = get_valuation(data)
+        self.proposer_index = proposer_index
+        self.recipient_index = recipient_index
+        self.proposer_mask = rules.owned_masks.get(proposer_index, 0)
+        self.recipient_mask = rules.owned_masks.get(recipient_index, 0)
+        self.proposer_cash = data.players[proposer_index].cash
+        self.recipient_cash = data.players[recipient_index].cash
+        # (space index, True if the proposer is giving it away) for every space that could change hands
+        self.items = [
+            (space_index, True) for space_index in rules.tradable_spaces(proposer_index)
+        ] + [
+            (space_index, False)
+            for space_index in rules.tradable_spaces(recipient_index)
+        ]
+        # What each space is worth to whoever owns it (see ValuationService), e.g. nothing if it's mortgaged
+        self.worths = {
+            space_index: valuation.contributions[space_index][1]
+            for space_index, _ in self.items
+        }
+
+
+class TradeSearch:
+    """Looks for the trades between two players that create the most value, using branch and bound
+
+    - A trade's surplus is how much more the sets are worth afterwards, across both players. Cash and the
+      spaces' own values just move between the players, so they don't change the surplus.
+    - Cash is then added so that the surplus is split evenly, which makes every suggestion a fair one
+    - Branches are pruned when even completing every set that their remaining spaces belong to couldn't
+      beat the worst of the best trades found so far
+    - Stops once the time budget runs out, returning the best trades found up until then
+    """
+
+    def __init__(
+        self,
+        snapshot: TradeSnapshot,
+        time_budget: float = 0.1,
+        max_bundle_size: int = 3,
+        max_results: int = 5,
+        required_spaces: tuple[int, ...] = (),
+    ) -> None:
+        self.snapshot = snapshot
+        self.time_budget = time_budget
+        self.max_bundle_size = max_bundle_size
+        self.max_results = max_results
+        # Spaces that have to be part of the trade, e.g. the ones that a player asked for in their own offer
+        self.required_spaces = required_spaces
+        # A min-heap of (surplus, -size, tiebreaker, offered spaces, requested spaces), so the worst result is first.
+        # Smaller trades win ties.
+        self.results: list[tuple[int, int, int, tuple[int, ...], tuple[int, ...]]] = []
+        self.deadline = 0.0
+        self.nodes_visited = 0
+        self.base_bonus = set_bonus(snapshot.proposer_mask) + set_bonus(
+            snapshot.recipient_mask
+        )
+        self.items = self.order_items()
+        self.remaining_potentials = self.get_remaining_potentials()
+
+    def order_items(self) -> list[tuple[int, bool]]:
+        """Puts the spaces that could complete a set for the other player first, so good trades are found early"""
+        snapshot = self.snapshot
+
+        def completes_a_set(item: tuple[int, bool]) -> bool:
+            space_index, is_offered = item
+            receiver_mask = (
+                snapshot.recipient_mask if is_offered else snapshot.proposer_mask
+            )
+            color_group = BOARD_SPACES[space_index].color_group
+            return bool(color_group and receiver_mask & COLOR_GROUP_MASKS[color_group])
+
+        optional_items = [
+            item for item in snapshot.items if item[0] not in self.required_spaces
+        ]
+        return sorted(optional_items, key=completes_a_set, reverse=True)
+
+    def get_remaining_potentials(self) -> list[int]:
+        """The most that the surplus could grow by from each item onwards: every set that they touch being completed"""
+        potentials = [0] * (len(self.items) + 1)
+        seen_sets = set()
+        for index in range(len(self.items) - 1, -1, -1):
+            potential = potentials[index + 1]
+            set_of_space = get_set_of(self.items[index][0])
+            if set_of_space not in seen_sets:
+                seen_sets.add(set_of_space)
+                if isinstance(set_of_space, ColorGroup):
+                    potential += COLOR_GROUP_BONUSES[set_of_space]
+                else:
+                    potential += max(STATION_BONUSES[-1], UTILITY_BONUSES[-1])
+            potentials[index] = potential
+        return potentials
+
+    def run(self) -> list[TradeSuggestion]:
+        """Returns the best trades found (best first), which might be none"""
+        self.deadline = time.perf_counter() + self.time_budget
+        offered = [
+            space_index
+            for space_index, is_offered in self.snapshot.items
+            if is_offered and space_index in self.required_spaces
+        ]
+        requested = [
+            space_index
+            for space_index, is_offered in self.snapshot.items
+            if not is_offered and space_index in self.required_spaces
+        ]
+        if offered or requested:
+            # Kept even if it doesn't complete any sets, so that there's always a fair price for a player's own offer
+            self.consider(offered, requested, is_required=True)
+        try:
+            self.search(0, offered, requested)
+        except OutOfTime:
+            pass
+        return [
+            self.make_suggestion(offered, requested)
+            for _, _, _, offered, requested in sorted(self.results, reverse=True)
+        ]
+
+    def get_worst_result(self) -> int:
+        if len(self.results) < self.max_results:
+            return 0
+        return self.results[0][0]
+
+    def search(self, index: int, offered: list[int], requested: list[int]):
+        """Tries adding each of the items from `index` onwards to the trade, or leaving it out"""
+        self.nodes_visited += 1
+        if self.nodes_visited % 256 == 0 and time.perf_counter() > self.deadline:
+            raise OutOfTime()
+        if index == len(self.items):
+            return
+        surplus = self.get_surplus(offered, requested)
+        if surplus + self.remaining_potentials[index] <= self.get_worst_result():
+            return
+        space_index, is_offered = self.items[index]
+        bundle = offered if is_offered else requested
+        if len(bundle) < self.max_bundle_size:
+            bundle.append(space_index)
+            self.consider(offered, requested)
+            self.search(index + 1, offered, requested)
+            bundle.pop()
+        self.search(index + 1, offered, requested)
+
+    def get_masks_after(
+        self, offered: list[int], requested: list[int]
+    ) -> tuple[int, int]:
+        offered_mask = sum(1 << index for index in offered)
+        requested_mask = sum(1 << index for index in requested)
+        proposer_mask = (self.snapshot.proposer_mask & ~offered_mask) | requested_mask
+        recipient_mask = (self.snapshot.recipient_mask & ~requested_mask) | offered_mask
+        return proposer_mask, recipient_mask
+
+    def get_surplus(self, offered: list[int], requested: list[int]) -> int:
+        proposer_mask, recipient_mask = self.get_masks_after(offered, requested)
+        return set_bonus(proposer_mask) + set_bonus(recipient_mask) - self.base_bonus
+
+    def has_padding(
+        self, offered: list[int], requested: list[int], surplus: int
+    ) -> bool:
+        """Returns True if leaving out one of the optional spaces wouldn't change the surplus
+
+        - Such trades just pad out a smaller trade with spaces that don't do anything, e.g. a station thrown in
+          with a set-completing property
+        """
+        for bundle in (offered, requested):
+            for position, space_index in enumerate(bundle):
+                if space_index in self.required_spaces:
+                    continue
+                bundle.pop(position)
+                surplus_without = self.get_surplus(offered, requested)
+                bundle.insert(position, space_index)
+                if surplus_without == surplus:
+                    return True
+        return False
+
+    def consider(self, offered: list[int], requested: list[int], is_required=False):
+        surplus = self.get_surplus(offered, requested)
+        is_worth_keeping = surplus > self.get_worst_result() or (
+            is_required and surplus >= 0
+        )
+        if not is_worth_keeping or self.get_fair_cash(offered, requested) is None:
+            return
+        if not is_required and self.has_padding(offered, requested, surplus):
+            return
+        result = (
+            surplus,
+            -(len(offered) + len(requested)),
+            -self.nodes_visited,
+            tuple(offered),
+            tuple(requested),
+        )
+        if len(self.results) < self.max_results:
+            heapq.heappush(self.results, result)
+        else:
+            heapq.heapreplace(self.results, result)
+
+    def get_gains_without_cash(
+        self, offered: list[int], requested: list[int]
+    ) -> tuple[int, int]:
+        snapshot = self.snapshot
+        proposer_mask, recipient_mask = self.get_masks_after(offered, requested)
+        worth_received = sum(snapshot.worths[index] for index in requested)
+        worth_given = sum(snapshot.worths[index] for index in offered)
+        proposer_gain = (
+            set_bonus(proposer_mask)
+            - set_bonus(snapshot.proposer_mask)
+            + worth_received
+            - worth_given
+        )
+        recipient_gain = (
+            set_bonus(recipient_mask)
+            - set_bonus(snapshot.recipient_mask)
+            + worth_given
+            - worth_received
+        )
+        return proposer_gain, recipient_gain
+
+    def get_fair_cash(self, offered: list[int], requested: list[int]) -> int | None:
+        """Returns the cash that the proposer should pay, or None if no affordable amount works for both players
+
+        - Ideally the gains are split evenly, but otherwise it's as close to even as the players can afford
+        """
+        proposer_gain, recipient_gain = self.get_gains_without_cash(offered, requested)
+        cash = round((proposer_gain - recipient_gain) / 2 / CASH_STEP) * CASH_STEP
+        cash = max(
+            -self.snapshot.recipient_cash, min(cash, self.snapshot.proposer_cash)
+        )
+        if proposer_gain - cash < 0 or recipient_gain + cash < 0:
+            return None
+        return cash
+
+    def make_suggestion(
+        self, offered: tuple[int, ...], requested: tuple[int, ...]
+    ) -> TradeSuggestion:
+        cash = self.get_fair_cash(list(offered), list(requested))
+        assert cash is not None
+        proposer_gain, recipient_gain = self.get_gains_without_cash(
+            list(offered), list(requested)
+        )
+        action = TradeProperties(
+            proposer_index=self.snapshot.proposer_index,
+            recipient_index=self.snapshot.recipient_index,
+            offered_spaces=list(offered),
+            requested_spaces=list(requested),
+            cash=cash,
+        )
+        return TradeSuggestion(action, proposer_gain - cash, recipient_gain + cash)
+
+
+def search_trades(snapshot: TradeSnapshot, **options) -> list[TradeSuggestion]:
+    """Runs a TradeSearch. Safe to call on a worker, because it only reads the snapshot."""
+    return TradeSearch(snapshot, **options).run()
+
+
+def find_trades(
+    tasks: TaskScheduler,
+    data: SavedGameData,
+    proposer_index: int,
+    recipient_index: int,
+    on_done: Callable[[list[TradeSuggestion]], None],
+    required_spaces: tuple[int, ...] = (),
+    time_budget: float = 0.1,
+    kind: WorkerKind = WorkerKind.THREAD,
+    owner: object | None = None,
+) -> Task:
+    """Searches for fair trades on a worker, then calls `on_done` with them (best first) on the main thread
+
+    - Pass a player's own offer's spaces as `required_spaces` to get fair counter-offers to it
+    - Cancel the returned task if the suggestions aren't needed any more, e.g. when the trade screen closes
+    """
+    snapshot = TradeSnapshot(data, proposer_index, recipient_index)
+    search = partial(
+        search_trades, required_spaces=required_spaces, time_budget=time_budget
+    )
+    return tasks.submit(search, snapshot, kind=kind, owner=owner, on_done=on_done)
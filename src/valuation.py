@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from board import BOARD_SPACES, SPACE_COUNT, SpaceType
+from data_storage import SavedGameData
+from events import GameEvent
+from rules import COLOR_GROUP_SPACES, HOTEL, RulesEngine, get_rules
+
+# The spaces that share a rent calculation, i.e. whose rent can change when one of them changes hands
+STATION_SPACES = tuple(
+    index
+    for index, space in enumerate(BOARD_SPACES)
+    if space.space_type == SpaceType.STATION
+)
+UTILITY_SPACES = tuple(
+    index
+    for index, space in enumerate(BOARD_SPACES)
+    if space.space_type == SpaceType.UTILITY
+)
+# How many times the dice roll the rent is, when one or both utilities are owned
+UTILITY_MULTIPLIERS = (4, 10)
+
+
+def get_rent_group(space_index: int) -> tuple[int, ...]:
+    space = BOARD_SPACES[space_index]
+    if space.color_group:
+        return COLOR_GROUP_SPACES[space.color_group]
+    if space.space_type == SpaceType.STATION:
+        return STATION_SPACES
+    if space.space_type == SpaceType.UTILITY:
+        return UTILITY_SPACES
+    return (space_index,)
+
+
+class ValuationService:
+    """Keeps rents and players' property values up to date as the RulesEngine changes properties
+
+    - When a space changes, only the rents in its group (colour group, stations or utilities) are recalculated
+    - Each space's contribution to its owner's totals is remembered, so it can be taken off again when it changes
+    - Cash isn't cached, because it changes far more often than properties do
+    - Net worth is cash, plus the mortgage value of every property that isn't mortgaged yet, plus what the
+      bank pays back for every building (half of what it cost). A mortgaged property adds nothing, because its
+      mortgage value is already in the player's cash.
+    - That's also the most cash that could be raised right now, so the liquidation value is the same figure
+    """
+
+    def __init__(self, rules: RulesEngine) -> None:
+        self.rules = rules
+        # Rent with no dice roll involved. For utilities, this is the multiplier for the dice roll instead.
+        self.rents = [0] * SPACE_COUNT
+        # Each owned space's (owner, worth)
+        self.contributions: dict[int, tuple[int, int]] = {}
+        self.property_worths: dict[int, int] = {}
+        rules.events.on(GameEvent.PROPERTY_CHANGED, self.on_property_changed)
+        for space_index in range(SPACE_COUNT):
+            self.update_space(space_index)
+        for space_index in range(SPACE_COUNT):
+            self.rents[space_index] = self.calculate_rent(space_index)
+
+    def on_property_changed(self, space_index: int):
+        self.update_space(space_index)
+        for other_space_index in get_rent_group(space_index):
+            self.rents[other_space_index] = self.calculate_rent(other_space_index)
+
+    def update_space(self, space_index: int):
+        previous_contribution = self.contributions.pop(space_index, None)
+        if previous_contribution:
+            owner_index, worth = previous_contribution
+            self.property_worths[owner_index] -= worth
+        owner_index = self.rules.owner_of(space_index)
+        if owner_index is None:
+            return
+        worth = self.calculate_worth(space_index)
+        self.contributions[space_index] = (owner_index, worth)
+        self.property_worths[owner_index] = (
+            self.property_worths.get(owner_index, 0) + worth
+        )
+
+    def calculate_worth(self, space_index: int) -> int:
+        """Returns how much cash an owned space could raise, by selling its buildings and mortgaging it"""
+        if self.rules.is_mortgaged(space_index):
+            return 0
+        space = BOARD_SPACES[space_index]
+        building_count = self.rules.building_counts[space_index]
+        # A hotel costs as much as the four houses it replaced, plus one more
+        building_cost = building_count * (space.house_cost or 0)
+        return space.mortgage_value() + building_cost // 2
+
+    def calculate_rent(self, space_index: int) -> int:
+        owner_index = self.rules.owner_of(space_index)
+        if owner_index is None or self.rules.is_mortgaged(space_index):
+            return 0
+        space = BOARD_SPACES[space_index]
+        if space.space_type == SpaceType.STATION:
+            owned_count = sum(
+                self.rules.owner_of(index) == owner_index for index in STATION_SPACES
+            )
+            return space.rents[owned_count - 1]
+        if space.space_type == SpaceType.UTILITY:
+            owned_count = sum(
+                self.rules.owner_of(index) == owner_index for index in UTILITY_SPACES
+            )
+            return UTILITY_MULTIPLIERS[owned_count - 1]
+        assert space.color_group
+        building_count = self.rules.building_counts[space_index]
+        if building_count:
+            return space.rents[min(building_count, HOTEL)]
+        if self.rules.owns_color_group(owner_index, space.color_group):
+            # Rent is doubled on undeveloped properties when the whole colour group is owned
+            return space.rents[0] * 2
+        return space.rents[0]
+
+    def rent_for(self, space_index: int, dice_total: int = 0) -> int:
+        """Returns the rent for landing on a space. Utilities need the total of the dice that were rolled."""
+        if BOARD_SPACES[space_index].space_type == SpaceType.UTILITY:
+            return self.rents[space_index] * dice_total
+        return self.rents[space_index]
+
+    def rent_owed(
+        self, player_index: int, space_index: int, dice_total: int = 0
+    ) -> int:
+        """Returns how much the player owes for landing on a space, which is nothing if they own it"""
+        if self.rules.owner_of(space_index) in (None, player_index):
+            return 0
+        return self.rent_for(space_index, dice_total)
+
+    def get_cash(self, player_index: int) -> int:
+        player = self.rules.get_player(player_index)
+        return player.cash if player else 0
+
+    def net_worth(self, player_index: int) -> int:
+        return self.get_cash(player_index) + self.property_worths.get(player_index, 0)
+
+    def liquidation_value(self, player_index: int) -> int:
+        """The most cash that the player could have if they had to pay a debt right now"""
+        return self.net_worth(player_index)
+
+    def ranked_players(self) -> list[tuple[int, int]]:
+        """Returns (player index, net worth) pairs for a leaderboard, richest first"""
+        net_worths = [
+            (player_index, self.net_worth(player_index))
+            for player_index in range(len(self.rules.data.players))
+        ]
+        return sorted(net_worths, key=lambda pair: pair[1], reverse=True)
+
+
+def get_valuation(data: SavedGameData) -> ValuationService:
+    """Returns the valuation service for a game, creating it the first time that it's needed"""
+    rules = get_rules(data)
+    if not rules.valuation:
+        rules.valuation = ValuationService(rules)
+    return rules.valuation